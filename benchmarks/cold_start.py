@@ -0,0 +1,48 @@
+"""
+Measures the cold-start cost of timefuncs: the wall time of fresh interpreters that import rdflib alone, import
+timefuncs, and import and register timefuncs.
+
+Usage:
+
+    python benchmarks/cold_start.py --runs 20
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+CASES = {
+    "python": "pass",
+    "import rdflib": "import rdflib",
+    "import timefuncs": "import timefuncs",
+    "import timefuncs; register()": "import timefuncs; timefuncs.register()",
+}
+
+
+def cold_start(code: str, runs: int) -> list:
+    """The wall times, in seconds, of running code in each of runs fresh interpreters"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    for case, code in CASES.items():
+        times = cold_start(code, args.runs)
+        print(f"{case:<32} median {statistics.median(times) * 1000:7.1f}ms  min {min(times) * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
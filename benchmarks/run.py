@@ -0,0 +1,188 @@
+"""
+Benchmarks every registered tfun function over synthetic data (see timefuncs/synthetic.py) of increasing size.
+
+For each size, each function is timed
+    * direct: called from Python for a fixed sample of pairs of entities, giving its latency per call
+    * filter: evaluated as a SPARQL FILTER over every pair of intervals, giving its throughput in pairs per second
+
+Results are appended, one JSON object per line, to a results file, and each is compared with the previous result for
+the same size, function and mode there, so that a function slowing down, or scaling worse, shows up.
+
+Usage:
+
+    python benchmarks/run.py --sizes 100 1000 10000 100000 1000000 --filter-max 1000
+
+A size is the number of intervals, with as many standalone instants. FILTERs consider size² pairs, so are only timed
+up to --filter-max.
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rdflib.namespace import RDF, TIME
+from rdflib.plugins.sparql.operators import _CUSTOM_FUNCTIONS
+
+from timefuncs import TFUN, register
+from timefuncs.index import get_index
+from timefuncs.synthetic import DATATYPES, generate
+
+RESULTS = Path(__file__).parent / "results.jsonl"
+
+
+def registered():
+    """The tfun functions of pairs of entities, by local name"""
+    register()
+    return {
+        str(iri)[len(TFUN) :]: func
+        for iri, (func, _) in sorted(_CUSTOM_FUNCTIONS.items())
+        if iri.startswith(TFUN) and func.__module__ != "timefuncs.neighbours"
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def bench_direct(g, func, pairs):
+    """Latencies, in seconds, of calling func for each pair"""
+    ctx = SimpleNamespace(ctx=SimpleNamespace(graph=g))
+    latencies = []
+    for a, b in pairs:
+        e = SimpleNamespace(expr=[a, b])
+        start = time.perf_counter()
+        try:
+            func(e, ctx)
+        except Exception:
+            pass
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench_filter(g, name):
+    """The time, in seconds, to evaluate the function as a FILTER over every pair of intervals"""
+    q = f"""
+        SELECT (COUNT(*) AS ?n)
+        WHERE {{
+            ?a a time:ProperInterval .
+            ?b a time:ProperInterval .
+
+            FILTER tfun:{name}(?a, ?b)
+        }}
+        """
+    start = time.perf_counter()
+    list(g.query(q, initNs={"time": TIME, "tfun": TFUN}))
+    return time.perf_counter() - start
+
+
+def run(sizes, samples, filter_max, seed):
+    functions = registered()
+    for size in sizes:
+        start = time.perf_counter()
+        g = generate(
+            instants=size,
+            intervals=size,
+            cycle_rate=0.01,
+            datatypes={predicate: 1.0 for predicate in DATATYPES},
+            seed=seed,
+        )
+        generated = time.perf_counter() - start
+        start = time.perf_counter()
+        get_index(g)
+        indexed = time.perf_counter() - start
+        yield {
+            "size": size,
+            "function": None,
+            "mode": "build",
+            "triples": len(g),
+            "generate_s": generated,
+            "index_s": indexed,
+        }
+
+        rng = random.Random(seed)
+        entities = sorted(set(g.subjects(RDF.type, TIME.ProperInterval)) | set(g.subjects(RDF.type, TIME.Instant)))
+        pairs = [(rng.choice(entities), rng.choice(entities)) for _ in range(samples)]
+        for name, func in functions.items():
+            latencies = sorted(bench_direct(g, func, pairs))
+            yield {
+                "size": size,
+                "function": name,
+                "mode": "direct",
+                "calls": len(latencies),
+                "median_s": statistics.median(latencies),
+                "p95_s": latencies[int(len(latencies) * 0.95)],
+                "calls_per_s": len(latencies) / sum(latencies),
+            }
+            if size <= filter_max:
+                elapsed = bench_filter(g, name)
+                yield {
+                    "size": size,
+                    "function": name,
+                    "mode": "filter",
+                    "seconds": elapsed,
+                    "pairs_per_s": size * size / elapsed,
+                }
+
+
+def _measure(result):
+    """The figure compared between runs, lower being better"""
+    return {"build": "index_s", "direct": "median_s", "filter": "seconds"}[result["mode"]]
+
+
+def previous_results(path):
+    previous = {}
+    if path.exists():
+        with open(path) as f:
+            for line in f:
+                result = json.loads(line)
+                previous[(result["size"], result["function"], result["mode"])] = result
+    return previous
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--samples", type=int, default=200, help="pairs timed per function in direct mode")
+    parser.add_argument("--filter-max", type=int, default=1000, help="the largest size to time FILTERs at")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=RESULTS)
+    parser.add_argument("--threshold", type=float, default=1.5, help="the slow-down reported as a regression")
+    args = parser.parse_args(argv)
+
+    previous = previous_results(args.output)
+    run_info = {"commit": _commit(), "python": platform.python_version(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    regressions = 0
+    with open(args.output, "a") as out:
+        for result in run(args.sizes, args.samples, args.filter_max, args.seed):
+            result.update(run_info)
+            out.write(json.dumps(result) + "\n")
+
+            measure = _measure(result)
+            line = f"{result['size']:>8} {result['function'] or '-':<16} {result['mode']:<7} {result[measure]:.6f}s"
+            before = previous.get((result["size"], result["function"], result["mode"]))
+            if before is not None and before[measure] > 0:
+                ratio = result[measure] / before[measure]
+                line += f"  x{ratio:.2f} vs {before.get('commit') or 'previous'}"
+                if ratio > args.threshold:
+                    line += "  REGRESSION"
+                    regressions += 1
+            print(line, flush=True)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
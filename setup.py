@@ -34,5 +34,10 @@ setup(
     ],
     test_suite="tests",
     install_requires=["rdflib>=6.0.0"],
+    extras_require={"numpy": ["numpy"]},
+    entry_points={
+        "rdf.plugins.sparqleval": ["timefuncs = timefuncs.plugin:evaluate"],
+        "console_scripts": ["timefuncs = timefuncs.__main__:main"],
+    },
     tests_require=["pytest"],
 )
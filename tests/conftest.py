@@ -0,0 +1,101 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+from rdflib import Graph, Literal, Namespace
+from rdflib.namespace import RDF, TIME, XSD
+
+import timefuncs
+from timefuncs import funcs
+from timefuncs.relations import RELATIONS
+
+EX = Namespace("http://example.com/")
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _registered():
+    """Registers the functions, which rdflib cannot find by their entry point when the tests run from a source tree"""
+    timefuncs.register()
+    yield
+    timefuncs.unregister()
+
+
+def _holds(g, function, a, b):
+    ctx = SimpleNamespace(ctx=SimpleNamespace(graph=g))
+    return getattr(funcs, function)(SimpleNamespace(expr=[a, b]), ctx).value
+
+
+def _expected(g, function, xs, ys=None):
+    return {(x, y) for x in xs for y in (xs if ys is None else ys) if _holds(g, function, x, y)}
+
+
+def _answers(g, entities=None):
+    entities = sorted(set(g.subjects(RDF.type, None))) if entities is None else entities
+    return {(function, x, y): _holds(g, function, x, y) for function in RELATIONS for x in entities for y in entities}
+
+
+def _temporal_entities(g):
+    return sorted(set(g.subjects(RDF.type, None)) | set(g.subjects(TIME.hasBeginning, None)))
+
+
+def _random_graph(seed, size=30):
+    r = random.Random(seed)
+    nodes = [EX[f"e{i}"] for i in range(size)]
+    g = Graph()
+    for i, entity in enumerate(nodes):
+        g.add((entity, RDF.type, TIME.ProperInterval if i % 3 else TIME.Instant))
+        start = r.randrange(20)
+        if i % 3 == 0:
+            g.add((entity, TIME.inXSDDate, Literal(f"2021-01-{start + 1:02}", datatype=XSD.date)))
+        elif r.random() < 0.8:
+            beginning, end = EX[f"e{i}_beginning"], EX[f"e{i}_end"]
+            g.add((entity, TIME.hasBeginning, beginning))
+            g.add((entity, TIME.hasEnd, end))
+            g.add((beginning, TIME.inXSDDate, Literal(f"2021-01-{start + 1:02}", datatype=XSD.date)))
+            g.add((end, TIME.inXSDDate, Literal(f"2021-01-{start + r.randrange(1, 10):02}", datatype=XSD.date)))
+    predicates = [
+        TIME.before,
+        TIME.after,
+        TIME.inside,
+        TIME.intervalContains,
+        TIME.intervalDuring,
+        TIME.intervalStarts,
+        TIME.intervalFinishedBy,
+        TIME.intervalEquals,
+    ]
+    for _ in range(size * 4 // 3):
+        g.add((r.choice(nodes), r.choice(predicates), r.choice(nodes)))
+    return g
+
+
+@pytest.fixture
+def holds():
+    """holds(g, function, a, b): the answer of the function of funcs.py of the given name for a and b in graph g"""
+    return _holds
+
+
+@pytest.fixture
+def expected():
+    """expected(g, function, xs, ys=None): the pairs (x, y), x from xs and y from ys (by default xs), that the function
+    of funcs.py of the given name is true of, calling it for each"""
+    return _expected
+
+
+@pytest.fixture
+def answers():
+    """answers(g, entities=None): the answer of each function of relations.RELATIONS for each pair of entities, by
+    default those with a type"""
+    return _answers
+
+
+@pytest.fixture
+def temporal_entities():
+    """temporal_entities(g): the entities of g that have a type or a beginning, in order"""
+    return _temporal_entities
+
+
+@pytest.fixture
+def random_graph():
+    """random_graph(seed, size=30): a graph of size entities, two thirds of them intervals, with time positions, of the
+    intervals' beginnings and ends or of the instants themselves, and random declared relations between them"""
+    return _random_graph
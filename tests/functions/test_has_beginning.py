@@ -0,0 +1,35 @@
+from pathlib import Path
+from rdflib import Graph, Namespace
+from rdflib.namespace import TIME
+
+from timefuncs import TFUN
+
+HB = Namespace("https://w3id.org/timefuncs/testdata/finishes/")
+
+tests_dir = Path(__file__).parent
+
+
+def test_has_beginning():
+    g = Graph().parse(str(tests_dir / "data" / "has_beginning.ttl"))
+
+    q = """
+        SELECT ?a ?b
+        WHERE {
+            ?a a time:TemporalEntity .
+            ?b a time:Instant .
+
+            FILTER tfun:hasBeginning(?a, ?b)
+        }
+        """
+    expected = [
+        (str(HB.a01), str(HB.b01)),
+        # an Instant is its own beginning
+        (str(HB.a02), str(HB.a02)),
+    ]
+
+    actual = sorted([(str(r[0]), str(r[1])) for r in g.query(q, initNs={"time": TIME, "tfun": TFUN})])
+
+    assert actual == expected
+
+    q = q.replace("tfun:hasBeginning(?a, ?b)", "tfun:isBeginningOf(?b, ?a)")
+    assert sorted((str(r[0]), str(r[1])) for r in g.query(q, initNs={"time": TIME, "tfun": TFUN})) == expected
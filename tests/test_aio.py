@@ -0,0 +1,133 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+from rdflib import Graph, Namespace
+from rdflib.namespace import TIME
+
+from timefuncs import aio
+
+tests_dir = Path(__file__).parent
+before = Namespace("https://w3id.org/timefuncs/testdata/before/")
+
+
+def _graph():
+    return Graph().parse(str(tests_dir / "functions" / "data" / "before.ttl"))
+
+
+class _Blocking(aio.Evaluator):
+    """An Evaluator whose evaluations wait to be released, counting them"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+        self.release = threading.Event()
+
+    def _evaluate(self, *args):
+        self.calls += 1
+        self.release.wait(5)
+        return super()._evaluate(*args)
+
+
+def test_evaluate():
+    g = _graph()
+
+    async def main():
+        async with aio.Evaluator() as evaluator:
+            return await asyncio.gather(
+                evaluator.evaluate(g, "is_before", before.a01, before.b01),
+                evaluator.evaluate(g, "is_before", before.b01, before.a01),
+                evaluator.evaluate(g, "is_after", before.b01, before.a01),
+            )
+
+    assert asyncio.run(main()) == [True, False, True]
+    with pytest.raises(ValueError):
+        asyncio.run(aio.Evaluator().evaluate(g, "no_such_function", before.a01, before.b01))
+
+
+def test_identical_requests_are_coalesced():
+    g = _graph()
+
+    async def main():
+        evaluator = _Blocking()
+        requests = [asyncio.ensure_future(evaluator.evaluate(g, "is_before", before.a01, before.b01)) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        assert evaluator.in_flight == 1
+
+        # a change to the graph gives later requests a new evaluation
+        g.add((before.x, TIME.before, before.y))
+        requests.append(asyncio.ensure_future(evaluator.evaluate(g, "is_before", before.a01, before.b01)))
+        await asyncio.sleep(0.05)
+        assert evaluator.in_flight == 2
+
+        evaluator.release.set()
+        answers = await asyncio.gather(*requests)
+        evaluator.close()
+        return evaluator.calls, answers
+
+    assert asyncio.run(main()) == (2, [True] * 6)
+
+
+def test_cancellation_and_backpressure():
+    g = _graph()
+
+    async def main():
+        evaluator = _Blocking(workers=1, max_in_flight=1)
+        first = asyncio.ensure_future(evaluator.evaluate(g, "is_before", before.a01, before.b01))
+        again = asyncio.ensure_future(evaluator.evaluate(g, "is_before", before.a01, before.b01))
+        waiting = asyncio.ensure_future(evaluator.evaluate(g, "is_before", before.b01, before.a01))
+        await asyncio.sleep(0.05)
+        assert evaluator.saturated
+        assert evaluator.in_flight == 2
+
+        # the last request waiting for an evaluation cancels it, other requests' evaluations carry on
+        waiting.cancel()
+        first.cancel()
+        await asyncio.sleep(0.05)
+        assert evaluator.in_flight == 1
+        evaluator.release.set()
+        answer = await again
+        assert first.cancelled() and waiting.cancelled()
+        await asyncio.sleep(0.05)
+        assert not evaluator.saturated
+        evaluator.close()
+        return evaluator.calls, answer
+
+    assert asyncio.run(main()) == (1, True)
+
+
+def test_request_after_cancellation():
+    g = _graph()
+
+    async def main():
+        evaluator = _Blocking()
+        first = asyncio.ensure_future(evaluator.evaluate(g, "is_before", before.a01, before.b01))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await asyncio.sleep(0)
+        again = asyncio.ensure_future(evaluator.evaluate(g, "is_before", before.a01, before.b01))
+        await asyncio.sleep(0.05)
+        assert evaluator.in_flight == 1
+        evaluator.release.set()
+        answer = await again
+        evaluator.close()
+        return first.cancelled(), answer
+
+    assert asyncio.run(main()) == (True, True)
+
+
+def test_evaluations_ending_after_the_loop(caplog):
+    g = _graph()
+    evaluator = _Blocking(workers=1)
+
+    async def main():
+        async with evaluator:
+            request = asyncio.ensure_future(evaluator.evaluate(g, "is_before", before.a01, before.b01))
+            await asyncio.sleep(0.05)
+            request.cancel()
+
+    asyncio.run(main())
+    evaluator.release.set()
+    evaluator._executor.shutdown(wait=True)
+    assert not [record for record in caplog.records if record.exc_info]
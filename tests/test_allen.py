@@ -0,0 +1,113 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from rdflib import Graph, Namespace
+from rdflib.namespace import TIME
+
+from timefuncs import TFUN, funcs
+from timefuncs.allen import ALLEN_RELATIONS, allen_relations, composition, network
+from timefuncs.index import get_index
+from timefuncs.relations import declared_from
+
+EX = Namespace("http://example.com/")
+test_suite_dir = Path(__file__).parent / "test-suite"
+individuals = Graph().parse(str(test_suite_dir / "time-test-individuals.ttl"))
+
+
+@pytest.mark.parametrize("relation", [r.split("#")[1] for r in ALLEN_RELATIONS])
+def test_test_suite(relation):
+    for truth in ("true", "false"):
+        axioms = Graph().parse(str(test_suite_dir / f"{relation}-{truth}.ttl"))
+        for s, p, o in axioms.triples((None, TIME[relation], None)):
+            relations = allen_relations(individuals, s, o)
+            if truth == "true":
+                assert relations == {p}, (s, o)
+            else:
+                assert p not in relations, (s, o)
+
+
+data = """
+    PREFIX : <http://example.com/>
+    PREFIX time: <http://www.w3.org/2006/time#>
+    PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+
+    :a a time:ProperInterval ;
+        time:hasBeginning [ time:inXSDDateTimeStamp "2021-01-01T00:00:00Z"^^xsd:dateTimeStamp ] ;
+        time:hasEnd :a_end ;
+    .
+    :a_end time:inXSDDateTimeStamp "2021-01-05T00:00:00Z"^^xsd:dateTimeStamp .
+    :b a time:ProperInterval ;
+        time:hasBeginning :a_end ;
+        time:hasEnd [ time:inXSDDate "2021-01-09"^^xsd:date ] ;
+    .
+    :c a time:ProperInterval ;
+        time:hasBeginning [ time:inXSDDateTimeStamp "2021-01-03T00:00:00Z"^^xsd:dateTimeStamp ] ;
+    .
+    :d a time:ProperInterval ;
+        time:intervalIn :e ;
+    .
+    :e a time:ProperInterval .
+    """
+
+
+def test_shared_endpoint_and_incomplete_data():
+    g = Graph().parse(data=data, format="turtle")
+    assert allen_relations(g, EX.a, EX.b) == {TIME.intervalMeets}
+    assert allen_relations(g, EX.b, EX.a) == {TIME.intervalMetBy}
+
+    # c has no end, so it may end at any time after it begins
+    assert allen_relations(g, EX.a, EX.c) == {TIME.intervalOverlaps, TIME.intervalFinishedBy, TIME.intervalContains}
+    assert allen_relations(g, EX.d, EX.e) == {TIME.intervalStarts, TIME.intervalDuring, TIME.intervalFinishes}
+    assert allen_relations(g, EX.e, EX.d) == {TIME.intervalStartedBy, TIME.intervalContains, TIME.intervalFinishedBy}
+
+
+def test_sparql():
+    g = Graph().parse(data=data, format="turtle")
+    q = """
+        SELECT ?b ?relation
+        WHERE {
+            VALUES ?b { :b :c }
+            BIND (tfun:allenRelation(:a, ?b) AS ?relation)
+        }
+        """
+    actual = {r[0]: r[1] for r in g.query(q, initNs={"": EX, "tfun": TFUN})}
+    assert actual == {EX.b: TIME.intervalMeets, EX.c: None}
+
+
+def test_composition_table():
+    assert composition(TIME.intervalMeets, TIME.intervalBefore) == {TIME.intervalBefore}
+    assert composition(TIME.intervalDuring, TIME.intervalDuring) == {TIME.intervalDuring}
+    assert composition(TIME.intervalOverlaps, TIME.intervalOverlaps) == {
+        TIME.intervalBefore,
+        TIME.intervalMeets,
+        TIME.intervalOverlaps,
+    }
+    assert composition(TIME.intervalBefore, TIME.intervalAfter) == set(ALLEN_RELATIONS)
+    # Allen's table has 409 entries in all
+    assert sum(len(composition(r, s)) for r in ALLEN_RELATIONS for s in ALLEN_RELATIONS) == 409
+
+
+def test_declared_network():
+    g = Graph()
+    g.add((EX.a, TIME.intervalMeets, EX.b))
+    g.add((EX.b, TIME.intervalBefore, EX.c))
+    g.add((EX.d, TIME.intervalDuring, EX.c))
+    ctx = SimpleNamespace(ctx=SimpleNamespace(graph=g))
+
+    assert allen_relations(g, EX.a, EX.c) == {TIME.intervalBefore}
+    assert allen_relations(g, EX.a, EX.d) == {TIME.intervalBefore}
+    assert funcs.is_before(SimpleNamespace(expr=[EX.a, EX.d]), ctx).value
+    assert funcs.is_after(SimpleNamespace(expr=[EX.d, EX.a]), ctx).value
+    assert EX.d in declared_from(get_index(g), "before", EX.a)
+    assert network(g).consistent
+
+    # a cycle of before relations cannot hold, and leaves no relation between the intervals in it
+    g.add((EX.x, TIME.intervalBefore, EX.y))
+    g.add((EX.y, TIME.intervalMeets, EX.z))
+    g.add((EX.z, TIME.intervalBefore, EX.x))
+    assert not network(g).consistent
+    assert len(network(g).conflicts) == 1
+    assert allen_relations(g, EX.x, EX.y) == frozenset()
+    assert not funcs.is_before(SimpleNamespace(expr=[EX.x, EX.y]), ctx).value
+    assert allen_relations(g, EX.a, EX.c) == {TIME.intervalBefore}
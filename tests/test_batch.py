@@ -0,0 +1,39 @@
+import multiprocessing
+from itertools import islice
+from pathlib import Path
+
+import pytest
+from rdflib import BNode, Graph, Literal
+from rdflib.namespace import RDF, TIME, XSD
+
+from timefuncs import batch
+from timefuncs.synthetic import generate
+
+tests_dir = Path(__file__).parent
+context = multiprocessing.get_context("spawn")
+
+
+def test_evaluate(holds):
+    g = generate(instants=15, intervals=15, chain_depth=3, cycle_rate=0.1, seed=3)
+    entities = sorted(set(g.subjects(RDF.type, None)))
+    pairs = [(a, b) for a in entities for b in entities]
+    for function in ("is_before", "is_contained_by", "has_inside"):
+        found = list(batch.evaluate(g, function, pairs, workers=2, chunk_size=50, mp_context=context))
+        assert found == [holds(g, function, a, b) for a, b in pairs], function
+
+
+def test_blank_nodes_and_early_stops():
+    g = Graph()
+    a, b = BNode(), BNode()
+    g.add((a, RDF.type, TIME.Instant))
+    g.add((a, TIME.inXSDDate, Literal("2021-01-01", datatype=XSD.date)))
+    g.add((b, RDF.type, TIME.Instant))
+    g.add((b, TIME.inXSDDate, Literal("2021-01-02", datatype=XSD.date)))
+
+    pairs = [(a, b), (b, a)] * 100
+    answers = batch.evaluate(g, "is_before", pairs, workers=1, chunk_size=3, mp_context=context)
+    assert list(islice(answers, 4)) == [True, False, True, False]
+    answers.close()
+
+    with pytest.raises(ValueError):
+        batch.evaluate(g, "no_such_function", pairs)
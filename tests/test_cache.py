@@ -0,0 +1,110 @@
+from pathlib import Path
+
+from rdflib import Graph, Namespace
+from rdflib.namespace import RDF, TIME
+
+from timefuncs import cache, stats
+from timefuncs.relations import RELATIONS
+
+tests_dir = Path(__file__).parent
+contains = Namespace("https://w3id.org/timefuncs/testdata/contains/")
+
+
+def test_cached_answers_are_the_same(holds):
+    g = Graph().parse(str(tests_dir / "functions" / "data" / "contains.ttl"))
+    entities = sorted(set(g.subjects(RDF.type, None)))
+    calls = [(function, x, y) for function in RELATIONS for x in entities for y in entities]
+    expected = [holds(g, *call) for call in calls]
+
+    cache.enable()
+    cache.reset()
+    try:
+        assert [holds(g, *call) for call in calls] == expected
+        assert [holds(g, *call) for call in calls] == expected
+        info = cache.info()
+        assert info.hits >= len(calls) and info.evictions == 0
+    finally:
+        cache.disable()
+
+
+def test_inverses_changes_and_evictions(holds):
+    g = Graph().parse(str(tests_dir / "functions" / "data" / "contains.ttl"))
+    a, b = contains.a01, contains.b01
+
+    cache.enable(maxsize=4)
+    cache.reset()
+    try:
+        with stats.collecting() as collected:
+            assert holds(g, "contains", a, b)
+            assert holds(g, "is_contained_by", b, a)
+            assert not holds(g, "is_contained_by", a, b)
+        assert collected["is_contained_by"].rules["cache"] == 1
+        assert cache.info()[:3] == (1, 2, 0)
+
+        # the answers of the graph as it was are not given once it changes
+        g.add((b, TIME.intervalContains, a))
+        assert holds(g, "is_contained_by", a, b)
+        assert cache.info()[:3] == (1, 3, 0)
+
+        for x in sorted(set(g.subjects(RDF.type, None)))[:3]:
+            holds(g, "finishes", x, b)
+        assert cache.info().evictions == 4
+    finally:
+        cache.disable()
+
+
+def test_inverse_pairs(holds):
+    from timefuncs.funcs import _INVERSES
+
+    for function, inverse in (("is_before", "is_after"), ("contains", "is_contained_by"), ("starts", "is_started_by")):
+        assert _INVERSES[function] == inverse and _INVERSES[inverse] == function
+
+    g = Graph().parse(str(tests_dir / "functions" / "data" / "after.ttl"))
+    after = Namespace("https://w3id.org/timefuncs/testdata/after/")
+    cache.enable()
+    cache.reset()
+    try:
+        with stats.collecting() as collected:
+            assert holds(g, "is_after", after.a10, after.b10)
+            assert holds(g, "is_before", after.b10, after.a10)
+            assert not holds(g, "is_before", after.a10, after.b10)
+        assert collected["is_before"].rules["cache"] == 1
+    finally:
+        cache.disable()
+
+
+def test_threads_sharing_a_cache():
+    import sys
+    import threading
+
+    from timefuncs.index import get_index
+
+    index = get_index(Graph())
+    cache.enable(maxsize=8)
+    cache.reset()
+    errors = []
+    # switch threads as often as possible, so that they interleave within get() and put()
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+
+    def worker(offset):
+        try:
+            for i in range(2000):
+                x = contains[f"e{(i + offset) % 32}"]
+                if cache.get(index, "contains", x, contains.b01) is None:
+                    cache.put(index, "contains", x, contains.b01, True, "is_contained_by")
+        except Exception as e:  # pragma: no cover - only on a failure
+            errors.append(e)
+
+    try:
+        threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+        cache.disable()
+    assert not errors
+    assert len(index._resolved[("answers",)]) == 8
+    assert cache.info().hits + cache.info().misses == 8 * 2000
@@ -0,0 +1,72 @@
+import random
+from pathlib import Path
+
+from rdflib import Graph, Namespace
+from rdflib.namespace import TIME
+
+from timefuncs import TFUN
+from timefuncs.closure import FAMILIES
+from timefuncs.funcs import _path_exists
+from timefuncs.index import enable_closures, get_index
+
+EX = Namespace("http://example.com/")
+tests_dir = Path(__file__).parent
+
+
+def _assert_closure_matches_search(g, nodes):
+    index = get_index(g)
+    for a in nodes:
+        for b in nodes:
+            assert index.reaches(a, b, "before") == _path_exists(g, a, b, list(FAMILIES["before"])), (a, b)
+
+
+def test_closure_maintained_incrementally():
+    r = random.Random(3)
+    nodes = [EX[f"n{i}"] for i in range(25)]
+    g = Graph()
+    for _ in range(30):
+        g.add((r.choice(nodes), r.choice((TIME.before, TIME.after)), r.choice(nodes)))
+    enable_closures(g, ["before"])
+    _assert_closure_matches_search(g, nodes)
+
+    for _ in range(10):
+        for _ in range(5):
+            g.add((r.choice(nodes), r.choice((TIME.before, TIME.after)), r.choice(nodes)))
+        for _ in range(5):
+            g.remove(r.choice(list(g)))
+        _assert_closure_matches_search(g, nodes)
+
+
+def test_edge_declared_twice():
+    g = Graph()
+    g.add((EX.a, TIME.before, EX.b))
+    g.add((EX.b, TIME.after, EX.a))
+    g.add((EX.b, TIME.before, EX.c))
+    enable_closures(g)
+    index = get_index(g)
+    assert index.reaches(EX.a, EX.c, "before")
+
+    # a is still declared to be before b
+    g.remove((EX.a, TIME.before, EX.b))
+    assert get_index(g).reaches(EX.a, EX.c, "before")
+
+    g.remove((EX.b, TIME.after, EX.a))
+    assert not get_index(g).reaches(EX.a, EX.c, "before")
+    assert get_index(g) is index
+
+
+def test_functions_use_closures():
+    g = Graph().parse(str(tests_dir / "functions" / "data" / "contains.ttl"))
+    enable_closures(g)
+    q = """
+        SELECT ?a ?b
+        WHERE {
+            ?a a time:Interval .
+            ?b a time:Interval .
+
+            FILTER tfun:contains(?a, ?b)
+        }
+        """
+    actual = sorted((str(r[0]), str(r[1])) for r in g.query(q, initNs={"time": TIME, "tfun": TFUN}))
+    contains = Namespace("https://w3id.org/timefuncs/testdata/contains/")
+    assert actual == [(str(contains[f"a0{i}"]), str(contains[f"b0{i}"])) for i in range(1, 10)]
@@ -0,0 +1,110 @@
+from pathlib import Path
+
+from rdflib import BNode, Graph, Literal, Namespace, URIRef
+from rdflib.namespace import RDF, TIME, XSD
+
+from timefuncs import enrich
+from timefuncs.relations import RELATIONS
+from timefuncs.sqlite import TemporalDatabase
+from timefuncs.timestamps import UNIX_TIME
+
+EX = Namespace("http://example.com/")
+tests_dir = Path(__file__).parent
+
+
+def _numeric(g, node):
+    return {
+        (g.value(position, TIME.hasTRS), g.value(position, TIME.numericPosition))
+        for position in g.objects(node, TIME.inTimePosition)
+    }
+
+
+def test_unix_time():
+    g = Graph()
+    g.add((EX.a, TIME.inXSDDateTimeStamp, Literal("2021-07-16T10:00:00+10:00", datatype=XSD.dateTimeStamp)))
+    g.add((EX.b, TIME.inXSDDateTime, Literal("1969-12-31T23:59:58.5", datatype=XSD.dateTime)))
+    g.add((EX.c, TIME.inXSDDate, Literal("2021-07-16", datatype=XSD.date)))
+    enriched = Graph()
+    for triple in enrich.enrich(g):
+        enriched.add(triple)
+
+    assert _numeric(enriched, EX.a) == {(UNIX_TIME, Literal(1626393600, datatype=XSD.integer))}
+    assert _numeric(enriched, EX.b) == {(UNIX_TIME, Literal("-1.5", datatype=XSD.decimal))}
+    assert _numeric(enriched, EX.c) == set()
+    assert (EX.a, TIME.inXSDDateTimeStamp, None) in enriched
+
+
+def test_numeric_positions_answer_as_xsd_ones(answers, expected):
+    for name in ("before", "after", "contains", "has_inside"):
+        g = Graph().parse(str(tests_dir / "functions" / "data" / f"{name}.ttl"))
+        numeric = Graph()
+        for triple in enrich.enrich(g, replace=True):
+            numeric.add(triple)
+        assert not set(numeric.triples((None, TIME.inXSDDateTimeStamp, None)))
+        assert answers(numeric) == answers(g), name
+
+        entities = sorted(set(g.subjects(RDF.type, None)))
+        with TemporalDatabase() as db:
+            db.load(numeric)
+            for function in RELATIONS:
+                assert db.pairs(function, entities, entities) == expected(g, function, entities), (name, function)
+
+
+def test_other_reference_systems_on_their_own_axis(holds, expected):
+    import numpy as np
+
+    from timefuncs.joins import candidate_pairs
+    from timefuncs.index import get_index
+    from timefuncs.matrix import relation_matrix
+    from timefuncs.ordered import iter_before
+
+    trs = URIRef("http://example.com/trs")
+    g = Graph()
+    for node, system, value in (
+        (EX.a, UNIX_TIME, 10),
+        (EX.b, UNIX_TIME, 20),
+        (EX.c, trs, 1),
+        (EX.d, trs, 2.5),
+        (EX.i_beginning, trs, 0),
+        (EX.i_end, trs, 3),
+    ):
+        position = BNode()
+        g.add((node, TIME.inTimePosition, position))
+        g.add((position, TIME.hasTRS, system))
+        g.add((position, TIME.numericPosition, Literal(value)))
+    for node in (EX.a, EX.b, EX.c, EX.d):
+        g.add((node, RDF.type, TIME.Instant))
+    g.add((EX.i, RDF.type, TIME.ProperInterval))
+    g.add((EX.i, TIME.hasBeginning, EX.i_beginning))
+    g.add((EX.i, TIME.hasEnd, EX.i_end))
+
+    assert holds(g, "is_before", EX.a, EX.b)
+    assert holds(g, "is_before", EX.c, EX.d) and holds(g, "is_after", EX.d, EX.c)
+    assert not holds(g, "is_before", EX.d, EX.c)
+    assert holds(g, "is_inside", EX.c, EX.i) and holds(g, "has_inside", EX.i, EX.d)
+    # positions in different systems are not compared
+    for x, y in ((EX.c, EX.b), (EX.b, EX.c), (EX.a, EX.d)):
+        assert not holds(g, "is_before", x, y) and not holds(g, "is_after", x, y)
+    assert not holds(g, "is_inside", EX.a, EX.i)
+
+    entities = [EX.a, EX.b, EX.c, EX.d, EX.i]
+    index = get_index(g)
+    for function in RELATIONS:
+        found = expected(g, function, entities)
+        assert found <= candidate_pairs(index, function, set(entities), set(entities)), function
+        if function not in ("is_inside", "has_inside"):
+            m = relation_matrix(g, function, entities, entities)
+            assert {(entities[i], entities[j]) for i, j in zip(*np.nonzero(m))} == found, function
+    assert set(iter_before(g, EX.d)) == {EX.c, EX.i_beginning}
+    assert list(iter_before(g, EX.b)) == [EX.a]
+
+
+def test_command(tmp_path):
+    source = tmp_path / "in.nt"
+    g = Graph().parse(str(tests_dir / "functions" / "data" / "before.ttl"))
+    g.serialize(str(source), format="nt", encoding="utf-8")
+    target = tmp_path / "out.nt"
+    assert enrich.main([str(source), "-o", str(target), "--replace"]) == 0
+    g = Graph().parse(str(target), format="nt")
+    assert set(g.objects(None, TIME.hasTRS)) == {UNIX_TIME}
+    assert not set(g.triples((None, TIME.inXSDDateTimeStamp, None)))
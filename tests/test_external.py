@@ -0,0 +1,41 @@
+from rdflib import Graph, Literal, Namespace
+from rdflib.namespace import RDF, TIME, XSD
+
+from timefuncs import external, materialize, synthetic
+from timefuncs.__main__ import main
+from timefuncs.index import POSITION_PREDICATES
+
+EX = Namespace("http://example.com/")
+
+
+def test_relations_are_those_calculated_in_memory():
+    # the triples read out of core, without declared relations between entities
+    kept = set(POSITION_PREDICATES) | {RDF.type, TIME.hasBeginning, TIME.hasEnd}
+    g = Graph()
+    for triple in synthetic.generate(instants=60, intervals=60, max_length=500, seed=2):
+        if triple[1] in kept:
+            g.add(triple)
+
+    for name in materialize.PREDICATES:
+        expected = set(materialize.materialize(g, [name]))
+        # a few records per run, merged in several passes
+        triples = list(external.materialize(iter(g), [name], max_records=5))
+        assert len(triples) == len(set(triples)) and set(triples) == expected, name
+
+
+def test_command(tmp_path):
+    g = Graph()
+    for i, (beginning, end) in enumerate([("2021-01-01", "2021-12-31"), ("2021-03-01", "2021-04-01")]):
+        interval = EX[f"i{i}"]
+        g.add((interval, RDF.type, TIME.ProperInterval))
+        for step, date in ((TIME.hasBeginning, beginning), (TIME.hasEnd, end)):
+            g.add((interval, step, EX[f"i{i}-{date}"]))
+            g.add((EX[f"i{i}-{date}"], TIME.inXSDDate, Literal(date, datatype=XSD.date)))
+    source = tmp_path / "in.nt"
+    g.serialize(str(source), format="nt", encoding="utf-8")
+
+    target = tmp_path / "out.nt"
+    args = ["materialize", str(source), "-o", str(target), "-r", "intervalContains", "-r", "before"]
+    assert main(args + ["--out-of-core", "--max-records", "2", "--temporary-directory", str(tmp_path)]) == 0
+    assert set(Graph().parse(str(target), format="nt")) == {(EX.i0, TIME.intervalContains, EX.i1)}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["in.nt", "out.nt"]
@@ -0,0 +1,209 @@
+from rdflib import Graph, Literal, Namespace
+from rdflib.namespace import TIME
+
+from timefuncs import TFUN
+from timefuncs.index import get_index, invalidate
+
+EX = Namespace("http://example.com/")
+
+data = """
+    PREFIX : <http://example.com/>
+    PREFIX time: <http://www.w3.org/2006/time#>
+
+    :a a time:Interval ;
+        time:hasBeginning :a_beginning ;
+        time:hasEnd [ time:before :b ] ;
+    .
+    :a_beginning time:inXSDDateTimeStamp "2021-07-16T00:00:00Z" .
+    :b a time:Interval ;
+        time:after :c ;
+    .
+    """
+
+
+def test_index_contents():
+    g = Graph().parse(data=data, format="turtle")
+    index = get_index(g)
+
+    assert index.is_a(EX.a, TIME.Interval)
+    assert not index.is_a(EX.c, TIME.Interval)
+    assert index.objects(EX.a, TIME.hasBeginning) == {EX.a_beginning}
+    assert index.subjects(TIME.after, EX.c) == {EX.b}
+    assert EX.b in index.path_objects(EX.a, TIME.hasEnd, TIME.before)
+    assert index.declared_before(EX.c, EX.b)
+    assert index.endpoint_positions(EX.a, TIME.hasBeginning) == (Literal("2021-07-16T00:00:00Z"),)
+
+
+def test_index_reused_and_updated():
+    g = Graph().parse(data=data, format="turtle")
+    index = get_index(g)
+
+    # another Graph object over the same store and identifier shares the index
+    assert get_index(Graph(store=g.store, identifier=g.identifier)) is index
+
+    g.add((EX.c, TIME.before, EX.d))
+    g.add((EX.d, TIME.inXSDDate, Literal("2021-07-17")))
+    assert get_index(g) is index
+    assert index.has(EX.c, TIME.before, EX.d)
+    assert index.positions(EX.d) == [Literal("2021-07-17")]
+
+    g.remove((EX.b, TIME.after, EX.c))
+    g.remove((EX.d, TIME.inXSDDate, None))
+    assert get_index(g) is index
+    assert not index.declared_before(EX.c, EX.b)
+    assert index.positions(EX.d) == []
+
+    g.remove((EX.a, None, None))
+    assert get_index(g) is index
+    assert not index.is_a(EX.a, TIME.Interval)
+    assert index.objects(EX.a, TIME.hasBeginning) == set()
+
+    # removing everything is not worth applying triple by triple, so the index is rebuilt
+    g.remove((None, None, None))
+    rebuilt = get_index(g)
+    assert rebuilt is not index
+    assert not rebuilt.is_a(EX.b, TIME.Interval)
+
+    invalidate(g)
+    assert get_index(g) is not rebuilt
+
+
+def test_store_remove_restored():
+    g = Graph().parse(data=data, format="turtle")
+    assert "remove" not in vars(g.store)
+    index = get_index(g)
+    assert "remove" in vars(g.store)
+
+    # the store gets its own remove() back once its last index is dropped, and is watched again when next indexed
+    invalidate(g)
+    assert "remove" not in vars(g.store)
+    g.remove((EX.a, None, None))
+    index = get_index(g)
+    g.remove((EX.b, TIME.after, EX.c))
+    assert get_index(g) is index
+    assert not index.declared_before(EX.c, EX.b)
+
+
+def test_pickled_graph():
+    import pickle
+
+    g = Graph().parse(data=data, format="turtle")
+    get_index(g)
+    copy = pickle.loads(pickle.dumps(g))
+    assert len(copy) == len(g)
+    assert get_index(copy).has(EX.b, TIME.after, EX.c)
+
+
+def test_query_sees_changes():
+    g = Graph().parse(data=data, format="turtle")
+    q = """
+        ASK {
+            FILTER tfun:isBefore(<http://example.com/d>, <http://example.com/e>)
+        }
+        """
+    assert not g.query(q, initNs={"tfun": TFUN}).askAnswer
+
+    g.add((EX.d, TIME.before, EX.e))
+    assert g.query(q, initNs={"tfun": TFUN}).askAnswer
+
+    g.remove((EX.d, TIME.before, EX.e))
+    assert not g.query(q, initNs={"tfun": TFUN}).askAnswer
+
+
+def test_dataset():
+    from rdflib import Dataset
+
+    from timefuncs.index import UnionIndex, _store_indexes
+
+    d = Dataset(default_union=True)
+    for i in range(3):
+        d.graph(EX[f"g{i}"]).add((EX[f"e{i}"], TIME.before, EX[f"e{i + 1}"]))
+    q = """
+        SELECT ?g ?a ?b
+        WHERE {
+            GRAPH ?g { ?a time:before ?b . FILTER tfun:isBefore(?a, ?b) }
+        }
+        """
+    assert len(list(d.query(q, initNs={"time": TIME, "tfun": TFUN}))) == 3
+    indexes = dict(_store_indexes(d).indexes)
+
+    # the union of the graphs is a view of their indexes
+    union = get_index(d)
+    assert isinstance(union, UnionIndex)
+    assert union.graphs[EX.g1] is indexes[EX.g1]
+    assert union.objects(EX.e1, TIME.before) == {EX.e2}
+    assert len(union.closure(EX.e0, TIME.before)) == 4
+
+    # a change to one graph only touches that graph's index
+    d.graph(EX.g1).add((EX.e2, TIME.before, EX.e0))
+    pending = [graph for graph, index in _store_indexes(d).indexes.items() if index.pending]
+    assert pending == [EX.g1] and union.pending == {EX.g1}
+    assert get_index(d.graph(EX.g0)) is indexes[EX.g0]
+    assert get_index(d) is union
+    assert union.objects(EX.e2, TIME.before) == {EX.e3, EX.e0}
+    assert len(union.closure(EX.e1, TIME.before)) == 4
+
+    # without default_union, a Dataset's triples are those of its default graph
+    d = Dataset()
+    d.graph(EX.g0).add((EX.a, TIME.before, EX.b))
+    assert get_index(d) is get_index(d.default_context)
+    assert not get_index(d).declared_before(EX.a, EX.b)
+
+
+def test_union_closures_updated(monkeypatch):
+    from rdflib import Dataset
+
+    from timefuncs.index import UnionIndex, enable_closures
+
+    d = Dataset(default_union=True)
+    d.graph(EX.g0).add((EX.a, TIME.before, EX.b))
+    d.graph(EX.g1).add((EX.b, TIME.before, EX.c))
+    enable_closures(d, ["before"])
+    union = get_index(d)
+    assert union.reaches(EX.a, EX.c, "before")
+
+    # the changes each graph's index applies are passed on to the union's closures, which are not rebuilt
+    def build_closure(self, family):
+        raise AssertionError("rebuilt")
+
+    monkeypatch.setattr(UnionIndex, "build_closure", build_closure)
+    d.graph(EX.g0).add((EX.b, TIME.before, EX.c))
+    d.graph(EX.g1).remove((EX.b, TIME.before, EX.c))
+    assert get_index(d) is union
+    assert union.reaches(EX.a, EX.c, "before")
+    d.graph(EX.g0).remove((EX.b, TIME.before, EX.c))
+    d.graph(EX.g1).add((EX.c, TIME.before, EX.d))
+    assert get_index(d) is union
+    assert not union.reaches(EX.a, EX.c, "before") and union.reaches(EX.c, EX.d, "before")
+
+
+def test_one_thread_at_a_time_syncs(monkeypatch):
+    import threading
+    import time
+
+    from timefuncs.index import TemporalIndex
+
+    g = Graph()
+    g.add((EX.a, TIME.before, EX.b))
+    index = get_index(g)
+    syncing = []
+    overlapped = []
+    sync = TemporalIndex.sync
+
+    def slow_sync(self, *args):
+        overlapped.append(bool(syncing))
+        syncing.append(self)
+        time.sleep(0.05)
+        relations = sync(self, *args)
+        syncing.pop()
+        return relations
+
+    monkeypatch.setattr(TemporalIndex, "sync", slow_sync)
+    g.add((EX.b, TIME.before, EX.c))
+    threads = [threading.Thread(target=get_index, args=(g,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert overlapped == [False]
+    assert index.objects(EX.b, TIME.before) == {EX.c}
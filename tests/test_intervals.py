@@ -0,0 +1,68 @@
+import random
+
+from rdflib import Graph, Namespace
+
+from timefuncs.index import get_index
+from timefuncs.intervals import IntervalIndex
+
+EX = Namespace("http://example.com/")
+
+
+def _extents(n, seed=1):
+    r = random.Random(seed)
+    extents = []
+    for i in range(n):
+        start = r.randint(0, 100)
+        extents.append((start, start + r.randint(0, 30), i))
+    return extents
+
+
+def test_queries_match_brute_force():
+    extents = _extents(300)
+    index = IntervalIndex(extents)
+    for start in range(-5, 140, 3):
+        for end in (start, start + 1, start + 7, start + 40):
+            assert index.stabbing(start) == {e for s, f, e in extents if s <= start <= f}
+            assert index.stabbing(start, strict=True) == {e for s, f, e in extents if s < start < f}
+            assert index.overlapping(start, end) == {e for s, f, e in extents if s <= end and f >= start}
+            assert index.overlapping(start, end, strict=True) == {e for s, f, e in extents if s < end and f > start}
+            assert index.containing(start, end) == {e for s, f, e in extents if s <= start and end <= f}
+            assert index.containing(start, end, strict=True) == {e for s, f, e in extents if s < start and end < f}
+            assert index.within(start, end) == {e for s, f, e in extents if start <= s and f <= end}
+            assert index.within(start, end, strict=True) == {e for s, f, e in extents if start < s and f < end}
+
+
+def test_empty():
+    index = IntervalIndex([])
+    assert len(index) == 0
+    assert index.stabbing(1) == set()
+
+
+def test_temporal_index_extents():
+    data = """
+        PREFIX : <http://example.com/>
+        PREFIX time: <http://www.w3.org/2006/time#>
+        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+
+        :i1 time:hasBeginning [ time:inXSDDate "2021-01-01"^^xsd:date ] ;
+            time:hasEnd [ time:inXSDDate "2021-12-31"^^xsd:date ] .
+        :i2 time:hasBeginning [ time:inXSDDate "2021-06-01"^^xsd:date ] ;
+            time:hasEnd [ time:inXSDDate "2022-06-01"^^xsd:date ] .
+        :t1 time:inXSDDate "2021-03-01"^^xsd:date .
+        :t2 time:inXSDDate "2022-01-01"^^xsd:date .
+        """
+    index = get_index(Graph().parse(data=data, format="turtle"))
+    intervals = index.interval_index()
+    # spans of whole days, as integers
+    t1 = index.spans(EX.t1)[0][0]
+    t2 = index.spans(EX.t2)[0][0]
+
+    assert intervals.stabbing(t1) == {EX.i1}
+    assert intervals.stabbing(t2) == {EX.i2}
+    assert intervals.overlapping(t1, t2) == {EX.i1, EX.i2}
+    # the beginnings and ends of the intervals are instants too
+    assert len(index.instant_index()) == 6
+    t2_end = index.spans(EX.t2)[0][1]
+    assert index.instant_index().within(t1, t2_end) >= {EX.t1, EX.t2}
+    assert EX.t2 not in index.instant_index().within(t1, t2)
+    assert index.interval_index() is intervals
@@ -0,0 +1,88 @@
+from collections import Counter
+from pathlib import Path
+
+import pytest
+from rdflib import Graph
+from rdflib.namespace import TIME
+from rdflib.plugins.sparql import CUSTOM_EVALS
+
+from timefuncs import TFUN, joins
+from timefuncs.relations import RELATIONS
+
+tests_dir = Path(__file__).parent
+
+
+def _camel_case(name):
+    first, *rest = name.split("_")
+    return first + "".join(word.title() for word in rest)
+
+
+def _results(g, q, joined):
+    hook = CUSTOM_EVALS.pop("timefuncs")
+    try:
+        if joined:
+            CUSTOM_EVALS["timefuncs"] = hook
+        return Counter(tuple(r) for r in g.query(q, initNs={"time": TIME, "tfun": TFUN}))
+    finally:
+        CUSTOM_EVALS["timefuncs"] = hook
+
+
+@pytest.fixture
+def joined(monkeypatch):
+    """Counts the queries evaluated as joins"""
+    calls = []
+    candidate_pairs = joins.candidate_pairs
+
+    def counting(*args):
+        calls.append(args[1])
+        return candidate_pairs(*args)
+
+    monkeypatch.setattr(joins, "candidate_pairs", counting)
+    return calls
+
+
+@pytest.mark.parametrize("data", ["contains.ttl", "is_inside.ttl", "after.ttl", "starts.ttl", "is_finished_by.ttl"])
+def test_joins_match_per_row_evaluation(data, joined):
+    g = Graph().parse(str(tests_dir / "functions" / "data" / data))
+    for function in RELATIONS:
+        q = f"""
+            SELECT ?a ?b ?t
+            WHERE {{
+                ?a a ?t .
+                ?b a ?u .
+
+                FILTER (tfun:{_camel_case(function)}(?a, ?b) && ?t != time:Instant)
+            }}
+            """
+        assert _results(g, q, joined=True) == _results(g, q, joined=False), function
+    assert len(joined) == len(RELATIONS)
+
+
+def test_connected_patterns_are_not_joined(joined):
+    g = Graph().parse(str(tests_dir / "functions" / "data" / "before.ttl"))
+    q = """
+        SELECT ?a ?b
+        WHERE {
+            ?a time:hasEnd ?e .
+            ?e time:before ?b .
+
+            FILTER tfun:isBefore(?a, ?b)
+        }
+        """
+    assert _results(g, q, joined=True) == _results(g, q, joined=False)
+    assert joined == []
+
+
+def test_documented_usage():
+    g = Graph().parse(str(tests_dir / "functions" / "data" / "is_inside.ttl"))
+    q = """
+        SELECT ?a ?b
+        WHERE {
+            ?a a time:Interval .
+            ?b a time:Instant .
+
+            FILTER tfun:isInside(?b, ?a)
+        }
+        """
+    joined = _results(g, q, joined=True)
+    assert joined and joined == _results(g, q, joined=False)
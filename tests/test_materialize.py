@@ -0,0 +1,47 @@
+from pathlib import Path
+
+from rdflib import BNode, Graph, Namespace
+from rdflib.namespace import RDF, TIME
+
+from timefuncs import materialize, synthetic
+from timefuncs.__main__ import main
+from timefuncs.index import TYPE_CLASSES
+
+EX = Namespace("http://example.com/")
+tests_dir = Path(__file__).parent
+
+
+def _expected(expected, g, predicates):
+    entities = sorted(set(s for c in TYPE_CLASSES for s in g.subjects(RDF.type, c)))
+    return {(x, TIME[p], y) for p in predicates for x, y in expected(g, materialize.PREDICATES[p], entities)}
+
+
+def test_materialized_triples_are_the_functions_answers(expected):
+    for name in ("before", "contains", "finishes", "has_inside", "is_started_by"):
+        g = Graph().parse(str(tests_dir / "functions" / "data" / f"{name}.ttl"))
+        assert set(materialize.materialize(g, block_size=3)) == _expected(expected, g, materialize.PREDICATES), name
+
+    g = synthetic.generate(instants=40, intervals=40, seed=3)
+    triples = list(materialize.materialize(iter(g), ["before", "intervalDuring"], block_size=16))
+    assert len(triples) == len(set(triples))
+    assert set(triples) == _expected(expected, g, ["before", "intervalDuring"])
+
+
+def test_command(tmp_path):
+    source = tmp_path / "in.nt"
+    source.write_text(
+        f"_:a <{RDF.type}> <{TIME.Instant}> .\n"
+        f"_:a <{TIME.before}> <{EX.b}> .\n"
+        f"<{EX.b}> <{RDF.type}> <{TIME.Instant}> .\n"
+        f"<{EX.b}> <{TIME.before}> <{EX.c}> .\n"
+        f"<{EX.c}> <{RDF.type}> <{TIME.Instant}> .\n",
+        encoding="utf-8",
+    )
+    target = tmp_path / "out.nt"
+    assert main(["materialize", str(source), "-o", str(target), "-r", "before"]) == 0
+
+    # blank nodes keep their labels, so the output may be added to the input
+    g = Graph().parse(str(target), format="nt")
+    assert len(g) == 3 and set(g.predicates()) == {TIME.before}
+    assert "_:a " in target.read_text(encoding="utf-8")
+    assert (EX.b, TIME.before, EX.c) in g and sum(isinstance(s, BNode) for s in g.subjects()) == 2
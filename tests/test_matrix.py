@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import pytest
+from rdflib import Graph, Namespace
+
+from timefuncs.index import enable_closures
+
+np = pytest.importorskip("numpy")
+
+from timefuncs.matrix import RELATIONS, iter_relation_matrix, relation_matrix  # noqa: E402
+
+tests_dir = Path(__file__).parent
+
+
+def _expected(holds, g, relation, a, b):
+    return np.array([[holds(g, relation, x, y) for y in b] for x in a], dtype=bool)
+
+
+def test_matrices_match_functions(holds, random_graph, temporal_entities):
+    for seed in range(3):
+        g = random_graph(seed)
+        entities = temporal_entities(g)
+        a, b = entities[:20], entities[10:]
+        for relation in RELATIONS:
+            assert (relation_matrix(g, relation, a, b) == _expected(holds, g, relation, a, b)).all(), (seed, relation)
+
+
+def test_matrices_match_functions_with_closures(holds, random_graph, temporal_entities):
+    g = random_graph(7)
+    entities = temporal_entities(g)
+    enable_closures(g)
+    for relation in RELATIONS:
+        assert (
+            relation_matrix(g, relation, entities, entities) == _expected(holds, g, relation, entities, entities)
+        ).all()
+
+
+def test_declared_only():
+    g = Graph().parse(str(tests_dir / "functions" / "data" / "contains.ttl"))
+    contains = Namespace("https://w3id.org/timefuncs/testdata/contains/")
+    a = [contains[f"a0{i}"] for i in range(1, 10)]
+    b = [contains[f"b0{i}"] for i in range(1, 10)]
+    m = relation_matrix(g, "contains", a, b)
+    assert (m == np.eye(9, dtype=bool)).all()
+    assert (relation_matrix(g, "is_contained_by", b, a) == m.T).all()
+
+
+def test_blocks_and_packing(random_graph, temporal_entities):
+    g = random_graph(11)
+    entities = temporal_entities(g)
+    m = relation_matrix(g, "is_before", entities, entities)
+    blocks = list(iter_relation_matrix(g, "is_before", entities, entities, rows=7))
+    assert [start for start, _ in blocks] == [0, 7, 14, 21, 28]
+    assert (np.vstack([block for _, block in blocks]) == m).all()
+
+    packed = relation_matrix(g, "is_before", entities, entities, packed=True)
+    assert packed.shape == (30, 4)
+    assert (np.unpackbits(packed, axis=1, count=30).astype(bool) == m).all()
+
+
+def test_empty_and_unknown(random_graph, temporal_entities):
+    g = random_graph(0)
+    entities = temporal_entities(g)
+    assert relation_matrix(g, "is_before", [], entities).shape == (0, 30)
+    assert relation_matrix(g, "is_before", entities, []).shape == (30, 0)
+    with pytest.raises(ValueError):
+        relation_matrix(g, "is_sideways", entities, entities)
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+from rdflib import Graph, Literal, Namespace
+from rdflib.namespace import RDF, TIME, XSD
+
+from timefuncs import TFUN, funcs, neighbours
+from timefuncs.synthetic import generate
+
+EX = Namespace("http://example.com/")
+
+
+def _days():
+    g = Graph()
+    for day in (1, 3, 4, 8, 20):
+        g.add((EX[f"d{day}"], RDF.type, TIME.Instant))
+        g.add((EX[f"d{day}"], TIME.inXSDDate, Literal(f"2021-03-{day:02}", datatype=XSD.date)))
+    g.add((EX.week, RDF.type, TIME.ProperInterval))
+    g.add((EX.week, TIME.hasBeginning, EX.week_beginning))
+    g.add((EX.week, TIME.hasEnd, EX.week_end))
+    g.add((EX.week_beginning, TIME.inXSDDate, Literal("2021-03-10", datatype=XSD.date)))
+    g.add((EX.week_end, TIME.inXSDDate, Literal("2021-03-16", datatype=XSD.date)))
+    return g
+
+
+def test_neighbours():
+    g = _days()
+    assert neighbours.before(g, EX.d8, 2) == [EX.d4, EX.d3]
+    assert neighbours.before(g, EX.d1) == []
+    assert neighbours.after(g, EX.d4, 3) == [EX.d8, EX.week, EX.d20]
+    assert neighbours.after(g, Literal("2021-03-12", datatype=XSD.date)) == [EX.d20]
+    assert neighbours.around(g, EX.d4, 3) == [EX.d3, EX.d1, EX.d8]
+    assert neighbours.around(g, EX.week, 5) == [EX.d8, EX.d20, EX.d4, EX.d3, EX.d1]
+    assert neighbours.around(g, Literal("2021-03-07", datatype=XSD.date), 2) == [EX.d8, EX.d4]
+
+
+def test_single_endpoints():
+    g = _days()
+    # an interval known only to begin on the 5th, and one known only to end on the 6th
+    g.add((EX.since, TIME.hasBeginning, EX.since_beginning))
+    g.add((EX.since_beginning, TIME.inXSDDate, Literal("2021-03-05", datatype=XSD.date)))
+    g.add((EX.until, TIME.hasEnd, EX.until_end))
+    g.add((EX.until_end, TIME.inXSDDate, Literal("2021-03-06", datatype=XSD.date)))
+
+    assert neighbours.before(g, EX.since, 2) == [EX.d4, EX.d3]
+    assert neighbours.after(g, EX.since) == []
+    assert neighbours.around(g, EX.since, 2) == [EX.d4, EX.d3]
+    assert neighbours.after(g, EX.until, 2) == [EX.d8, EX.week]
+    assert neighbours.before(g, EX.until) == []
+    assert neighbours.around(g, EX.until, 2) == [EX.d8, EX.week]
+    # each is found from the side of the endpoint it has
+    assert neighbours.after(g, EX.d4, 2) == [EX.since, EX.d8]
+    assert neighbours.before(g, EX.d8, 2) == [EX.until, EX.d4]
+
+
+def test_before_agrees_with_is_before():
+    g = generate(instants=40, intervals=40, seed=6)
+    ctx = SimpleNamespace(ctx=SimpleNamespace(graph=g))
+    entities = sorted(set(g.subjects(RDF.type, TIME.ProperInterval)) | set(g.subjects(RDF.type, TIME.Instant)))
+    for a in entities[::7]:
+        found = neighbours.before(g, a, len(entities))
+        assert set(found) <= set(entities)
+        assert all(funcs.is_before(SimpleNamespace(expr=[x, a]), ctx).value for x in found)
+        found = neighbours.after(g, a, len(entities))
+        assert all(funcs.is_before(SimpleNamespace(expr=[a, x]), ctx).value for x in found)
+
+
+def test_sparql():
+    g = _days()
+    q = """
+        SELECT ?latest ?second ?earliest ?nearest ?none
+        WHERE {
+            BIND (tfun:latestBefore(<http://example.com/d8>) AS ?latest)
+            BIND (tfun:latestBefore(<http://example.com/d8>, 2) AS ?second)
+            BIND (tfun:earliestAfter("2021-03-05"^^xsd:date) AS ?earliest)
+            BIND (tfun:nearest(<http://example.com/week>) AS ?nearest)
+            BIND (tfun:latestBefore(<http://example.com/d1>) AS ?none)
+        }
+        """
+    rows = list(g.query(q, initNs={"tfun": TFUN, "xsd": XSD}))
+    assert [tuple(row) for row in rows] == [(EX.d4, EX.d3, EX.d8, EX.d8, None)]
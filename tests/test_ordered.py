@@ -0,0 +1,66 @@
+from itertools import islice
+from pathlib import Path
+
+import pytest
+from rdflib import Graph, Literal, Namespace
+from rdflib.namespace import RDF, TIME, XSD
+
+from timefuncs.index import get_index
+from timefuncs.ordered import iter_after, iter_before, iter_inside
+from timefuncs.synthetic import generate
+
+EX = Namespace("http://example.com/")
+tests_dir = Path(__file__).parent
+
+
+def _nodes(g):
+    return {n for n in set(g.subjects()) | set(g.objects()) if not isinstance(n, Literal)}
+
+
+def _check(holds, g):
+    index = get_index(g)
+    nodes = _nodes(g)
+
+    def latest_end(x):
+        spans = index.endpoint_spans(x, TIME.hasEnd, "zero_or_more")
+        return max(span[1] for span in spans) if spans else None
+
+    for a in nodes:
+        before = list(iter_before(g, a))
+        assert set(before) == {x for x in nodes if holds(g, "is_before", x, a)}, a
+        assert len(before) == len(set(before))
+        timed = [latest_end(x) for x in before if latest_end(x) is not None]
+        assert timed == sorted(timed, reverse=True)
+
+        after = list(iter_after(g, a))
+        assert set(after) == {x for x in nodes if holds(g, "is_after", x, a)}, a
+        assert len(after) == len(set(after))
+
+        inside = list(iter_inside(g, a))
+        assert set(inside) == {x for x in nodes if holds(g, "has_inside", a, x)}, a
+        assert len(inside) == len(set(inside))
+
+
+@pytest.mark.parametrize("data", sorted((tests_dir / "functions" / "data").glob("*.ttl")), ids=lambda p: p.stem)
+def test_test_data(data, holds):
+    _check(holds, Graph().parse(str(data)))
+
+
+def test_synthetic_graph(holds):
+    _check(holds, generate(instants=15, intervals=15, chain_depth=3, cycle_rate=0.1, seed=5))
+
+
+def test_order_and_early_stops():
+    g = Graph()
+    for day in range(1, 29):
+        g.add((EX[f"i{day}"], RDF.type, TIME.Instant))
+        g.add((EX[f"i{day}"], TIME.inXSDDate, Literal(f"2021-02-{day:02}", datatype=XSD.date)))
+    g.add((EX.feb, RDF.type, TIME.ProperInterval))
+    g.add((EX.feb, TIME.hasBeginning, EX.i5))
+    g.add((EX.feb, TIME.hasEnd, EX.i10))
+    g.add((EX.undated, TIME.before, EX.i4))
+
+    assert list(islice(iter_before(g, EX.i4), 2)) == [EX.i3, EX.i2]
+    assert list(iter_before(g, EX.i4)) == [EX.i3, EX.i2, EX.i1, EX.undated]
+    assert list(islice(iter_after(g, EX.i25), 3)) == [EX.i26, EX.i27, EX.i28]
+    assert list(iter_inside(g, EX.feb)) == [EX.i6, EX.i7, EX.i8, EX.i9]
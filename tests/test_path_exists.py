@@ -30,3 +30,26 @@ def test_path_exists():
     assert _path_exists(g, PE.a03, PE.b03, path)
     assert not _path_exists(g, PE.a01, PE.b02, path)
     assert not _path_exists(g, PE.b01, PE.a01, path)
+
+
+def test_path_exists_long_chains():
+    from rdflib import Graph, Namespace, TIME
+    from timefuncs.funcs import _path_exists
+    from timefuncs.index import get_index
+
+    PE = Namespace("https://w3id.org/timefuncs/testdata/pathExists/")
+
+    g = Graph()
+    for i in range(2000):
+        g.add((PE[f"n{i}"], TIME.before, PE[f"n{i + 1}"]))
+    # a cycle and a dead end must not stop the search or make it loop
+    g.add((PE.n10, TIME.before, PE.n5))
+    g.add((PE.x, TIME.after, PE.n1000))
+
+    path = [(TIME.before, "outbound"), (TIME.after, "inbound")]
+    for source in (g, get_index(g)):
+        assert _path_exists(source, PE.n0, PE.n2000, path)
+        assert _path_exists(source, PE.n0, PE.x, path)
+        assert not _path_exists(source, PE.n2000, PE.n0, path)
+        assert not _path_exists(source, PE.x, PE.n2000, path)
+        assert not _path_exists(source, PE.n0, PE.n0, path)
@@ -0,0 +1,44 @@
+from rdflib import Graph, Literal, Namespace
+from rdflib.namespace import TIME, XSD
+
+from timefuncs import funcs
+from timefuncs.index import enable_closures, get_index
+from timefuncs.planner import plan
+
+EX = Namespace("http://example.com/")
+
+
+def _rules(g, function):
+    return [check[0] for check in plan(get_index(g), function, funcs._CHECKS[function])]
+
+
+def test_impossible_checks_are_skipped():
+    g = Graph()
+    g.add((EX.a, TIME.hasEnd, EX.a_end))
+    g.add((EX.a_end, TIME.inXSDDate, Literal("2021-01-01", datatype=XSD.date)))
+    assert _rules(g, "is_before") == ["calculated"]
+    assert _rules(g, "contains") == []
+
+    # plans are made again as the graph changes
+    g.add((EX.a_end, TIME.before, EX.b))
+    assert _rules(g, "is_before") == ["declared", "calculated", "path"]
+
+
+def test_checks_are_ordered_by_cost():
+    g = Graph()
+    g.add((EX.a, TIME.hasBeginning, EX.a_beginning))
+    g.add((EX.b, TIME.hasBeginning, EX.b_beginning))
+    g.add((EX.a_beginning, TIME.inXSDDate, Literal("2021-01-01", datatype=XSD.date)))
+    g.add((EX.a, TIME.intervalStarts, EX.b))
+    assert _rules(g, "starts") == ["path", "network"]
+
+    g.add((EX.a, TIME.hasEnd, EX.a_end))
+    g.add((EX.b, TIME.hasEnd, EX.b_end))
+    assert _rules(g, "starts") == ["calculated", "path", "network"]
+    enable_closures(g, ["starts"])
+    assert _rules(g, "starts") == ["path", "calculated", "network"]
+
+    # checks answering false are made first
+    g.add((EX.a, TIME.inside, EX.i))
+    g.add((EX.a, TIME.before, EX.j))
+    assert [check[1] for check in plan(get_index(g), "has_inside", funcs._CHECKS["has_inside"])] == [False, True, True]
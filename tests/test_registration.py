@@ -0,0 +1,61 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from rdflib import Graph, Literal
+from rdflib.plugins.sparql import CUSTOM_EVALS
+
+import timefuncs
+from timefuncs import TFUN, plugin
+
+data = """
+    PREFIX : <http://example.com/>
+    PREFIX time: <http://www.w3.org/2006/time#>
+
+    :a time:before :b .
+    """
+q = "SELECT ?before WHERE { BIND (tfun:isBefore(<http://example.com/a>, <http://example.com/b>) AS ?before) }"
+
+
+def _is_before(g):
+    """isBefore(a, b), or None if no function answers it"""
+    for row in g.query(q, initNs={"tfun": TFUN}):
+        return row[0]
+
+
+def test_import_is_lazy():
+    code = "import sys, timefuncs; print([m for m in sys.modules if m.startswith(('timefuncs.', 'rdflib.plugins.sp'))])"
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, cwd=Path(__file__).parent.parent, check=True
+    ).stdout
+    assert out.strip() == "[]"
+
+
+def test_register_and_unregister():
+    g = Graph().parse(data=data, format="turtle")
+    assert timefuncs.is_registered()
+    timefuncs.unregister()
+    try:
+        assert not timefuncs.is_registered() and "timefuncs" not in CUSTOM_EVALS
+        assert _is_before(g) is None
+
+        with timefuncs.registered():
+            assert _is_before(g) == Literal(True)
+        assert not timefuncs.is_registered()
+    finally:
+        timefuncs.register()
+
+    with timefuncs.registered():
+        pass
+    assert timefuncs.is_registered()
+
+
+def test_plugin_registers_on_first_use():
+    g = Graph().parse(data=data, format="turtle")
+    timefuncs.unregister()
+    try:
+        CUSTOM_EVALS["timefuncs"] = plugin.evaluate
+        assert _is_before(g) == Literal(True)
+        assert timefuncs.is_registered() and CUSTOM_EVALS["timefuncs"] is timefuncs.evaluate
+    finally:
+        timefuncs.register()
@@ -0,0 +1,87 @@
+from pathlib import Path
+
+import pytest
+from rdflib import BNode, Graph, Literal, Namespace
+from rdflib.namespace import RDF, TIME, XSD
+
+from timefuncs import sidecar
+from timefuncs.closure import FAMILIES
+from timefuncs.index import get_index
+from timefuncs.synthetic import generate
+
+EX = Namespace("http://example.com/")
+tests_dir = Path(__file__).parent
+
+
+def _answers(answers, g):
+    return answers(g, sorted(set(g.subjects(RDF.type, None)))[:40])
+
+
+def test_warm_start(tmp_path, answers):
+    path = tmp_path / "synthetic.sidecar"
+    g = generate(instants=30, intervals=30, chain_depth=3, cycle_rate=0.1, seed=4)
+    data = g.serialize(format="nt")
+    expected = _answers(answers, g)
+    sidecar.save(g, path)
+
+    # as a new process would, with a graph of the same content
+    warm = Graph().parse(data=data, format="nt")
+    assert sidecar.attach(warm, path)
+    index = get_index(warm)
+    assert index.sidecar is not None
+    assert set(index.closures) == set(FAMILIES)
+    assert _answers(answers, warm) == expected
+
+
+def test_sidecar_with_triples_in_a_buffer(answers):
+    g = generate(instants=20, intervals=20, chain_depth=3, cycle_rate=0.1, seed=5)
+    g.add((BNode("b0"), TIME.before, EX.x))
+    expected = _answers(answers, g)
+    data = sidecar.dumps(g, triples=True)
+    with pytest.raises(ValueError):
+        list(sidecar.Sidecar(memoryview(sidecar.dumps(g))).triples())
+
+    # the graph is built from the sidecar's triples, blank nodes keeping their labels
+    held = sidecar.Sidecar(memoryview(data))
+    copy = Graph()
+    copy.addN((s, p, o, copy) for s, p, o in held.triples())
+    assert sidecar.fingerprint(copy) == sidecar.fingerprint(g)
+    assert (BNode("b0"), TIME.before, EX.x) in copy
+    sidecar._attach(get_index(copy), held)
+    assert get_index(copy).sidecar is held
+    assert _answers(answers, copy) == expected
+
+
+def test_stale_sidecars_are_rejected(tmp_path):
+    path = tmp_path / "before.sidecar"
+    g = Graph().parse(str(tests_dir / "functions" / "data" / "before.ttl"))
+    assert not sidecar.attach(g, path)
+    sidecar.save(g, path)
+
+    changed = Graph().parse(str(tests_dir / "functions" / "data" / "before.ttl"))
+    changed.add((EX.x, TIME.inXSDDate, Literal("2021-01-01", datatype=XSD.date)))
+    assert sidecar.fingerprint(changed) != sidecar.fingerprint(g)
+    assert not sidecar.attach(changed, path)
+
+    # a sidecar of another format version
+    data = bytearray(path.read_bytes())
+    data[8:12] = (sidecar.FORMAT_VERSION + 1).to_bytes(4, "little")
+    (tmp_path / "older").write_bytes(bytes(data))
+    assert not sidecar.attach(g, tmp_path / "older")
+
+    (tmp_path / "other").write_bytes(b"not a sidecar at all")
+    with pytest.raises(ValueError):
+        sidecar.attach(g, tmp_path / "other")
+
+
+def test_changes_drop_the_sidecar(tmp_path):
+    path = tmp_path / "before.sidecar"
+    g = Graph().parse(str(tests_dir / "functions" / "data" / "before.ttl"))
+    sidecar.save(g, path)
+    assert sidecar.attach(g, path)
+    assert get_index(g).sidecar is not None
+
+    g.add((EX.x, TIME.before, EX.y))
+    index = get_index(g)
+    assert index.sidecar is None
+    assert index.has(EX.x, TIME.before, EX.y)
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pytest
+from rdflib import Graph, Namespace
+from rdflib.namespace import RDF, TIME
+
+from timefuncs.relations import RELATIONS
+from timefuncs.sqlite import TemporalDatabase
+from timefuncs.synthetic import generate
+
+EX = Namespace("http://example.com/")
+tests_dir = Path(__file__).parent
+
+
+@pytest.mark.parametrize("data", sorted((tests_dir / "functions" / "data").glob("*.ttl")), ids=lambda p: p.stem)
+def test_test_data(data, expected, temporal_entities):
+    g = Graph().parse(str(data))
+    entities = temporal_entities(g)
+    with TemporalDatabase() as db:
+        db.load(g)
+        for function in RELATIONS:
+            assert db.pairs(function, entities, entities) == expected(g, function, entities), function
+
+
+def test_random_graphs(expected, random_graph, temporal_entities):
+    for seed in range(3):
+        g = random_graph(seed)
+        entities = temporal_entities(g)
+        with TemporalDatabase() as db:
+            db.load(g)
+            for function in RELATIONS:
+                found = {(x, y) for x, y in db.pairs(function) if x in entities and y in entities}
+                assert found == expected(g, function, entities), (seed, function)
+
+
+def test_synthetic_graph(expected, temporal_entities):
+    g = generate(instants=20, intervals=20, chain_depth=3, cycle_rate=0.1, seed=2)
+    entities = temporal_entities(g)
+    with TemporalDatabase() as db:
+        db.load(g)
+        for function in RELATIONS:
+            assert db.pairs(function, entities, entities) == expected(g, function, entities), function
+
+
+def test_entities_declared_related_to_themselves(expected, temporal_entities):
+    g = Graph()
+    for entity in (EX.a, EX.b, EX.c, EX.d):
+        g.add((entity, RDF.type, TIME.ProperInterval))
+    g.add((EX.a, TIME.intervalContains, EX.a))
+    # a cycle of intervalContains relates c to itself, one of starts relations does not relate d to itself
+    g.add((EX.b, TIME.intervalContains, EX.c))
+    g.add((EX.c, TIME.intervalContains, EX.b))
+    g.add((EX.d, TIME.intervalStarts, EX.b))
+    g.add((EX.b, TIME.intervalStarts, EX.d))
+    entities = temporal_entities(g)
+    with TemporalDatabase() as db:
+        db.load(g)
+        assert db.holds("contains", EX.a, EX.a)
+        assert db.pairs("contains", [EX.c], [EX.c]) == {(EX.c, EX.c)}
+        assert not db.holds("starts", EX.d, EX.d)
+        for function in RELATIONS:
+            assert db.pairs(function, entities, entities) == expected(g, function, entities), function
+
+
+def test_holds_and_persistence(tmp_path):
+    g = Graph().parse(str(tests_dir / "functions" / "data" / "before.ttl"))
+    path = tmp_path / "temporal.sqlite"
+    with TemporalDatabase(path) as db:
+        db.load(iter(g))
+        loaded = len(db)
+
+    before = Namespace("https://w3id.org/timefuncs/testdata/before/")
+    with TemporalDatabase(path) as db:
+        assert len(db) == loaded
+        assert db.holds("is_before", before.a01, before.b01)
+        assert not db.holds("is_before", before.b01, before.a01)
+        assert not db.holds("is_before", before.a01, EX.unknown)
+        with pytest.raises(ValueError):
+            db.pairs("meets")
@@ -0,0 +1,94 @@
+import asyncio
+import sys
+from pathlib import Path
+
+from rdflib import Graph
+from rdflib.namespace import RDF, TIME
+
+from timefuncs import TFUN, aio, stats
+from timefuncs.index import TemporalIndex
+
+tests_dir = Path(__file__).parent
+BEFORE = tests_dir / "functions" / "data" / "before.ttl"
+
+q = """
+    SELECT ?a ?b
+    WHERE {
+        ?a a time:TemporalEntity .
+        ?b a time:TemporalEntity .
+
+        FILTER tfun:isBefore(?a, ?b)
+    }
+    """
+
+
+def test_collecting():
+    g = Graph().parse(str(BEFORE))
+    lookup = TemporalIndex.objects
+    with stats.collecting() as collected:
+        results = list(g.query(q, initNs={"time": TIME, "tfun": TFUN}))
+        assert TemporalIndex.objects is not lookup
+
+    assert not stats.enabled and TemporalIndex.objects is lookup
+    is_before = collected["is_before"]
+    assert is_before.calls > 0 and is_before.seconds > 0 and is_before.triples > 0
+    assert sum(is_before.rules.values()) == is_before.calls
+    assert is_before.calls - is_before.rules["none"] == len(results)
+    assert is_before.rules["declared"] and is_before.rules["calculated"]
+
+
+def test_disabled_and_reset():
+    g = Graph().parse(str(tests_dir / "functions" / "data" / "contains.ttl"))
+    stats.reset()
+    list(g.query(q, initNs={"time": TIME, "tfun": TFUN}))
+    assert stats.get_stats() == {}
+
+    stats.enable()
+    try:
+        list(
+            g.query(
+                q.replace("isBefore", "hasDuring").replace("TemporalEntity", "Interval"),
+                initNs={"time": TIME, "tfun": TFUN},
+            )
+        )
+    finally:
+        stats.disable()
+    # an alias is counted along with the function it calls
+    assert stats.get_stats()["has_during"].calls == stats.get_stats()["contains"].calls > 0
+    stats.reset()
+    assert stats.get_stats() == {}
+
+
+def test_concurrent_calls():
+    g = Graph().parse(str(BEFORE)).parse(str(tests_dir / "functions" / "data" / "contains.ttl"))
+    entities = sorted(set(g.subjects(RDF.type, None)))
+    calls = [
+        (function, a, b) for function in ("is_before", "contains", "is_inside") for a in entities for b in entities
+    ]
+
+    async def evaluate(concurrently):
+        async with aio.Evaluator(workers=8) as evaluator:
+            if concurrently:
+                await asyncio.gather(*(evaluator.evaluate(g, *call) for call in calls))
+            else:
+                for call in calls:
+                    await evaluator.evaluate(g, *call)
+
+    def collected(concurrently):
+        with stats.collecting() as collected:
+            asyncio.run(evaluate(concurrently))
+        return {name: function_stats.as_dict() for name, function_stats in collected.items()}
+
+    # once the index has resolved what the functions look up, each call touches the same triples however it is made
+    collected(concurrently=False)
+    expected = collected(concurrently=False)
+    # switch threads as often as possible, so that calls interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        found = collected(concurrently=True)
+    finally:
+        sys.setswitchinterval(interval)
+    for name in expected:
+        del expected[name]["seconds"], found[name]["seconds"]
+    assert found == expected
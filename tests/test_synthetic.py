@@ -0,0 +1,38 @@
+from rdflib.namespace import RDF, TIME
+
+from timefuncs.index import get_index
+from timefuncs.synthetic import DATATYPES, SYNTHETIC, generate
+
+
+def test_sizes_and_determinism():
+    g = generate(instants=50, intervals=20, seed=1)
+    assert len(set(g.subjects(RDF.type, TIME.Instant))) == 50 + 2 * 20
+    assert len(set(g.subjects(RDF.type, TIME.ProperInterval))) == 20
+    assert set(g) == set(generate(instants=50, intervals=20, seed=1))
+    assert set(g) != set(generate(instants=50, intervals=20, seed=2))
+
+
+def test_knobs():
+    g = generate(instants=100, intervals=100, chain_depth=0, timestamped=1.0, datatypes={TIME.inXSDDate: 1.0})
+    assert not list(g.triples((None, TIME.before, None)))
+    assert {p for p in g.predicates() if p in DATATYPES} == {TIME.inXSDDate}
+    index = get_index(g)
+    assert all(index.spans(i) for i in g.subjects(RDF.type, TIME.Instant))
+
+    g = generate(instants=100, intervals=0, chain_depth=4, cycle_rate=1.0, timestamped=0.0)
+    assert not any(p in DATATYPES for p in g.predicates())
+    # chains of 5 instants, each closed into a cycle
+    assert (SYNTHETIC.instant0, TIME.before, SYNTHETIC.instant1) in g
+    assert (SYNTHETIC.instant4, TIME.before, SYNTHETIC.instant0) in g
+    assert (SYNTHETIC.instant4, TIME.before, SYNTHETIC.instant5) not in g
+    assert len(list(g.triples((None, TIME.before, None)))) == 100
+
+
+def test_positions_agree_with_declarations():
+    g = generate(instants=200, intervals=200, datatypes={TIME.inXSDDateTimeStamp: 1.0}, timestamped=1.0)
+    index = get_index(g)
+    for a, b in g.subject_objects(TIME.before):
+        assert index.spans(a)[0][1] < index.spans(b)[0][0]
+    for interval in g.subjects(RDF.type, TIME.ProperInterval):
+        beginning, end = g.value(interval, TIME.hasBeginning), g.value(interval, TIME.hasEnd)
+        assert index.spans(beginning)[0][1] < index.spans(end)[0][0]
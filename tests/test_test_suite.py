@@ -1 +1,56 @@
-# not implemented yet
\ No newline at end of file
+from pathlib import Path
+
+import pytest
+from rdflib import Graph
+from rdflib.namespace import TIME
+
+from timefuncs import TFUN
+
+test_suite_dir = Path(__file__).parent / "test-suite"
+individuals = Graph().parse(str(test_suite_dir / "time-test-individuals.ttl"))
+
+
+def _results(function, axioms):
+    """The value of the function for each pair of entities related in axioms, evaluated over the individuals alone"""
+    q = f"""
+        SELECT ?a ?b ?value
+        WHERE {{
+            BIND (tfun:{function}(?a, ?b) AS ?value)
+        }}
+        """
+    return {
+        (s, o): individuals.query(q, initNs={"tfun": TFUN}, initBindings={"a": s, "b": o}).bindings[0]["value"]
+        for s, _, o in axioms
+    }
+
+
+@pytest.mark.parametrize(
+    "function,relation",
+    [
+        ("meets", "intervalMeets"),
+        ("isMetBy", "intervalMetBy"),
+        ("overlaps", "intervalOverlaps"),
+        ("isOverlappedBy", "intervalOverlappedBy"),
+        ("isEquals", "intervalEquals"),
+        ("isDisjoint", "intervalDisjoint"),
+        ("isIn", "intervalIn"),
+    ],
+)
+def test_test_suite(function, relation):
+    for truth in ("true", "false"):
+        axioms = Graph().parse(str(test_suite_dir / f"{relation}-{truth}.ttl"))
+        results = _results(function, axioms.triples((None, TIME[relation], None)))
+        assert results
+        for pair, value in results.items():
+            assert value.toPython() == (truth == "true"), pair
+
+
+def test_is_not_disjoint():
+    axioms = Graph().parse(str(test_suite_dir / "intervalDisjoint-true.ttl"))
+    results = _results("isNotDisjoint", axioms.triples((None, TIME.intervalDisjoint, None)))
+    assert results and not any(v.toPython() for v in results.values())
+
+    for relation in ("intervalMeets", "intervalOverlaps", "intervalIn", "intervalEquals"):
+        axioms = Graph().parse(str(test_suite_dir / f"{relation}-true.ttl"))
+        results = _results("isNotDisjoint", axioms.triples((None, TIME[relation], None)))
+        assert results and all(v.toPython() for v in results.values()), relation
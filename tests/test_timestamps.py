@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+
+from rdflib import Graph, Literal
+from rdflib.namespace import TIME, XSD
+
+from timefuncs import TFUN
+from timefuncs.timestamps import MICROSECONDS_PER_DAY, after, before, to_span
+
+
+def _micros(*args) -> int:
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp()) * 1_000_000
+
+
+def test_date_times():
+    assert to_span(Literal("1970-01-01T00:00:00Z", datatype=XSD.dateTimeStamp)) == (0, 0)
+    assert to_span(Literal("2021-07-16T10:00:00+10:00")) == (_micros(2021, 7, 16), _micros(2021, 7, 16))
+    assert to_span(Literal("2021-07-16T00:00:00.5", datatype=XSD.dateTime))[0] == _micros(2021, 7, 16) + 500_000
+    assert to_span(Literal("1969-12-31T23:59:59Z"))[0] == -1_000_000
+
+
+def test_coarser_values_are_spans():
+    day = to_span(Literal("2021-07-16", datatype=XSD.date))
+    assert day == (_micros(2021, 7, 16), _micros(2021, 7, 17) - 1)
+    assert to_span(Literal("2021-02", datatype=XSD.gYearMonth)) == (_micros(2021, 2, 1), _micros(2021, 3, 1) - 1)
+    assert to_span(Literal("2020", datatype=XSD.gYear)) == (_micros(2020, 1, 1), _micros(2021, 1, 1) - 1)
+    assert to_span(Literal("-0044", datatype=XSD.gYear))[1] - to_span(Literal("-0044"))[0] + 1 == (
+        366 * MICROSECONDS_PER_DAY
+    )
+
+    noon = to_span(Literal("2021-07-16T12:00:00Z"))
+    assert not before(noon, day) and not after(noon, day)
+    assert before(day, to_span(Literal("2021-07-17T00:00:00Z")))
+
+
+def test_not_dates():
+    assert to_span(Literal("yesterday")) is None
+    assert to_span(Literal("2021-13-01")) is None
+    for lexical in ("2021-02-29", "2021-02-31", "2021-04-31T00:00:00Z", "2021-06-31+10:00", "1900-02-29"):
+        assert to_span(Literal(lexical)) is None, lexical
+    for lexical in ("2021-07-16T25:00:00Z", "2021-07-16T24:00:01", "2021-07-16T24:00:00.5", "2021-07-16T10:60:00"):
+        assert to_span(Literal(lexical)) is None, lexical
+    assert to_span(Literal("2021-07-16T10:00:60Z")) is None
+
+
+def test_month_lengths():
+    assert to_span(Literal("2020-02-29"))[0] == _micros(2020, 2, 29)
+    assert to_span(Literal("2000-02-29T12:00:00Z"))[0] == _micros(2000, 2, 29, 12)
+    assert to_span(Literal("2021-04-30"))[0] == _micros(2021, 4, 30)
+    assert to_span(Literal("2021-12-31T23:59:59Z"))[0] == _micros(2021, 12, 31, 23, 59, 59)
+    # the midnight ending a day is the one beginning the next
+    assert to_span(Literal("2021-02-28T24:00:00Z")) == to_span(Literal("2021-03-01T00:00:00Z"))
+
+
+def test_invalid_dates_are_ignored():
+    data = """
+        PREFIX : <http://example.com/>
+        PREFIX time: <http://www.w3.org/2006/time#>
+        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+
+        :a a time:Instant ; time:inXSDDate "2021-02-31"^^xsd:date .
+        :b a time:Instant ; time:inXSDDate "2021-03-02"^^xsd:date .
+        :c a time:Instant ; time:inXSDDateTime "2021-03-01T10:00:00"^^xsd:dateTime .
+        """
+    q = "SELECT ?x ?y WHERE { ?x a time:Instant . ?y a time:Instant . FILTER tfun:isBefore(?x, ?y) }"
+    g = Graph().parse(data=data, format="turtle")
+    actual = sorted((str(r[0])[-1:], str(r[1])[-1:]) for r in g.query(q, initNs={"time": TIME, "tfun": TFUN}))
+    # a is neither rolled over to 2021-03-03, after b and c, nor compared at all
+    assert actual == [("c", "b")]
+
+
+def test_mixed_datatypes_compare():
+    data = """
+        PREFIX : <http://example.com/>
+        PREFIX time: <http://www.w3.org/2006/time#>
+        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+
+        :e01 a time:TemporalEntity ; time:inXSDDate "2021-01-01"^^xsd:date .
+        :f01 a time:TemporalEntity ; time:inXSDDateTime "2021-01-02T00:00:00+01:00"^^xsd:dateTime .
+        :g01 a time:TemporalEntity ; time:inXSDgYear "2022"^^xsd:gYear .
+        """
+    q = """
+        SELECT ?x ?y
+        WHERE {
+            ?x a time:TemporalEntity .
+            ?y a time:TemporalEntity .
+
+            FILTER tfun:isBefore(?x, ?y)
+        }
+        """
+    g = Graph().parse(data=data, format="turtle")
+    actual = sorted((str(r[0])[-3:], str(r[1])[-3:]) for r in g.query(q, initNs={"time": TIME, "tfun": TFUN}))
+    # f01 is 2021-01-01T23:00:00Z, so is not before or after e01
+    assert actual == [("e01", "g01"), ("f01", "g01")]
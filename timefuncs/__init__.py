@@ -1,32 +1,118 @@
-from .funcs import (
-    contains,
-    has_during,
-    has_inside,
-    finishes,
-    is_after,
-    is_before,
-    is_contained_by,
-    is_during,
-    is_finished_by,
-    is_inside,
-    is_started_by,
-    starts
-)
+"""
+OWL TIME functions for rdflib's SPARQL engine.
+
+Importing timefuncs is cheap: the functions are only imported, and registered with rdflib, when needed. When timefuncs
+is installed, rdflib finds it through its rdf.plugins.sparqleval entry point and it registers itself as the first query
+is evaluated. Otherwise call register(), or use the registered() context manager to register the functions for the
+duration of a with block.
+"""
+
+from contextlib import contextmanager
+from importlib import import_module
+from typing import Dict, Iterator, Tuple
+
 from rdflib import Namespace
-from rdflib.plugins.sparql.operators import register_custom_function
 
 __version__ = "0.1.4"
 TFUN = Namespace("https://w3id.org/timefuncs/")
 
-register_custom_function(TFUN.contains, contains, raw=True)
-register_custom_function(TFUN.hasDuring, has_during, raw=True)
-register_custom_function(TFUN.hasInside, has_inside, raw=True)
-register_custom_function(TFUN.finishes, finishes, raw=True)
-register_custom_function(TFUN.isAfter, is_after, raw=True)
-register_custom_function(TFUN.isBefore, is_before, raw=True)
-register_custom_function(TFUN.isContainedBy, is_contained_by, raw=True)
-register_custom_function(TFUN.isDuring, is_during, raw=True)
-register_custom_function(TFUN.isFinishedBy, is_finished_by, raw=True)
-register_custom_function(TFUN.isInside, is_inside, raw=True)
-register_custom_function(TFUN.isStartedBy, is_started_by, raw=True)
-register_custom_function(TFUN.starts, starts, raw=True)
+# the SPARQL functions, by local name, as the module and name of their Python function
+FUNCTIONS: Dict[str, Tuple[str, str]] = {
+    "allenRelation": ("allen", "allen_relation"),
+    "contains": ("funcs", "contains"),
+    "earliestAfter": ("neighbours", "earliest_after"),
+    "finishes": ("funcs", "finishes"),
+    "hasBeginning": ("funcs", "has_beginning"),
+    "hasDuring": ("funcs", "has_during"),
+    "hasEnd": ("funcs", "has_end"),
+    "hasInside": ("funcs", "has_inside"),
+    "isAfter": ("funcs", "is_after"),
+    "isBefore": ("funcs", "is_before"),
+    "isBeginningOf": ("funcs", "is_beginning_of"),
+    "isContainedBy": ("funcs", "is_contained_by"),
+    "isDisjoint": ("funcs", "is_disjoint"),
+    "isDuring": ("funcs", "is_during"),
+    "isEndOf": ("funcs", "is_end_of"),
+    "isEquals": ("funcs", "is_equals"),
+    "isFinishedBy": ("funcs", "is_finished_by"),
+    "isIn": ("funcs", "is_in"),
+    "isInside": ("funcs", "is_inside"),
+    "isMetBy": ("funcs", "is_met_by"),
+    "isNotDisjoint": ("funcs", "is_not_disjoint"),
+    "isOverlappedBy": ("funcs", "is_overlapped_by"),
+    "isStartedBy": ("funcs", "is_started_by"),
+    "latestBefore": ("neighbours", "latest_before"),
+    "meets": ("funcs", "meets"),
+    "nearest": ("neighbours", "nearest"),
+    "overlaps": ("funcs", "overlaps"),
+    "starts": ("funcs", "starts"),
+}
+
+# the name of the custom evaluation function, see joins.py, in rdflib's CUSTOM_EVALS
+EVAL_NAME = "timefuncs"
+
+_ATTRIBUTES = {name: module for module, name in FUNCTIONS.values()}
+_ATTRIBUTES["evaluate"] = "joins"
+
+
+def __getattr__(name: str):
+    # the functions are imported on first use, e.g. by from timefuncs import is_before
+    module = _ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return _load(module, name)
+
+
+def _load(module: str, name: str):
+    return getattr(import_module(f".{module}", __name__), name)
+
+
+def _function(local_name: str):
+    return _load(*FUNCTIONS[local_name])
+
+
+def is_registered() -> bool:
+    """True if all the functions are registered with rdflib"""
+    from rdflib.plugins.sparql.operators import _CUSTOM_FUNCTIONS
+
+    return all(_CUSTOM_FUNCTIONS.get(TFUN[local_name], (None,))[0] is _function(local_name) for local_name in FUNCTIONS)
+
+
+def register():
+    """Registers the functions, and the evaluation of FILTERs over them as joins, with rdflib's SPARQL engine. Does
+    nothing for functions already registered."""
+    from rdflib.plugins.sparql import CUSTOM_EVALS
+    from rdflib.plugins.sparql.operators import _CUSTOM_FUNCTIONS, register_custom_function
+
+    for local_name in FUNCTIONS:
+        function = _function(local_name)
+        if _CUSTOM_FUNCTIONS.get(TFUN[local_name], (None,))[0] is not function:
+            register_custom_function(TFUN[local_name], function, raw=True, override=True)
+
+    # evaluates FILTERs over the functions as joins, see joins.py
+    CUSTOM_EVALS[EVAL_NAME] = _load("joins", "evaluate")
+
+
+def unregister():
+    """Removes the functions, and the evaluation of FILTERs over them as joins, from rdflib's SPARQL engine"""
+    from rdflib.plugins.sparql import CUSTOM_EVALS
+    from rdflib.plugins.sparql.operators import _CUSTOM_FUNCTIONS, unregister_custom_function
+
+    for local_name in FUNCTIONS:
+        function = _function(local_name)
+        if _CUSTOM_FUNCTIONS.get(TFUN[local_name], (None,))[0] is function:
+            unregister_custom_function(TFUN[local_name], function)
+    CUSTOM_EVALS.pop(EVAL_NAME, None)
+
+
+@contextmanager
+def registered() -> Iterator[None]:
+    """Registers the functions for the duration of a with block, unregistering them afterwards unless they were
+    registered before"""
+    was_registered = is_registered()
+    register()
+    try:
+        yield
+    finally:
+        if not was_registered:
+            unregister()
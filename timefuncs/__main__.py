@@ -0,0 +1,28 @@
+"""
+The timefuncs command, whose subcommands are the scripts of the package:
+
+    timefuncs enrich data.nt -o data-unix.nt         # see enrich.py
+    timefuncs materialize data.nt -o relations.nt    # see materialize.py
+
+`python -m timefuncs` is the same command.
+"""
+
+import sys
+from typing import Optional
+
+from . import _load
+
+# the subcommands, as the modules whose main() they run
+COMMANDS = ("enrich", "materialize")
+
+
+def main(argv: Optional[list] = None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in COMMANDS:
+        print(f"usage: timefuncs {{{','.join(COMMANDS)}}} ...", file=sys.stderr)
+        return 0 if argv[:1] in (["-h"], ["--help"]) else 2
+    return _load(argv[0], "main")(argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
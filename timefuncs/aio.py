@@ -0,0 +1,116 @@
+"""
+Evaluating the functions from asyncio code without blocking the event loop.
+
+An Evaluator runs each evaluation on a bounded pool of threads. Concurrent requests for the same function, entities
+and graph version share one evaluation: the first request starts it and later ones wait for its answer. The graph
+version is that of the store's indexes (see index.py), so a request made after the graph changes starts a new
+evaluation rather than being given an answer computed from the graph as it was.
+
+No more than max_in_flight evaluations are queued or running at once. Requests beyond that wait, in order, for a
+slot, so a burst of requests holds back its callers rather than growing the executor's queue; saturated tells when
+this is the case. Cancelling a request only cancels the shared evaluation once no other request is waiting for it,
+and an evaluation that has not yet started running then gives up its slot at once.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+from rdflib import Graph
+
+from . import _load
+from .batch import NAMES
+from .index import Node, _graph_key, _store_indexes
+
+# the evaluations queued or running at once, by default
+DEFAULT_MAX_IN_FLIGHT = 64
+
+
+class _Shared:
+    """An evaluation and the number of requests waiting for it"""
+
+    def __init__(self, task: "asyncio.Future"):
+        self.task = task
+        self.waiters = 0
+
+
+class Evaluator:
+    """Evaluates the functions, by their Python names (see batch.NAMES), on a pool of workers threads"""
+
+    def __init__(self, workers: int = 4, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        self.max_in_flight = max_in_flight
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="timefuncs")
+        self._shared: Dict[tuple, _Shared] = {}
+        # made on first use, since before Python 3.10 a Semaphore belongs to the event loop running when it is made
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "Evaluator":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stops the worker threads, once they have finished the evaluations already running"""
+        self._executor.shutdown(wait=False)
+
+    @property
+    def in_flight(self) -> int:
+        """The number of distinct evaluations requested and not yet answered, including those waiting for a slot"""
+        return len(self._shared)
+
+    @property
+    def saturated(self) -> bool:
+        """True if all the slots are taken, so that a new evaluation would wait for one"""
+        return self._slots is not None and self._slots.locked()
+
+    async def evaluate(self, g: Graph, function: str, a: Node, b: Node) -> Any:
+        """The answer of the named function (e.g. 'is_before') for entities a and b in graph g, as its Python value"""
+        if function not in NAMES:
+            raise ValueError(f"Unknown function {function!r}, expected one of {sorted(NAMES)}")
+        key = (function, a, b, id(g.store), _graph_key(g), _store_indexes(g).version)
+        shared = self._shared.get(key)
+        if shared is None:
+            task = asyncio.ensure_future(self._run(g, function, a, b))
+            shared = self._shared[key] = _Shared(task)
+            task.add_done_callback(lambda _: self._forget(key, shared))
+        shared.waiters += 1
+        try:
+            return await asyncio.shield(shared.task)
+        finally:
+            shared.waiters -= 1
+            if not shared.waiters and not shared.task.done():
+                shared.task.cancel()
+                # a request made before the task has finished cancelling starts a new evaluation rather than join it
+                self._forget(key, shared)
+
+    def _forget(self, key: tuple, shared: _Shared):
+        if self._shared.get(key) is shared:
+            del self._shared[key]
+
+    async def _run(self, g: Graph, function: str, a: Node, b: Node) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        await self._slots.acquire()
+        try:
+            future = self._executor.submit(self._evaluate, g, function, a, b)
+        except BaseException:
+            self._slots.release()
+            raise
+        # the slot is given up when the evaluation ends, or is cancelled before it starts, not when its waiters leave
+        future.add_done_callback(lambda _: self._release(loop))
+        return await asyncio.wrap_future(future)
+
+    def _release(self, loop: asyncio.AbstractEventLoop):
+        # evaluations left running by close() may end after their event loop has closed, when no slot is wanted
+        try:
+            loop.call_soon_threadsafe(self._slots.release)
+        except RuntimeError:
+            if not loop.is_closed():
+                raise
+
+    def _evaluate(self, g: Graph, function: str, a: Node, b: Node) -> Any:
+        ctx = SimpleNamespace(ctx=SimpleNamespace(graph=g))
+        return _load(*NAMES[function])(SimpleNamespace(expr=[a, b]), ctx).toPython()
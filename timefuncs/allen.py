@@ -0,0 +1,475 @@
+"""
+The Allen interval relation between two temporal entities.
+
+Any two proper intervals are related by exactly one of the thirteen relations of Allen's interval algebra, which OWL
+TIME gives as time:intervalBefore, time:intervalMeets and so on. Which one is fixed by how the beginning and end of one
+are ordered against the beginning and end of the other, so allen_relations() resolves the endpoints of both entities
+once, finds the possible orderings of each pair of endpoints and keeps the relations consistent with them, and with any
+relations declared between the entities.
+
+Endpoints are ordered by their time positions (see timestamps.py), by being the same node, or by being declared before
+or after one another. When the data does not fix an ordering, e.g. for an endpoint without a time position or with a
+time position only given to the day, more than one relation remains possible.
+
+Relations declared between intervals also constrain those between intervals they do not directly relate: if a meets b
+and b is before c, a must be before c. Such chains mix relations, so they are not found by following one relation
+family (see closure.FAMILIES). network() therefore makes an AllenNetwork of every time:interval* triple of a graph
+once, holding for each pair of connected intervals the relations that remain possible as a 13-bit mask, and makes it
+path consistent: the relations of each pair (i, k) are narrowed to those allowed by composing the relations of (i, j)
+and (j, k), for every j, until none change. Allen's composition table is derived from the endpoint orderings of
+ALLEN_RELATIONS rather than written out. The network is kept with the graph's TemporalIndex until the graph changes,
+so that any pair's relations are then a lookup, at a cost cubic in the size of the largest group of connected
+intervals at worst.
+
+Path consistency only removes relations that cannot hold, but does not find every inconsistency of the interval
+algebra. A group of connected intervals in which some pair is left without a relation is inconsistent, and is reported
+once in AllenNetwork.conflicts, with no relation possible between any of its intervals.
+"""
+
+from itertools import product
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Set, Tuple, Union
+
+from rdflib import Graph, URIRef
+from rdflib.namespace import TIME
+from rdflib.plugins.sparql.sparql import SPARQLError
+
+from .closure import _bits
+from .paths import _declared_path
+from .index import Node, TemporalIndex, get_index
+from .timestamps import Span, after, before
+
+# each relation of a to b, as the orderings of (a's beginning, b's beginning), (a's beginning, b's end),
+# (a's end, b's beginning) and (a's end, b's end)
+ALLEN_RELATIONS: Dict[URIRef, Tuple[str, str, str, str]] = {
+    TIME.intervalBefore: ("<", "<", "<", "<"),
+    TIME.intervalMeets: ("<", "<", "=", "<"),
+    TIME.intervalOverlaps: ("<", "<", ">", "<"),
+    TIME.intervalFinishedBy: ("<", "<", ">", "="),
+    TIME.intervalContains: ("<", "<", ">", ">"),
+    TIME.intervalStarts: ("=", "<", ">", "<"),
+    TIME.intervalEquals: ("=", "<", ">", "="),
+    TIME.intervalStartedBy: ("=", "<", ">", ">"),
+    TIME.intervalDuring: (">", "<", ">", "<"),
+    TIME.intervalFinishes: (">", "<", ">", "="),
+    TIME.intervalOverlappedBy: (">", "<", ">", ">"),
+    TIME.intervalMetBy: (">", "=", ">", ">"),
+    TIME.intervalAfter: (">", ">", ">", ">"),
+}
+
+INVERSES: Dict[URIRef, URIRef] = {
+    TIME.intervalBefore: TIME.intervalAfter,
+    TIME.intervalMeets: TIME.intervalMetBy,
+    TIME.intervalOverlaps: TIME.intervalOverlappedBy,
+    TIME.intervalFinishedBy: TIME.intervalFinishes,
+    TIME.intervalContains: TIME.intervalDuring,
+    TIME.intervalStarts: TIME.intervalStartedBy,
+    TIME.intervalEquals: TIME.intervalEquals,
+}
+INVERSES.update({v: k for k, v in INVERSES.items()})
+
+# the relations that a declared predicate allows
+_DECLARED: Dict[URIRef, FrozenSet[URIRef]] = {p: frozenset([p]) for p in ALLEN_RELATIONS}
+_DECLARED[TIME.intervalDisjoint] = frozenset([TIME.intervalBefore, TIME.intervalAfter])
+_DECLARED[TIME.intervalIn] = frozenset([TIME.intervalStarts, TIME.intervalDuring, TIME.intervalFinishes])
+
+# the time:interval* predicates, whose triples make up the network of declared relations
+INTERVAL_PREDICATES: Tuple[URIRef, ...] = tuple(_DECLARED)
+
+# the relations that a chain of each family's relations (see closure.FAMILIES) allows, from a to b and from b to a
+_CHAINED: Dict[str, Tuple[FrozenSet[URIRef], FrozenSet[URIRef]]] = {
+    "before": (frozenset([TIME.intervalBefore]), frozenset([TIME.intervalAfter])),
+    "contains": (frozenset([TIME.intervalContains]), frozenset([TIME.intervalDuring])),
+    "finishes": (
+        frozenset([TIME.intervalFinishes, TIME.intervalEquals]),
+        frozenset([TIME.intervalFinishedBy, TIME.intervalEquals]),
+    ),
+    "starts": (
+        frozenset([TIME.intervalStarts, TIME.intervalEquals]),
+        frozenset([TIME.intervalStartedBy, TIME.intervalEquals]),
+    ),
+}
+
+_ANY_ORDER = frozenset("<=>")
+
+
+def _span_order(x: Span, y: Span) -> FrozenSet[str]:
+    """The possible orderings of instants known to lie within spans x and y. As for the functions, identical spans are
+    taken to be the same instant."""
+    if x == y:
+        return frozenset("=")
+    if before(x, y):
+        return frozenset("<")
+    if after(x, y):
+        return frozenset(">")
+    possible = {"="}
+    if x[0] < y[1]:
+        possible.add("<")
+    if x[1] > y[0]:
+        possible.add(">")
+    return frozenset(possible)
+
+
+def _node_order(index: TemporalIndex, x: Node, y: Node, chains: bool) -> FrozenSet[str]:
+    """The possible orderings of the instants x and y. Chains of declared relations between them are searched for if
+    chains and their time positions do not order them."""
+    if x == y:
+        return frozenset("=")
+    if index.declared_before(x, y):
+        return frozenset("<")
+    if index.declared_before(y, x):
+        return frozenset(">")
+    possible = _ANY_ORDER
+    for axis in [index] + [index.on_axis(trs) for trs in index.axes()]:
+        for x_span, y_span in product(axis.spans(x), axis.spans(y)):
+            possible &= _span_order(x_span, y_span)
+    if len(possible) > 1 and chains:
+        if _declared_path(index, x, y, "before"):
+            return frozenset("<")
+        if _declared_path(index, y, x, "before"):
+            return frozenset(">")
+    return possible
+
+
+def _order(index: TemporalIndex, xs: Iterable[Node], ys: Iterable[Node], chains: bool = False) -> FrozenSet[str]:
+    """The possible orderings of an instant given by any of the nodes xs and one given by any of ys"""
+    possible = _ANY_ORDER
+    for x, y in product(xs, ys):
+        possible &= _node_order(index, x, y, chains)
+    return possible
+
+
+def endpoints(index: TemporalIndex, entity: Node, step: URIRef) -> FrozenSet[Node]:
+    """The nodes given as an entity's beginning or end (as per step). An instant is its own beginning and end."""
+    key = ("allen_endpoints", entity, step)
+    try:
+        return index._resolved[key]
+    except KeyError:
+        pass
+
+    nodes = set(index.objects(entity, step))
+    if (
+        index.is_a(entity, TIME.Instant)
+        or index.spans(entity)
+        or any(index.on_axis(trs).spans(entity) for trs in index.axes())
+    ):
+        nodes.add(entity)
+    nodes = index._resolved[key] = frozenset(nodes)
+    return nodes
+
+
+def coincides(g: Union[Graph, TemporalIndex], instant: Node, entity: Node, step: URIRef) -> bool:
+    """True if the data determines that instant is the same instant as the beginning or end (as per step) of entity in
+    graph g (or the TemporalIndex of a graph)"""
+    index = g if isinstance(g, TemporalIndex) else get_index(g)
+    nodes = endpoints(index, entity, step)
+    return bool(nodes) and _order(index, (instant,), nodes, chains=True) == {"="}
+
+
+def _consistent(possible: Set[URIRef], orders: Tuple[FrozenSet[str], ...]) -> Set[URIRef]:
+    return {r for r in possible if all(o in order for o, order in zip(ALLEN_RELATIONS[r], orders))}
+
+
+# a declared relation between intervals, (a, time:interval* predicate, b)
+Constraint = Tuple[Node, URIRef, Node]
+
+# each relation as a bit of a mask
+_ORDER: Tuple[URIRef, ...] = tuple(ALLEN_RELATIONS)
+_BIT: Dict[URIRef, int] = {r: 1 << i for i, r in enumerate(_ORDER)}
+ALL = (1 << len(_ORDER)) - 1
+_EQUALS = _BIT[TIME.intervalEquals]
+_INVERSE_BIT: Tuple[int, ...] = tuple(_BIT[INVERSES[r]] for r in _ORDER)
+
+# the Allen relation of each relation family (see closure.FAMILIES), as a mask
+FAMILY_RELATIONS: Dict[str, int] = {
+    "before": _BIT[TIME.intervalBefore],
+    "contains": _BIT[TIME.intervalContains],
+    "finishes": _BIT[TIME.intervalFinishes],
+    "starts": _BIT[TIME.intervalStarts],
+}
+
+
+def _mask(relations: Iterable[URIRef]) -> int:
+    mask = 0
+    for r in relations:
+        mask |= _BIT[r]
+    return mask
+
+
+# the relations that each predicate allows, as a mask
+_DECLARED_MASKS: Dict[URIRef, int] = {p: _mask(allowed) for p, allowed in _DECLARED.items()}
+
+
+def _relations(mask: int) -> FrozenSet[URIRef]:
+    return frozenset(_ORDER[i] for i in _bits(mask))
+
+
+def _inverse(mask: int) -> int:
+    inverse = 0
+    for i in _bits(mask):
+        inverse |= _INVERSE_BIT[i]
+    return inverse
+
+
+def _composition_table() -> Tuple[Tuple[int, ...], ...]:
+    """The relations possible from a to c for each relation from a to b and from b to c, found from every arrangement
+    of three intervals over six points, enough for their six endpoints to be ordered in any way"""
+    relation_of = {orders: i for i, orders in enumerate(ALLEN_RELATIONS[r] for r in _ORDER)}
+
+    def relation(x, y) -> int:
+        return relation_of[tuple("<" if p < q else "=" if p == q else ">" for p, q in product(x, y))]
+
+    intervals = [(beginning, end) for beginning in range(6) for end in range(beginning + 1, 6)]
+    table = [[0] * len(_ORDER) for _ in _ORDER]
+    for a, b, c in product(intervals, repeat=3):
+        table[relation(a, b)][relation(b, c)] |= 1 << relation(a, c)
+    return tuple(tuple(row) for row in table)
+
+
+_TABLE = _composition_table()
+_composed: Dict[Tuple[int, int], int] = {}
+
+
+def compose(x: int, y: int) -> int:
+    """The mask of relations possible from a to c if those of mask x are possible from a to b and those of y from b
+    to c"""
+    try:
+        return _composed[x, y]
+    except KeyError:
+        pass
+
+    mask = 0
+    for i in _bits(x):
+        for j in _bits(y):
+            mask |= _TABLE[i][j]
+    _composed[x, y] = mask
+    return mask
+
+
+def composition(r: URIRef, s: URIRef) -> FrozenSet[URIRef]:
+    """The Allen relations, as OWL TIME properties, that may hold from a to c if r holds from a to b and s from b to
+    c, i.e. an entry of Allen's composition table"""
+    return _relations(_TABLE[_ORDER.index(r)][_ORDER.index(s)])
+
+
+class AllenNetwork:
+    """The relations between intervals allowed by a set of declared relations, made path consistent.
+
+    Each constraint is a triple (a, p, b) of a time:interval* predicate, e.g. (a, time:intervalMeets, b)."""
+
+    def __init__(self, constraints: Iterable[Constraint]):
+        self._ids: Dict[Node, int] = {}
+        self._nodes: List[Node] = []
+        # the mask of each pair of ids whose relations are constrained, in both directions
+        self._edges: List[Dict[int, int]] = []
+        self._group: List[int] = []
+        # the first pair found without a relation of each inconsistent group, by the group's root
+        self._conflicts: Dict[int, Tuple[Node, Node]] = {}
+
+        changed = []
+        for a, p, b in constraints:
+            i, j = self._id(a), self._id(b)
+            self._union(i, j)
+            if i == j:
+                if not _DECLARED_MASKS[p] & _EQUALS:
+                    self._conflicts.setdefault(i, (a, b))
+                continue
+            if self._narrow(i, j, _DECLARED_MASKS[p]):
+                changed.append((i, j))
+        self._group = [self._root(i) for i in range(len(self._nodes))]
+        self._conflicts = {self._root(i): pair for i, pair in self._conflicts.items()}
+        for i, j in changed:
+            if not self._edges[i][j]:
+                self._conflicts.setdefault(self._group[i], (self._nodes[i], self._nodes[j]))
+        self._propagate(changed)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, node: Node) -> bool:
+        return node in self._ids
+
+    def __iter__(self) -> Iterator[Node]:
+        return iter(self._nodes)
+
+    def _id(self, node: Node) -> int:
+        try:
+            return self._ids[node]
+        except KeyError:
+            i = self._ids[node] = len(self._nodes)
+            self._nodes.append(node)
+            self._edges.append({})
+            self._group.append(i)
+            return i
+
+    def _root(self, i: int) -> int:
+        while self._group[i] != i:
+            self._group[i] = self._group[self._group[i]]
+            i = self._group[i]
+        return i
+
+    def _union(self, i: int, j: int):
+        i, j = self._root(i), self._root(j)
+        if i != j:
+            self._group[max(i, j)] = min(i, j)
+
+    def _narrow(self, i: int, j: int, mask: int) -> bool:
+        """Narrows the relations from i to j to those of mask, returning True if they change"""
+        current = self._edges[i].get(j, ALL)
+        narrowed = current & mask
+        if narrowed == current:
+            return False
+        self._edges[i][j] = narrowed
+        self._edges[j][i] = _inverse(narrowed)
+        return True
+
+    def _propagate(self, queue: List[Tuple[int, int]]):
+        """Narrows the relations of every pair by composition through every third interval, starting from the pairs
+        in the queue, until none change. Composing with a pair whose relations are unconstrained allows every relation,
+        so only the constrained pairs of each interval are visited."""
+        edges = self._edges
+        while queue:
+            i, j = queue.pop()
+            if self._group[i] in self._conflicts:
+                continue
+            ij = edges[i][j]
+            for k, jk in list(edges[j].items()):
+                if k != i and self._narrow(i, k, compose(ij, jk)):
+                    if not edges[i][k]:
+                        self._conflicts[self._group[i]] = (self._nodes[i], self._nodes[k])
+                        break
+                    queue.append((i, k))
+            else:
+                for k in list(edges[i]):
+                    if k != j and self._narrow(k, j, compose(edges[k][i], ij)):
+                        if not edges[k][j]:
+                            self._conflicts[self._group[i]] = (self._nodes[k], self._nodes[j])
+                            break
+                        queue.append((k, j))
+
+    @property
+    def consistent(self) -> bool:
+        """False if path consistency left some pair of intervals without a relation"""
+        return not self._conflicts
+
+    @property
+    def conflicts(self) -> List[Tuple[Node, Node]]:
+        """A pair of intervals left without a relation from each inconsistent group of connected intervals"""
+        return list(self._conflicts.values())
+
+    def _pair_mask(self, a: Node, b: Node) -> int:
+        try:
+            i, j = self._ids[a], self._ids[b]
+        except KeyError:
+            return _EQUALS if a == b else ALL
+        if self._group[i] != self._group[j]:
+            return ALL
+        if self._group[i] in self._conflicts:
+            return 0
+        if i == j:
+            return _EQUALS
+        return self._edges[i].get(j, ALL)
+
+    def relations(self, a: Node, b: Node) -> FrozenSet[URIRef]:
+        """The Allen relations, as OWL TIME properties, that the declarations allow from a to b: all thirteen if they
+        do not constrain the pair and none if a and b are in an inconsistent group"""
+        return _relations(self._pair_mask(a, b))
+
+    def entails(self, a: Node, b: Node, relations: int) -> bool:
+        """True if the declarations allow some relation from a to b and all those they allow are in the mask
+        relations"""
+        mask = self._pair_mask(a, b)
+        return bool(mask) and not mask & ~relations
+
+    def related(self, node: Node, relations: int, reverse: bool = False) -> Set[Node]:
+        """The intervals b, other than node, that entails(node, b, relations) is true of, or the intervals a that
+        entails(a, node, relations) is if reverse"""
+        i = self._ids.get(node)
+        if i is None or self._group[i] in self._conflicts:
+            return set()
+        if reverse:
+            relations = _inverse(relations)
+        return {self._nodes[k] for k, mask in self._edges[i].items() if mask and not mask & ~relations}
+
+
+def network(g: Union[Graph, TemporalIndex]) -> AllenNetwork:
+    """The path consistent network of the Allen relations declared in graph g (or the TemporalIndex of a graph), kept
+    with the index until the graph changes"""
+    index = g if isinstance(g, TemporalIndex) else get_index(g)
+    key = ("network",)
+    try:
+        return index._resolved[key]
+    except KeyError:
+        pass
+
+    constraints = ((a, p, b) for p in INTERVAL_PREDICATES for a, objects in index._outbound[p].items() for b in objects)
+    built = index._resolved[key] = AllenNetwork(constraints)
+    return built
+
+
+def entailed(index: TemporalIndex, a: Node, b: Node, family: str) -> bool:
+    """True if the declared Allen relations entail the family's relation (see FAMILY_RELATIONS) from a to b"""
+    return network(index).entails(a, b, FAMILY_RELATIONS[family])
+
+
+def allen_relations(g: Union[Graph, TemporalIndex], a: Node, b: Node) -> FrozenSet[URIRef]:
+    """The Allen relations, as OWL TIME properties such as time:intervalMeets, that may hold from a to b in graph g
+    (or the TemporalIndex of a graph). A single relation when the data determines it, more when the data is incomplete
+    and none when it is inconsistent.
+
+    Chains of declared relations are only searched for while time positions and the network of declared Allen
+    relations leave more than one relation possible."""
+    index = g if isinstance(g, TemporalIndex) else get_index(g)
+    possible = set(network(index).relations(a, b))
+
+    pairs = (
+        (endpoints(index, a, TIME.hasBeginning), endpoints(index, b, TIME.hasBeginning)),
+        (endpoints(index, a, TIME.hasBeginning), endpoints(index, b, TIME.hasEnd)),
+        (endpoints(index, a, TIME.hasEnd), endpoints(index, b, TIME.hasBeginning)),
+        (endpoints(index, a, TIME.hasEnd), endpoints(index, b, TIME.hasEnd)),
+    )
+    possible = _consistent(possible, tuple(_order(index, xs, ys) for xs, ys in pairs))
+    if len(possible) <= 1:
+        return frozenset(possible)
+
+    for family, (forwards, backwards) in _CHAINED.items():
+        if _declared_path(index, a, b, family):
+            possible &= forwards
+        if _declared_path(index, b, a, family):
+            possible &= backwards
+    if len(possible) > 1:
+        possible = _consistent(possible, tuple(_order(index, xs, ys, chains=True) for xs, ys in pairs))
+    return frozenset(possible)
+
+
+def allen_relation(e, ctx) -> URIRef:
+    """SPARQL tfun:allenRelation(a, b)
+
+    Returns the OWL TIME property of the Allen relation from a to b, e.g. time:intervalMeets. Raises an error, leaving
+    the result unbound, if the data does not determine a single relation: use allen_relations() in Python to obtain
+    all that remain possible.
+
+    Example:
+
+    SELECT ?a ?b ?relation
+    WHERE {
+        ?a a time:ProperInterval .
+        ?b a time:ProperInterval .
+
+        BIND (tfun:allenRelation(?a, ?b) AS ?relation)
+    }
+
+    """
+    try:
+        a = e.expr[0]
+        b = e.expr[1]
+    except Exception as err:
+        raise ValueError(
+            "This function, allenRelation(a, b), requires two IRI parameters, "
+            "where a & b are Time Ontology ProperInterval instances. "
+            "The relation from a to b is returned"
+        )
+
+    relations = allen_relations(ctx.ctx.graph, a, b)
+    if len(relations) != 1:
+        raise SPARQLError(f"The data gives {len(relations)} possible Allen relations between {a} and {b}, not one")
+    return next(iter(relations))
@@ -0,0 +1,109 @@
+"""
+Evaluating a function for very many pairs of entities on several processes.
+
+Calling a function from funcs.py for millions of known (a, b) pairs keeps one core busy in Python. evaluate() instead
+shards the pairs across a pool of worker processes. A sidecar of the graph (see sidecar.py), holding its temporal
+content, i.e. the triples that a TemporalIndex is built from, as ids of their terms, and the resolved time positions
+and closures, is written once to a block of shared memory (see multiprocessing.shared_memory). Each worker builds its
+graph from the sidecar's terms as it starts, without parsing, and attaches the sidecar to the graph's index, so that
+the workers share the resolutions rather than each making its own, and the graph is neither pickled for every worker
+nor for every task. Only the pairs, a chunk at a time, and the answers travel between processes.
+
+Answers are yielded in the order of the pairs, as they arrive, and no more than a few chunks per worker are in flight
+at once, so pairs may be generated lazily and need never all be held in memory.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from types import SimpleNamespace
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from rdflib import Graph
+
+from . import FUNCTIONS, _load
+from .index import Node, get_index
+from .sidecar import Sidecar, _attach, dumps
+
+# the number of pairs in each task sent to a worker
+DEFAULT_CHUNK_SIZE = 2000
+
+# the tasks kept in flight per worker
+_PER_WORKER = 4
+
+# the Python functions of pairs of entities that may be evaluated, by name, e.g. 'is_before'
+NAMES = {name: (module, name) for module, name in FUNCTIONS.values() if module != "neighbours"}
+
+# the graph of the worker process, and the shared memory block its index's sidecar is read from, set by _start()
+_graph: Optional[Graph] = None
+_shared: Optional[SharedMemory] = None
+
+
+def _start(name: str, size: int):
+    """Builds a worker's graph from the sidecar in the shared memory block of the given name, and attaches the sidecar
+    to the graph's index. Blank nodes keep their labels in a sidecar, so they are those of the pairs."""
+    global _graph, _shared
+    _shared = SharedMemory(name)
+    sidecar = Sidecar(_shared.buf[:size])
+    _graph = Graph()
+    _graph.addN((s, p, o, _graph) for s, p, o in sidecar.triples())
+    _attach(get_index(_graph), sidecar)
+
+
+def _evaluate(function: str, pairs: List[Tuple[Node, Node]]) -> List[Any]:
+    func = _load(*NAMES[function])
+    ctx = SimpleNamespace(ctx=SimpleNamespace(graph=_graph))
+    return [func(SimpleNamespace(expr=[a, b]), ctx).toPython() for a, b in pairs]
+
+
+def _chunks(pairs: Iterable[Tuple[Node, Node]], size: int) -> Iterator[List[Tuple[Node, Node]]]:
+    chunk = []
+    for pair in pairs:
+        chunk.append(pair)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def evaluate(
+    g: Graph,
+    function: str,
+    pairs: Iterable[Tuple[Node, Node]],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    mp_context=None,
+) -> Iterator[Any]:
+    """Yields the answer of the named function (e.g. 'is_before', see NAMES) for each (a, b) pair, in order, as its
+    Python value, e.g. True or False. The pairs are evaluated over the graph g as it is when evaluate() is first
+    iterated, on a pool of workers processes (by default one per CPU) started by the given multiprocessing context."""
+    if function not in NAMES:
+        raise ValueError(f"Unknown function {function!r}, expected one of {sorted(NAMES)}")
+    return _stream(g, function, pairs, workers or os.cpu_count() or 1, chunk_size, mp_context)
+
+
+def _stream(g, function, pairs, workers, chunk_size, mp_context) -> Iterator[Any]:
+    data = dumps(g, triples=True)
+    shared = SharedMemory(create=True, size=max(len(data), 1))
+    try:
+        shared.buf[: len(data)] = data
+        with ProcessPoolExecutor(
+            workers, mp_context=mp_context, initializer=_start, initargs=(shared.name, len(data))
+        ) as executor:
+            in_flight = deque()
+            try:
+                for chunk in _chunks(pairs, chunk_size):
+                    in_flight.append(executor.submit(_evaluate, function, chunk))
+                    if len(in_flight) >= workers * _PER_WORKER:
+                        yield from in_flight.popleft().result()
+                while in_flight:
+                    yield from in_flight.popleft().result()
+            finally:
+                # when the caller stops early, tasks not yet started are dropped
+                for future in in_flight:
+                    future.cancel()
+    finally:
+        shared.close()
+        shared.unlink()
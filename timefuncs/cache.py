@@ -0,0 +1,123 @@
+"""
+An opt-in cache of the functions' answers, for graphs that are queried repeatedly and change rarely.
+
+When enabled, the answer of each function of relations.RELATIONS for a pair (a, b) is kept in a least recently used
+cache with the graph's TemporalIndex, and repeated calls are answered from it. When a function's checks are another
+function's checks with a and b swapped, e.g. isContainedBy's are contains', the two functions give the same answer
+for (b, a) and (a, b). Each answer is therefore stored for the inverse function as well. The cache is kept in the
+index's memo of resolutions, which is emptied whenever the graph changes, so an answer is only ever given for the
+version of the graph it was computed from.
+
+Each index's cache holds up to maxsize answers, the least recently used being evicted first, and is guarded by a lock
+of its own, so that threads querying the same graph may share it. Hits, misses and evictions are counted across all
+graphs:
+
+    from timefuncs import cache
+
+    cache.enable(maxsize=100_000)
+    g.query(q)
+    print(cache.info())
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Optional, Tuple
+
+from .index import Node, TemporalIndex
+
+# the number of answers kept per graph, by default
+DEFAULT_MAXSIZE = 2**16
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "maxsize"])
+
+Key = Tuple[str, Node, Node]
+
+enabled = False
+
+_maxsize = DEFAULT_MAXSIZE
+
+_hits = 0
+_misses = 0
+_evictions = 0
+_counts_lock = threading.Lock()
+
+
+class _Answers(OrderedDict):
+    """The answers cached for one index, least recently used first, with the lock that guards them"""
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+
+
+def enable(maxsize: int = DEFAULT_MAXSIZE):
+    """Starts caching answers, keeping up to maxsize of them per graph"""
+    global enabled, _maxsize
+    _maxsize = maxsize
+    enabled = True
+
+
+def disable():
+    """Stops caching answers. Those cached are kept, and used again if caching is enabled before the graph changes."""
+    global enabled
+    enabled = False
+
+
+def info() -> CacheInfo:
+    """The hits, misses and evictions counted since the last reset(), and the size of each graph's cache"""
+    return CacheInfo(_hits, _misses, _evictions, _maxsize)
+
+
+def reset():
+    """Sets the counts of hits, misses and evictions back to zero"""
+    global _hits, _misses, _evictions
+    with _counts_lock:
+        _hits = _misses = _evictions = 0
+
+
+def _answers(index: TemporalIndex) -> _Answers:
+    answers = index._resolved.get(("answers",))
+    if answers is None:
+        # setdefault() keeps the cache of whichever thread got there first
+        answers = index._resolved.setdefault(("answers",), _Answers())
+    return answers
+
+
+def _count(hits: int = 0, misses: int = 0, evictions: int = 0):
+    global _hits, _misses, _evictions
+    with _counts_lock:
+        _hits += hits
+        _misses += misses
+        _evictions += evictions
+
+
+def get(index: TemporalIndex, function: str, a: Node, b: Node) -> Optional[bool]:
+    """The cached answer of the function for a and b, or None if there is none"""
+    answers = _answers(index)
+    key = (function, a, b)
+    with answers.lock:
+        answer = answers.get(key)
+        if answer is not None:
+            answers.move_to_end(key)
+    if answer is None:
+        _count(misses=1)
+    else:
+        _count(hits=1)
+    return answer
+
+
+def put(index: TemporalIndex, function: str, a: Node, b: Node, answer: bool, inverse: Optional[str] = None):
+    """Caches the answer of the function for a and b, and of its inverse, if any, for b and a"""
+    answers = _answers(index)
+    evicted = 0
+    with answers.lock:
+        answers[(function, a, b)] = answer
+        answers.move_to_end((function, a, b))
+        if inverse is not None:
+            answers[(inverse, b, a)] = answer
+            answers.move_to_end((inverse, b, a))
+        while len(answers) > _maxsize:
+            answers.popitem(last=False)
+            evicted += 1
+    if evicted:
+        _count(evictions=evicted)
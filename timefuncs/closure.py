@@ -0,0 +1,246 @@
+"""
+Incrementally maintained transitive closures of declared temporal relations.
+
+Declared relations such as time:before or time:intervalContains are transitive, so without reasoning a function
+answering "is a before b?" must search for a chain of them between a and b. A TransitiveClosure keeps, for every node,
+the set of nodes it reaches as an integer bitset, so that the question becomes a single bit test. The closure is kept
+up to date as relation triples are added to or removed from the graph, rather than being recomputed.
+
+Closures are opt-in, since they cost memory proportional to the number of reachable pairs: see enable_closures() in
+index.py.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+from typing import Literal as TLiteral
+
+from rdflib import BNode, URIRef
+from rdflib.namespace import TIME
+
+Node = Union[URIRef, BNode]
+Step = Tuple[URIRef, TLiteral["outbound", "inbound"]]
+
+# the relations that are transitive, each given as the predicates that may be followed, in the style of _path_exists()
+FAMILIES: Dict[str, Tuple[Step, ...]] = {
+    "before": (
+        (TIME.before, "outbound"),
+        (TIME.after, "inbound"),
+    ),
+    "contains": (
+        (TIME.intervalContains, "outbound"),
+        (TIME.intervalDuring, "inbound"),
+    ),
+    "finishes": (
+        (TIME.intervalFinishes, "outbound"),
+        (TIME.intervalFinishedBy, "inbound"),
+        (TIME.intervalEquals, "outbound"),
+        (TIME.intervalEquals, "inbound"),
+    ),
+    "starts": (
+        (TIME.intervalStarts, "outbound"),
+        (TIME.intervalStartedBy, "inbound"),
+        (TIME.intervalEquals, "outbound"),
+        (TIME.intervalEquals, "inbound"),
+    ),
+}
+
+
+def _bits(x: int) -> Iterator[int]:
+    """The positions of the set bits of x"""
+    while x:
+        low = x & -x
+        yield low.bit_length() - 1
+        x ^= low
+
+
+class TransitiveClosure:
+    """The transitive closure of the relation formed by following any of the given steps from one node to the next.
+
+    Edges are counted, since a relation may be declared by more than one triple (e.g. a time:before b and
+    b time:after a), and the closure only changes when an edge gains its first or loses its last triple."""
+
+    def __init__(self, steps: Iterable[Step]):
+        self.steps = tuple(steps)
+        self.predicates = {p for p, _ in self.steps}
+        self._ids: Dict[Node, int] = {}
+        self._successors: List[Dict[int, int]] = []
+        self._predecessors: List[Dict[int, int]] = []
+        # bitsets of the ids reachable from, and reaching, each id by one or more edges
+        self._reach: List[int] = []
+        self._reached_by: List[int] = []
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _id(self, node: Node) -> int:
+        try:
+            return self._ids[node]
+        except KeyError:
+            i = self._ids[node] = len(self._successors)
+            self._successors.append({})
+            self._predecessors.append({})
+            self._reach.append(0)
+            self._reached_by.append(0)
+            return i
+
+    def _edges(self, s: Node, p: URIRef, o: Node) -> Iterator[Tuple[Node, Node]]:
+        for predicate, direction in self.steps:
+            if predicate == p:
+                yield (s, o) if direction == "outbound" else (o, s)
+
+    def reaches(self, a: Node, b: Node) -> bool:
+        """True if a chain of one or more edges leads from a to b. As for _path_exists(), a never reaches itself."""
+        if a == b:
+            return False
+        ia = self._ids.get(a)
+        ib = self._ids.get(b)
+        if ia is None or ib is None:
+            return False
+        return (self._reach[ia] >> ib) & 1 == 1
+
+    def reachable(self, a: Node) -> List[Node]:
+        """All nodes that a reaches"""
+        ia = self._ids.get(a)
+        if ia is None:
+            return []
+        nodes = list(self._ids)
+        return [nodes[i] for i in _bits(self._reach[ia]) if i != ia]
+
+    def reaching(self, b: Node) -> List[Node]:
+        """All nodes that reach b"""
+        ib = self._ids.get(b)
+        if ib is None:
+            return []
+        nodes = list(self._ids)
+        return [nodes[i] for i in _bits(self._reached_by[ib]) if i != ib]
+
+    def build(self, triples: Iterable[Tuple[Node, URIRef, Node]]):
+        """Computes the closure from scratch for the given relation triples"""
+        for s, p, o in triples:
+            for u, v in self._edges(s, p, o):
+                iu, iv = self._id(u), self._id(v)
+                self._successors[iu][iv] = self._successors[iu].get(iv, 0) + 1
+                self._predecessors[iv][iu] = self._predecessors[iv].get(iu, 0) + 1
+        self._reach = self._close(self._successors)
+        self._reached_by = self._close(self._predecessors)
+
+    @staticmethod
+    def _close(adjacency: List[Dict[int, int]]) -> List[int]:
+        """Reachability bitsets for every node, via the strongly connected components of the graph.
+
+        Tarjan's algorithm emits components in reverse topological order, so each component's successors are already
+        complete when it is reached."""
+        n = len(adjacency)
+        reach = [0] * n
+        index = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        stack: List[int] = []
+        counter = 0
+
+        for root in range(n):
+            if index[root] != -1:
+                continue
+            work = [(root, iter(adjacency[root]))]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            while work:
+                v, successors = work[-1]
+                for w in successors:
+                    if index[w] == -1:
+                        index[w] = low[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = True
+                        work.append((w, iter(adjacency[w])))
+                        break
+                    if on_stack[w]:
+                        low[v] = min(low[v], index[w])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[v])
+                    if low[v] == index[v]:
+                        component = []
+                        while True:
+                            w = stack.pop()
+                            on_stack[w] = False
+                            component.append(w)
+                            if w == v:
+                                break
+                        members = 0
+                        for w in component:
+                            members |= 1 << w
+                        bits = 0
+                        cyclic = len(component) > 1
+                        for w in component:
+                            for x in adjacency[w]:
+                                if (members >> x) & 1:
+                                    cyclic = True
+                                else:
+                                    bits |= (1 << x) | reach[x]
+                        if cyclic:
+                            bits |= members
+                        for w in component:
+                            reach[w] = bits
+        return reach
+
+    def add(self, s: Node, p: URIRef, o: Node):
+        """Updates the closure for a relation triple that has been added to the graph"""
+        for u, v in self._edges(s, p, o):
+            iu, iv = self._id(u), self._id(v)
+            count = self._successors[iu].get(iv, 0)
+            self._successors[iu][iv] = count + 1
+            self._predecessors[iv][iu] = count + 1
+            if count:
+                continue
+            # everything reaching u, and u itself, now reaches v and everything v reaches
+            targets = self._reach[iv] | (1 << iv)
+            sources = self._reached_by[iu] | (1 << iu)
+            for x in _bits(sources):
+                self._reach[x] |= targets
+            for y in _bits(targets):
+                self._reached_by[y] |= sources
+
+    def remove(self, s: Node, p: URIRef, o: Node):
+        """Updates the closure for a relation triple that has been removed from the graph"""
+        for u, v in self._edges(s, p, o):
+            iu, iv = self._ids.get(u), self._ids.get(v)
+            if iu is None or iv is None or iv not in self._successors[iu]:
+                continue
+            count = self._successors[iu][iv] - 1
+            if count:
+                self._successors[iu][iv] = count
+                self._predecessors[iv][iu] = count
+                continue
+            del self._successors[iu][iv]
+            del self._predecessors[iv][iu]
+            self._recompute(self._reached_by[iu] | (1 << iu))
+
+    def _recompute(self, affected: int):
+        """Recomputes the reach of the affected nodes, the only ones whose paths may have used a removed edge.
+
+        The reach of every other node is unchanged and is reused as found."""
+        old = {x: self._reach[x] for x in _bits(affected)}
+        for x in old:
+            bits = 0
+            stack = [x]
+            expanded = {x}
+            while stack:
+                for w in self._successors[stack.pop()]:
+                    if (bits >> w) & 1:
+                        continue
+                    bits |= 1 << w
+                    if w in old:
+                        if w not in expanded:
+                            expanded.add(w)
+                            stack.append(w)
+                    else:
+                        bits |= self._reach[w]
+            self._reach[x] = bits
+        for x, bits in old.items():
+            lost = bits & ~self._reach[x]
+            for y in _bits(lost):
+                self._reached_by[y] &= ~(1 << x)
@@ -0,0 +1,88 @@
+"""
+Time positions as numbers, for data whose time positions are compared often.
+
+enrich() passes a stream of triples through, adding to each instant given by a time:inXSDDateTimeStamp or
+time:inXSDDateTime the same instant as a numeric position in Unix time:
+
+    <instant> time:inTimePosition [
+        time:hasTRS <http://dbpedia.org/resource/Unix_time> ;
+        time:numericPosition 1626393600
+    ] .
+
+The conversion is that of timestamps.to_span(), so timezone offsets are applied and values without a timezone are
+taken to be in UTC. Whole seconds are given as xsd:integer values and others as xsd:decimal ones, to the microsecond.
+Dates, year-months and years denote more than an instant, so they and values that cannot be converted are passed
+through unchanged. With replace=True, the XSD literals that are converted are left out.
+
+Run as a script, it enriches N-Triples a line at a time, or any other RDF format read into a Graph:
+
+    python -m timefuncs.enrich data.nt -o data-unix.nt
+"""
+
+import argparse
+import sys
+from decimal import Decimal
+from typing import Iterable, Iterator, Optional
+
+from rdflib import BNode, Graph, Literal
+from rdflib.namespace import TIME, XSD
+
+from . import ntriples
+from .ntriples import Triple
+from .timestamps import MICROSECONDS_PER_SECOND, UNIX_TIME, to_span
+
+# the predicates whose values are converted
+PREDICATES = frozenset([TIME.inXSDDateTimeStamp, TIME.inXSDDateTime])
+
+
+def unix_time(microseconds: int) -> Literal:
+    """The numeric position in Unix time of an instant given in microseconds since the Unix epoch"""
+    seconds, fraction = divmod(microseconds, MICROSECONDS_PER_SECOND)
+    if not fraction:
+        return Literal(seconds, datatype=XSD.integer)
+    return Literal(format(Decimal(microseconds).scaleb(-6).normalize(), "f"), datatype=XSD.decimal)
+
+
+def enrich(triples: Iterable[Triple], replace: bool = False) -> Iterator[Triple]:
+    """Yields triples, each date-time position followed by its numeric position in Unix time (or replaced by it)"""
+    for s, p, o in triples:
+        span = to_span(o) if p in PREDICATES and isinstance(o, Literal) else None
+        if span is None or span[0] != span[1]:
+            yield s, p, o
+            continue
+
+        if not replace:
+            yield s, p, o
+        position = BNode()
+        yield s, TIME.inTimePosition, position
+        yield position, TIME.hasTRS, UNIX_TIME
+        yield position, TIME.numericPosition, unix_time(span[0])
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("input", nargs="?", default="-", help="the data, by default read from standard input")
+    parser.add_argument("-o", "--output", default="-", help="where to write N-Triples, by default standard output")
+    parser.add_argument("-f", "--format", default="nt", help="the RDF format of the input, by default N-Triples")
+    parser.add_argument("--replace", action="store_true", help="leave out the XSD literals converted")
+    args = parser.parse_args(argv)
+
+    if args.format in ("nt", "ntriples"):
+        source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        triples = ntriples.read(source)
+    else:
+        source = None
+        triples = iter(Graph().parse(sys.stdin if args.input == "-" else args.input, format=args.format))
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        ntriples.write(enrich(triples, args.replace), out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if source not in (None, sys.stdin):
+            source.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
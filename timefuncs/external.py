@@ -0,0 +1,334 @@
+"""
+Relations calculated from time positions, for N-Triples files too large to be read into a Graph or a TemporalIndex.
+
+materialize() does what materialize.materialize() does for the part of each relation that follows from the time
+positions of entities, holding no more than max_records records in memory at once for sorting:
+
+1. The N-Triples are read a line at a time, and a record of each time position given by one of
+   index.POSITION_PREDICATES, each time:hasBeginning or time:hasEnd and each type of index.TYPE_CLASSES is spilled to
+   disk in sorted runs.
+2. The runs are merged by node, joining each beginning or end to its time positions, then by entity, giving each
+   temporal entity's extent: the bounds of its own time positions and of those of its beginning and end.
+3. For each relation, the extents are sorted by the endpoint that the relation compares first and swept in that order:
+   before takes, for each entity, a prefix of the others sorted by the other endpoint, contains and inside keep
+   the intervals open at the sweep position ordered by their end, and starts and finishes group the intervals
+   sharing a beginning or an end.
+
+Runs are written to a temporary directory, and merged in passes of at most MAX_RUNS runs. Nodes are kept as their
+N-Triples form throughout.
+
+Declared relations are not followed, nor numeric time positions read, and a beginning or end is taken to be the
+entity's own time:hasBeginning or time:hasEnd, not that of a chain of them. Where each endpoint has a single time
+position, the relations are those calculated by the functions; where one has several, before and contains are
+still exact, while starts, finishes and inside take the endpoint's positions as one span from the earliest to the
+latest. Entities whose end is before their beginning are left out of the contains and inside sweeps. Besides
+max_records, memory holds the intervals open at the sweep position and the intervals sharing a beginning or an end.
+
+    timefuncs materialize observations.nt -o relations.nt --out-of-core --max-records 1000000
+"""
+
+import heapq
+import os
+import pickle
+import tempfile
+from bisect import bisect_right
+from contextlib import contextmanager
+from itertools import groupby, islice
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+from rdflib import Literal
+from rdflib.namespace import RDF, TIME
+from rdflib.util import from_n3
+
+from .index import POSITION_PREDICATES, TYPE_CLASSES
+from .materialize import PREDICATES
+from .ntriples import Triple
+from .relations import RELATIONS
+from .timestamps import to_span
+
+# the records held in memory at once, by default, when sorting
+DEFAULT_MAX_RECORDS = 1_000_000
+
+# the runs merged at once
+MAX_RUNS = 64
+
+# the records pickled together in a run
+_BLOCK = 256
+
+# the (earliest low, latest low, earliest high, latest high) bounds of a set of spans
+Bounds = Tuple[int, int, int, int]
+
+# an entity's N-Triples form, whether it is an interval, and the bounds of its own time positions and those of its
+# beginning and end, any of which may be None
+Extent = Tuple[str, bool, Optional[Bounds], Optional[Bounds], Optional[Bounds]]
+
+_POSITIONS = frozenset(POSITION_PREDICATES)
+_CLASSES = frozenset(TYPE_CLASSES)
+_INTERVALS = frozenset([TIME.Interval, TIME.ProperInterval])
+_STEPS = {TIME.hasBeginning: "b", TIME.hasEnd: "e"}
+
+# sorts after any node's N-Triples form
+_LAST = "\U0010ffff"
+
+
+def _bounds(spans: Iterable[Tuple[int, int]]) -> Optional[Bounds]:
+    spans = list(spans)
+    if not spans:
+        return None
+    lows = [span[0] for span in spans]
+    highs = [span[1] for span in spans]
+    return min(lows), max(lows), min(highs), max(highs)
+
+
+def _combined(*bounds: Optional[Bounds]) -> Optional[Bounds]:
+    bounds = [b for b in bounds if b is not None]
+    if not bounds:
+        return None
+    return min(b[0] for b in bounds), max(b[1] for b in bounds), min(b[2] for b in bounds), max(b[3] for b in bounds)
+
+
+class _Spill:
+    """Sorted runs of records on disk"""
+
+    def __init__(self, directory: str, max_records: int):
+        self.directory = directory
+        self.max_records = max_records
+
+    def _write(self, records: Iterable) -> str:
+        fd, path = tempfile.mkstemp(suffix=".run", dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            records = iter(records)
+            while True:
+                block = list(islice(records, _BLOCK))
+                if not block:
+                    break
+                pickle.dump(block, f, pickle.HIGHEST_PROTOCOL)
+        return path
+
+    @staticmethod
+    def read(path: str) -> Iterator:
+        """Yields the records of a run"""
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    block = pickle.load(f)
+                except EOFError:
+                    return
+                yield from block
+
+    def sorted(self, records: Iterable, key: Optional[Callable] = None) -> Iterator:
+        """Yields the records in order, sorting no more than max_records of them in memory at once"""
+        records = iter(records)
+        runs = []
+        try:
+            while True:
+                chunk = list(islice(records, self.max_records))
+                chunk.sort(key=key)
+                if not runs and len(chunk) < self.max_records:
+                    # all the records fit in memory
+                    yield from chunk
+                    return
+                if not chunk:
+                    break
+                runs.append(self._write(chunk))
+                del chunk
+            while len(runs) > MAX_RUNS:
+                merged = runs[:MAX_RUNS]
+                runs = runs[MAX_RUNS:] + [self._write(heapq.merge(*map(self.read, merged), key=key))]
+                for path in merged:
+                    os.remove(path)
+            yield from heapq.merge(*map(self.read, runs), key=key)
+        finally:
+            for path in runs:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def saved(self, records: Iterable) -> str:
+        """The path of a run of the records, in the order given"""
+        return self._write(records)
+
+
+def _scanned(triples: Iterable[Triple]) -> Iterator[tuple]:
+    """Records, keyed by node, of time positions (kind 0), of beginnings and ends (kind 1) and of types (kind 2)"""
+    for s, p, o in triples:
+        if p in _POSITIONS:
+            span = to_span(o) if isinstance(o, Literal) else None
+            if span is not None:
+                yield s.n3(), 0, span
+        elif p in _STEPS:
+            yield o.n3(), 1, (s.n3(), _STEPS[p])
+        elif p == RDF.type and o in _CLASSES:
+            yield s.n3(), 2, o in _INTERVALS
+
+
+def _resolved(records: Iterable[tuple]) -> Iterator[tuple]:
+    """Records, keyed by entity, of the bounds of the time positions of entities ("p") and of their beginnings ("b")
+    and ends ("e"), and of their types ("t"), from the records of _scanned() in order of node"""
+    for node, group in groupby(records, key=lambda r: r[0]):
+        spans = []
+        for _, kind, value in group:
+            if kind == 0:
+                spans.append(value)
+            elif kind == 1:
+                if spans:
+                    entity, step = value
+                    yield entity, step, _bounds(spans)
+            else:
+                yield node, "t", value
+        if spans:
+            yield node, "p", _bounds(spans)
+
+
+def _extents(records: Iterable[tuple]) -> Iterator[Extent]:
+    """The extents of the typed entities, from the records of _resolved() in order of entity"""
+    for entity, group in groupby(records, key=lambda r: r[0]):
+        typed = interval = False
+        bounds = {"p": None, "b": None, "e": None}
+        for _, kind, value in group:
+            if kind == "t":
+                typed = True
+                interval = interval or value
+            else:
+                bounds[kind] = _combined(bounds[kind], value)
+        if typed:
+            yield entity, interval, bounds["p"], bounds["b"], bounds["e"]
+
+
+def _less_than(
+    spill: _Spill, xs: Iterable[Tuple[int, str]], ys: Iterable[Tuple[int, str]]
+) -> Iterator[Tuple[str, str]]:
+    """Pairs (x, y) of the keyed xs and ys with y's key less than x's. The xs are taken in order of key, so the ys of
+    each are a prefix of the ys in order of key, read again from disk."""
+    path = spill.saved(spill.sorted(ys))
+    ahead = spill.read(path)
+    try:
+        following = next(ahead, None)
+        count = 0
+        for key, x in spill.sorted(xs):
+            while following is not None and following[0] < key:
+                count += 1
+                following = next(ahead, None)
+            if count:
+                for _, y in islice(spill.read(path), count):
+                    yield x, y
+    finally:
+        ahead.close()
+        os.remove(path)
+
+
+def _within(
+    spill: _Spill, outers: Iterable[Tuple[int, int, str]], inners: Iterable[Tuple[int, int, str]]
+) -> Iterator[Tuple[str, str]]:
+    """Pairs (outer, inner) of (start, end, node) records with the outer's start before the inner's and the inner's
+    end before the outer's. The records are swept in order of start, keeping the outers begun and not yet ended."""
+    outers = spill.sorted(outers)
+    following = next(outers, None)
+    # the outers open at the sweep position, as (end, node) in order
+    open_ = []
+    for start, end, inner in spill.sorted(inner for inner in inners if inner[0] <= inner[1]):
+        while following is not None and following[0] < start:
+            if following[1] > start:
+                i = bisect_right(open_, (following[1], following[2]))
+                open_.insert(i, (following[1], following[2]))
+            following = next(outers, None)
+        # those ended by now contain no inner to come, whose end is not before its start
+        del open_[: bisect_right(open_, (start, _LAST))]
+        for _, outer in open_[bisect_right(open_, (end, _LAST)) :]:
+            yield outer, inner
+
+
+def _sharing(spill: _Spill, records: Iterable[Tuple[tuple, int, int, str]]) -> Iterator[Tuple[str, str]]:
+    """Pairs (x, y) of (key, a, b, node) records sharing a key with x's a less than y's b"""
+    for _, group in groupby(spill.sorted(records), key=lambda r: r[0]):
+        group = sorted(group, key=lambda r: r[2])
+        bs = [r[2] for r in group]
+        for _, a, _, x in group:
+            for _, _, _, y in group[bisect_right(bs, a) :]:
+                yield x, y
+
+
+def _hull(bounds: Bounds) -> Tuple[int, int]:
+    return bounds[0], bounds[3]
+
+
+def _proper(extent: Extent) -> bool:
+    """True of an interval whose beginning is before its end"""
+    _, interval, _, beginning, end = extent
+    return interval and beginning is not None and end is not None and _hull(beginning)[1] < _hull(end)[0]
+
+
+def _calculated(spill: _Spill, path: str, calculation: str) -> Iterator[Tuple[str, str]]:
+    """The pairs (x, y) of the extents saved at path for which the named calculation of joins._CALCULATED holds"""
+
+    def extents() -> Iterator[Extent]:
+        return spill.read(path)
+
+    if calculation == "before":
+        # the latest end of x before the earliest beginning of y
+        ends = ((-b[3], e[0]) for e in extents() for b in [_combined(e[2], e[4])] if b is not None)
+        beginnings = ((-b[0], e[0]) for e in extents() for b in [_combined(e[2], e[3])] if b is not None)
+        return _less_than(spill, ends, beginnings)
+    if calculation == "contains":
+        # a beginning of x before a beginning of y and an end of y before an end of x
+        outers = ((e[3][2], e[4][1], e[0]) for e in extents() if e[3] is not None and e[4] is not None)
+        inners = ((e[3][1], e[4][2], e[0]) for e in extents() if e[3] is not None and e[4] is not None)
+        return _within(spill, outers, inners)
+    if calculation == "inside":
+        # an instant x with a time position between a beginning and an end of y
+        outers = ((e[3][2], e[4][1], e[0]) for e in extents() if e[3] is not None and e[4] is not None)
+        inners = ((e[2][0], e[2][3], e[0]) for e in extents() if e[2] is not None)
+        return ((x, y) for y, x in _within(spill, outers, inners))
+    if calculation == "starts":
+        # a shared beginning, and the end of x before the end of y
+        records = ((_hull(e[3]), _hull(e[4])[1], _hull(e[4])[0], e[0]) for e in extents() if _proper(e))
+        return _sharing(spill, records)
+    if calculation == "finishes":
+        # a shared end, and the beginning of x after the beginning of y
+        records = ((_hull(e[4]), -_hull(e[3])[0], -_hull(e[3])[1], e[0]) for e in extents() if _proper(e))
+        return _sharing(spill, records)
+    raise ValueError(f"Unknown calculation {calculation!r}")
+
+
+@contextmanager
+def _extents_saved(triples: Iterable[Triple], spill: _Spill) -> Iterator[str]:
+    """The path of a run of the extents of the temporal entities of triples"""
+    resolved = _resolved(spill.sorted(_scanned(triples), key=_by_node))
+    path = spill.saved(_extents(spill.sorted(resolved, key=_by_entity)))
+    try:
+        yield path
+    finally:
+        os.remove(path)
+
+
+def _by_node(record: tuple) -> Tuple[str, int]:
+    return record[0], record[1]
+
+
+def _by_entity(record: tuple) -> str:
+    return record[0]
+
+
+def materialize(
+    triples: Iterable[Triple],
+    predicates: Optional[Iterable[str]] = None,
+    max_records: int = DEFAULT_MAX_RECORDS,
+    directory: Optional[str] = None,
+) -> Iterator[Triple]:
+    """Yields a triple for each pair of temporal entities of triples, e.g. those of ntriples.read(), that a property
+    of materialize.PREDICATES given by local name, by default all of them, relates as calculated from their time
+    positions. No more than max_records records are sorted in memory at once, and runs are written to a temporary
+    directory in directory, by default the system's."""
+    predicates = list(PREDICATES) if predicates is None else list(predicates)
+    unknown = [p for p in predicates if p not in PREDICATES]
+    if unknown:
+        raise ValueError(f"Unknown properties {unknown}, expected some of {sorted(PREDICATES)}")
+
+    with tempfile.TemporaryDirectory(prefix="timefuncs-", dir=directory) as temporary:
+        spill = _Spill(temporary, max_records)
+        with _extents_saved(triples, spill) as path:
+            for local_name in predicates:
+                predicate = TIME[local_name]
+                calculation, transposed, _, _ = RELATIONS[PREDICATES[local_name]]
+                for x, y in _calculated(spill, path, calculation):
+                    a, b = (y, x) if transposed else (x, y)
+                    yield from_n3(a), predicate, from_n3(b)
@@ -17,15 +17,31 @@ Functions index
 
 """
 
-from typing import List, Union, Tuple
+from functools import partial
+from itertools import product
+from typing import Dict, FrozenSet, List, Union, Tuple
 from typing import Literal as TLiteral
 
 from rdflib import Graph, BNode, Literal, URIRef
-from rdflib.namespace import RDF, TIME
-from rdflib.paths import ZeroOrMore, OneOrMore
+from rdflib.namespace import TIME
+
+from . import cache, stats
+from .allen import ALLEN_RELATIONS, FAMILY_RELATIONS, INTERVAL_PREDICATES, allen_relations, coincides, entailed
+from .closure import FAMILIES
+from .index import TemporalIndex, get_index
+from .paths import _declared_path, _neighbours, _path_exists
+from .planner import POSITIONS, Check, plan
+from .stats import instrumented
+from .timestamps import after, before
+
+# the Allen relations (see allen.py) that isDisjoint, isIn and isNotDisjoint allow
+_DISJOINT = frozenset([TIME.intervalBefore, TIME.intervalAfter])
+_IN = frozenset([TIME.intervalStarts, TIME.intervalDuring, TIME.intervalFinishes])
+_NOT_DISJOINT = frozenset(ALLEN_RELATIONS) - _DISJOINT
 
 
 # 1
+@instrumented
 def contains(e, ctx) -> Literal:
     """SPARQL tfun:contains(a, b)
 
@@ -59,82 +75,11 @@ def contains(e, ctx) -> Literal:
             "a is tested to be inside b"
         )
 
-    g = ctx.ctx.graph
-
-    if (a, TIME.intervalContains * OneOrMore, b) in g:
-        return Literal(True)
-
-    if (b, TIME.intervalDuring * OneOrMore, a) in g:
-        return Literal(True)
-
-    for a_beginning in g.objects(a, TIME.hasBeginning):
-        for a_end in g.objects(a, TIME.hasEnd):
-            for b_beginning in g.objects(b, TIME.hasBeginning):
-                for b_end in g.objects(b, TIME.hasEnd):
-                    # declared
-                    if (a_beginning, TIME.before, b_beginning) in g and (
-                        a_end,
-                        TIME.after,
-                        b_end,
-                    ) in g:
-                        return Literal(True)
-                    if (b_beginning, TIME.after, a_beginning) in g and (
-                        a_end,
-                        TIME.after,
-                        b_end,
-                    ) in g:
-                        return Literal(True)
-                    if (b_beginning, TIME.after, a_beginning) in g and (
-                        b_end,
-                        TIME.before,
-                        a_end,
-                    ) in g:
-                        return Literal(True)
-                    if (a_beginning, TIME.before, b_beginning) in g and (
-                        b_end,
-                        TIME.before,
-                        a_end,
-                    ) in g:
-                        return Literal(True)
-
-                    # calculated
-                    for a_beginning_time in g.objects(
-                        a_beginning,
-                        TIME.inXSDDateTimeStamp | TIME.inXSDDateTime | TIME.inXSDDate,
-                    ):
-                        for a_end_time in g.objects(
-                            a_end,
-                            TIME.inXSDDateTimeStamp
-                            | TIME.inXSDDateTime
-                            | TIME.inXSDDate,
-                        ):
-                            for b_beginning_time in g.objects(
-                                b_beginning,
-                                TIME.inXSDDateTimeStamp
-                                | TIME.inXSDDateTime
-                                | TIME.inXSDDate,
-                            ):
-                                for b_end_time in g.objects(
-                                    b_end,
-                                    TIME.inXSDDateTimeStamp
-                                    | TIME.inXSDDateTime
-                                    | TIME.inXSDDate,
-                                ):
-                                    if (
-                                        b_beginning_time > a_beginning_time
-                                        and a_end_time > b_end_time
-                                    ):
-                                        return Literal(True)
-
-    if _path_exists(
-        g, a, b, [(TIME.intervalContains, "outbound"), (TIME.intervalDuring, "inbound")]
-    ):
-        return Literal(True)
-
-    return Literal(False)
+    return _planned(get_index(ctx.ctx.graph), "contains", a, b)
 
 
 # 2
+@instrumented
 def finishes(e, ctx) -> Literal:
     """SPARQL tfun:finishes(a, b)
 
@@ -167,51 +112,47 @@ def finishes(e, ctx) -> Literal:
             "a is tested to be inside b"
         )
 
-    g = ctx.ctx.graph
+    index = get_index(ctx.ctx.graph)
 
     # a must be some form of Interval
-    if (a, RDF.type, TIME.Interval) not in g and (a, RDF.type, TIME.ProperInterval) not in g:
+    if not index.is_a(a, TIME.Interval, TIME.ProperInterval):
         return Literal(False)
 
     # b must be some form of Interval
-    if (b, RDF.type, TIME.Interval) not in g and (b, RDF.type, TIME.ProperInterval) not in g:
+    if not index.is_a(b, TIME.Interval, TIME.ProperInterval):
         return Literal(False)
 
-    # direct or transitive declared relations
-    if _path_exists(
-        g, a, b, [
-                (TIME.intervalFinishes, "outbound"), (TIME.intervalFinishedBy, "inbound"),
-                (TIME.intervalEquals, "outbound"), (TIME.intervalEquals, "inbound")
-            ]
-    ):
-        return Literal(True)
-
-    # the beginning of T1 is after the beginning of T2, and the end of T1 is coincident with the end of T2
-    for o in g.objects(a, TIME.hasBeginning):
-        for a_beg in g.objects(o, TIME.inXSDDateTimeStamp):
-            for o2 in g.objects(b, TIME.hasBeginning):
-                for b_beg in g.objects(o2, TIME.inXSDDateTimeStamp):
-                    for o3 in g.objects(a, TIME.hasEnd):
-                        for a_end in g.objects(o3, TIME.inXSDDateTimeStamp):
-                            for o4 in g.objects(b, TIME.hasEnd):
-                                for b_end in g.objects(o4, TIME.inXSDDateTimeStamp):
-                                    if a_beg > b_beg and a_end == b_end and a_beg < a_end and b_beg < b_end:
-                                        return Literal(True)
-
-    return Literal(False)
+    return _planned(index, "finishes", a, b)
 
 
 # 3
+@instrumented
 def has_beginning(e, ctx) -> Literal:
     """SPARQL tfun:hasBeginning(a, b)
 
     Returns True if a is a time:TemporalEntity and b is a time:Instant and b is the same Instant as the beginning of a.
 
+    b is the same Instant if it is declared as a's time:hasBeginning or has the time position of a's beginning, see
+    allen.coincides(). An Instant is its own beginning.
+
+    tfun:hasBeginning(a, b) is equivalent to tfun:isBeginningOf(b, a)
     """
-    raise NotImplementedError()
+    try:
+        a = e.expr[0]
+        b = e.expr[1]
+    except Exception as err:
+        raise ValueError(
+            "This function, hasBeginning(a, b), requires two IRI parameters, "
+            "where a is a Time Ontology TemporalEntity and b an Instant. "
+            "b is tested to be the beginning of a"
+        )
+
+    holds = coincides(get_index(ctx.ctx.graph), b, a, TIME.hasBeginning)
+    return _decided("allen" if holds else "none", holds)
 
 
 # 4
+@instrumented
 def has_during(e, ctx) -> Literal:
     """SPARQL tfun:hasDuring(a, b)
 
@@ -220,14 +161,31 @@ def has_during(e, ctx) -> Literal:
 
 
 # 5
+@instrumented
 def has_end(e, ctx) -> Literal:
     """SPARQL tfun:hasEnd(a, b)
 
+    Returns True if a is a time:TemporalEntity and b is a time:Instant and b is the same Instant as the end of a, as
+    for has_beginning().
+
+    tfun:hasEnd(a, b) is equivalent to tfun:isEndOf(b, a)
     """
-    raise NotImplementedError()
+    try:
+        a = e.expr[0]
+        b = e.expr[1]
+    except Exception as err:
+        raise ValueError(
+            "This function, hasEnd(a, b), requires two IRI parameters, "
+            "where a is a Time Ontology TemporalEntity and b an Instant. "
+            "b is tested to be the end of a"
+        )
+
+    holds = coincides(get_index(ctx.ctx.graph), b, a, TIME.hasEnd)
+    return _decided("allen" if holds else "none", holds)
 
 
 # 6
+@instrumented
 def has_inside(e, ctx) -> Literal:
     """SPARQL tfun:hasInside(a, b)
 
@@ -261,38 +219,11 @@ def has_inside(e, ctx) -> Literal:
             "a is tested to have b inside it"
         )
 
-    g = ctx.ctx.graph
-
-    if (a, TIME.before | TIME.after, b) in g:
-        return Literal(False)
-
-    if (a, TIME.inside, b) in g:
-        return Literal(True)
-
-    for a_beginning in g.objects(a, TIME.hasBeginning * OneOrMore):
-        for a_end in g.objects(a, TIME.hasEnd * OneOrMore):
-            # declared
-            if (b, TIME.after, a_beginning) in g and (b, TIME.before, a_end) in g:
-                return Literal(True)
-
-            # calculated
-            for a_beginning_time in g.objects(
-                a_beginning,
-                TIME.inXSDDateTimeStamp | TIME.inXSDDateTime | TIME.inXSDDate,
-            ):
-                for a_end_time in g.objects(
-                    a_end, TIME.inXSDDateTimeStamp | TIME.inXSDDateTime | TIME.inXSDDate
-                ):
-                    for b_time in g.objects(
-                        b, TIME.inXSDDateTimeStamp | TIME.inXSDDateTime | TIME.inXSDDate
-                    ):
-                        if a_beginning_time < b_time < a_end_time:
-                            return Literal(True)
-
-    return Literal(False)
+    return _planned(get_index(ctx.ctx.graph), "has_inside", a, b)
 
 
 # 7
+@instrumented
 def is_after(e, ctx) -> Literal:
     """SPARQL tfun:isAfter(a, b)
 
@@ -324,45 +255,11 @@ def is_after(e, ctx) -> Literal:
             "a is tested to be before b"
         )
 
-    g = ctx.ctx.graph
-
-    if (a, TIME.hasBeginning * ZeroOrMore / TIME.after, b) in g:
-        return Literal(True)
-
-    if (b, TIME.hasEnd * ZeroOrMore / TIME.before, a) in g:
-        return Literal(True)
-
-    for z in g.objects(b, TIME.hasEnd * ZeroOrMore / TIME.before):
-        if (a, TIME.hasBeginning, z) in g:
-            return Literal(True)
-
-    for z in g.objects(a, TIME.hasBeginning * ZeroOrMore / TIME.after):
-        if (b, TIME.hasEnd, z) in g:
-            return Literal(True)
-
-    ref_xsds = list(
-        g.objects(b, TIME.hasBeginning * ZeroOrMore / TIME.inXSDDateTimeStamp)
-    )
-    x_xsds = list(g.objects(a, TIME.hasEnd * ZeroOrMore / TIME.inXSDDateTimeStamp))
-    if len(ref_xsds) > 0 and len(x_xsds) > 0:
-        if sorted(x_xsds)[0] > sorted(ref_xsds)[-1]:
-            return Literal(True)
-
-    ref_xsds = list(
-        g.objects(b, TIME.hasBeginning * ZeroOrMore / TIME.inXSDDate)
-    )
-    x_xsds = list(g.objects(a, TIME.hasEnd * ZeroOrMore / TIME.inXSDDate))
-    if len(ref_xsds) > 0 and len(x_xsds) > 0:
-        if sorted(x_xsds)[0] > sorted(ref_xsds)[-1]:
-            return Literal(True)
-
-    if _path_exists(g, a, b, [(TIME.after, "outbound"), (TIME.before, "inbound")]):
-        return Literal(True)
-
-    return Literal(False)
+    return _planned(get_index(ctx.ctx.graph), "is_after", a, b)
 
 
 # 8
+@instrumented
 def is_before(e, ctx) -> Literal:
     """SPARQL tfun:isBefore(a, b)
 
@@ -394,45 +291,11 @@ def is_before(e, ctx) -> Literal:
             "a is tested to be before b"
         )
 
-    g = ctx.ctx.graph
-
-    if (a, TIME.hasEnd * ZeroOrMore / TIME.before, b) in g:
-        return Literal(True)
-
-    if (b, TIME.hasBeginning * ZeroOrMore / TIME.after, a) in g:
-        return Literal(True)
-
-    for z in g.objects(b, TIME.hasBeginning * ZeroOrMore / TIME.after):
-        if (a, TIME.hasEnd, z) in g:
-            return Literal(True)
-
-    for z in g.objects(a, TIME.hasEnd * ZeroOrMore / TIME.before):
-        if (b, TIME.hasBeginning, z) in g:
-            return Literal(True)
-
-    ref_xsds = list(
-        g.objects(b, TIME.hasBeginning * ZeroOrMore / TIME.inXSDDateTimeStamp)
-    )
-    x_xsds = list(g.objects(a, TIME.hasEnd * ZeroOrMore / TIME.inXSDDateTimeStamp))
-    if len(ref_xsds) > 0 and len(x_xsds) > 0:
-        if sorted(x_xsds)[-1] < sorted(ref_xsds)[0]:
-            return Literal(True)
-
-    ref_xsds = list(
-        g.objects(b, TIME.hasBeginning * ZeroOrMore / TIME.inXSDDate)
-    )
-    x_xsds = list(g.objects(a, TIME.hasEnd * ZeroOrMore / TIME.inXSDDate))
-    if len(ref_xsds) > 0 and len(x_xsds) > 0:
-        if sorted(x_xsds)[-1] < sorted(ref_xsds)[0]:
-            return Literal(True)
-
-    if _path_exists(g, a, b, [(TIME.before, "outbound"), (TIME.after, "inbound")]):
-        return Literal(True)
-
-    return Literal(False)
+    return _planned(get_index(ctx.ctx.graph), "is_before", a, b)
 
 
 # 9
+@instrumented
 def is_finished_by(e, ctx) -> Literal:
     """SPARQL tfun:isFinishedBy(a, b)
 
@@ -465,49 +328,45 @@ def is_finished_by(e, ctx) -> Literal:
             "a is tested to be inside b"
         )
 
-    g = ctx.ctx.graph
+    index = get_index(ctx.ctx.graph)
 
     # a must be some form of Interval
-    if (a, RDF.type, TIME.Interval) not in g and (a, RDF.type, TIME.ProperInterval) not in g:
+    if not index.is_a(a, TIME.Interval, TIME.ProperInterval):
         return Literal(False)
 
     # b must be some form of Interval
-    if (b, RDF.type, TIME.Interval) not in g and (b, RDF.type, TIME.ProperInterval) not in g:
+    if not index.is_a(b, TIME.Interval, TIME.ProperInterval):
         return Literal(False)
 
-    # direct or transitive declared relations
-    if _path_exists(
-        g, a, b, [
-                (TIME.intervalFinishedBy, "outbound"), (TIME.intervalFinishes, "inbound"),
-                (TIME.intervalEquals, "outbound"), (TIME.intervalEquals, "inbound")
-            ]
-    ):
-        return Literal(True)
-
-    # the beginning of b is after the beginning of a, and the end of b is coincident with the end of a
-    for o in g.objects(a, TIME.hasBeginning):
-        for a_beg in g.objects(o, TIME.inXSDDateTimeStamp):
-            for o2 in g.objects(b, TIME.hasBeginning):
-                for b_beg in g.objects(o2, TIME.inXSDDateTimeStamp):
-                    for o3 in g.objects(a, TIME.hasEnd):
-                        for a_end in g.objects(o3, TIME.inXSDDateTimeStamp):
-                            for o4 in g.objects(b, TIME.hasEnd):
-                                for b_end in g.objects(o4, TIME.inXSDDateTimeStamp):
-                                    if a_beg < b_beg and a_end == b_end and a_beg < a_end and b_beg < b_end:
-                                        return Literal(True)
-
-    return Literal(False)
+    return _planned(index, "is_finished_by", a, b)
 
 
 # 10
+@instrumented
 def is_beginning_of(e, ctx) -> Literal:
     """SPARQL tfun:isBeginningOf(a, b)
 
+    Returns True if a is a time:Instant and b is a time:TemporalEntity and a is the same Instant as the beginning of b,
+    as for has_beginning().
+
+    tfun:isBeginningOf(a, b) is equivalent to tfun:hasBeginning(b, a)
     """
-    raise NotImplementedError()
+    try:
+        a = e.expr[0]
+        b = e.expr[1]
+    except Exception as err:
+        raise ValueError(
+            "This function, isBeginningOf(a, b), requires two IRI parameters, "
+            "where a is a Time Ontology Instant and b a TemporalEntity. "
+            "a is tested to be the beginning of b"
+        )
+
+    holds = coincides(get_index(ctx.ctx.graph), a, b, TIME.hasBeginning)
+    return _decided("allen" if holds else "none", holds)
 
 
 # 11
+@instrumented
 def is_contained_by(e, ctx) -> Literal:
     """SPARQL tfun:isContainedBy(a, b)
 
@@ -540,90 +399,47 @@ def is_contained_by(e, ctx) -> Literal:
             "a is tested to be inside b"
         )
 
-    g = ctx.ctx.graph
-
-    if (a, TIME.intervalDuring * OneOrMore, b) in g:
-        return Literal(True)
-
-    if (b, TIME.intervalContains * OneOrMore, a) in g:
-        return Literal(True)
-
-    for a_beginning in g.objects(a, TIME.hasBeginning):
-        for a_end in g.objects(a, TIME.hasEnd):
-            for b_beginning in g.objects(b, TIME.hasBeginning):
-                for b_end in g.objects(b, TIME.hasEnd):
-                    # declared
-                    if (a_beginning, TIME.after, b_beginning) in g and (
-                        a_end,
-                        TIME.before,
-                        b_end,
-                    ) in g:
-                        return Literal(True)
-                    if (b_beginning, TIME.before, a_beginning) in g and (
-                        a_end,
-                        TIME.before,
-                        b_end,
-                    ) in g:
-                        return Literal(True)
-                    if (b_beginning, TIME.before, a_beginning) in g and (
-                        b_end,
-                        TIME.after,
-                        a_end,
-                    ) in g:
-                        return Literal(True)
-                    if (a_beginning, TIME.after, b_beginning) in g and (
-                        b_end,
-                        TIME.after,
-                        a_end,
-                    ) in g:
-                        return Literal(True)
-
-                    # calculated
-                    for a_beginning_time in g.objects(
-                        a_beginning,
-                        TIME.inXSDDateTimeStamp | TIME.inXSDDateTime | TIME.inXSDDate,
-                    ):
-                        for a_end_time in g.objects(
-                            a_end,
-                            TIME.inXSDDateTimeStamp
-                            | TIME.inXSDDateTime
-                            | TIME.inXSDDate,
-                        ):
-                            for b_beginning_time in g.objects(
-                                b_beginning,
-                                TIME.inXSDDateTimeStamp
-                                | TIME.inXSDDateTime
-                                | TIME.inXSDDate,
-                            ):
-                                for b_end_time in g.objects(
-                                    b_end,
-                                    TIME.inXSDDateTimeStamp
-                                    | TIME.inXSDDateTime
-                                    | TIME.inXSDDate,
-                                ):
-                                    if (
-                                        b_beginning_time < a_beginning_time
-                                        and a_end_time < b_end_time
-                                    ):
-                                        return Literal(True)
-
-    if _path_exists(
-        g, a, b, [(TIME.intervalDuring, "outbound"), (TIME.intervalContains, "inbound")]
-    ):
-        return Literal(True)
-
-    return Literal(False)
+    return _planned(get_index(ctx.ctx.graph), "is_contained_by", a, b)
 
 
 # 12
+@instrumented
 def is_disjoint(e, ctx) -> Literal:
     """SPARQL tfun:isDisjoint(a, b)
 
+    From https://www.w3.org/TR/owl-time/#time:intervalDisjoint:
+    "If a proper interval T1 is intervalDisjoint another proper interval T2, then the beginning of T1 is after the end
+    of T2, or the end of T1 is before the beginning of T2, i.e. the intervals do not overlap in any way, but their
+    ordering relationship is not known."
+
+    Returns Literal(true) if a is before or after b, as determined by allen.allen_relations(), even if which of
+    the two is not known. Else returns False.
+
+    Example:
+
+    SELECT ?a ?b
+    WHERE {
+        ?a a time:ProperInterval .
+        ?b a time:ProperInterval .
+
+        FILTER tfun:isDisjoint(?a, ?b)
+    }
     """
-    raise NotImplementedError()
+    try:
+        a = e.expr[0]
+        b = e.expr[1]
+    except Exception as err:
+        raise ValueError(
+            "This function, isDisjoint(a, b), requires two IRI parameters, "
+            "where a & b are Time Ontology ProperInterval instances. "
+            "The relation from a to b is tested"
+        )
+
+    return _allen_holds(ctx, a, b, _DISJOINT)
 
 
 # 13
+@instrumented
 def is_during(e, ctx) -> Literal:
     """SPARQL tfun:isDuring(a, b)
 
@@ -632,30 +448,105 @@ def is_during(e, ctx) -> Literal:
 
 
 # 14
+@instrumented
 def is_end_of(e, ctx) -> Literal:
     """SPARQL tfun:isEndOf(a, b)
 
+    Returns True if a is a time:Instant and b is a time:TemporalEntity and a is the same Instant as the end of b, as
+    for has_beginning().
+
+    tfun:isEndOf(a, b) is equivalent to tfun:hasEnd(b, a)
     """
-    raise NotImplementedError()
+    try:
+        a = e.expr[0]
+        b = e.expr[1]
+    except Exception as err:
+        raise ValueError(
+            "This function, isEndOf(a, b), requires two IRI parameters, "
+            "where a is a Time Ontology Instant and b a TemporalEntity. "
+            "a is tested to be the end of b"
+        )
+
+    holds = coincides(get_index(ctx.ctx.graph), a, b, TIME.hasEnd)
+    return _decided("allen" if holds else "none", holds)
 
 
 # 15
+@instrumented
 def is_equals(e, ctx) -> Literal:
     """SPARQL tfun:isEquals(a, b)
 
+    From https://www.w3.org/TR/owl-time/#time:intervalEquals:
+    "If a proper interval T1 is intervalEquals another proper interval T2, then the beginning of T1 is coincident with
+    the beginning of T2, and the end of T1 is coincident with the end of T2."
+
+    Returns Literal(true) if the beginnings of a and b are coincident and their ends are coincident, as
+    determined by allen.allen_relations(). Else returns False.
+
+    Example:
+
+    SELECT ?a ?b
+    WHERE {
+        ?a a time:ProperInterval .
+        ?b a time:ProperInterval .
+
+        FILTER tfun:isEquals(?a, ?b)
+    }
+
+    tfun:isEquals(a, b) is equivalent to tfun:isEquals(b, a)
     """
-    raise NotImplementedError()
+    try:
+        a = e.expr[0]
+        b = e.expr[1]
+    except Exception as err:
+        raise ValueError(
+            "This function, isEquals(a, b), requires two IRI parameters, "
+            "where a & b are Time Ontology ProperInterval instances. "
+            "The relation from a to b is tested"
+        )
+
+    return _allen_holds(ctx, a, b, {TIME.intervalEquals})
 
 
 # 16
+@instrumented
 def is_in(e, ctx) -> Literal:
     """SPARQL tfun:isIn(a, b)
 
+    From https://www.w3.org/TR/owl-time/#time:intervalIn:
+    "If a proper interval T1 is intervalIn another proper interval T2, then the beginning of T1 is after the beginning
+    of T2 or is coincident with the beginning of T2, and the end of T1 is before the end of T2, or is coincident with
+    the end of T2, except that end of T1 may not be coincident with the end of T2 if the beginning of T1 is coincident
+    with the beginning of T2."
+
+    Returns Literal(true) if a starts, is during or finishes b, as determined by allen.allen_relations(), even
+    if which of the three is not known. Else returns False.
+
+    Example:
+
+    SELECT ?a ?b
+    WHERE {
+        ?a a time:ProperInterval .
+        ?b a time:ProperInterval .
+
+        FILTER tfun:isIn(?a, ?b)
+    }
     """
-    raise NotImplementedError()
+    try:
+        a = e.expr[0]
+        b = e.expr[1]
+    except Exception as err:
+        raise ValueError(
+            "This function, isIn(a, b), requires two IRI parameters, "
+            "where a & b are Time Ontology ProperInterval instances. "
+            "The relation from a to b is tested"
+        )
+
+    return _allen_holds(ctx, a, b, _IN)
 
 
 # 17
+@instrumented
 def is_inside(e, ctx) -> Literal:
     """SPARQL tfun:isInside(a, b)
 
@@ -689,62 +580,120 @@ def is_inside(e, ctx) -> Literal:
             "a is tested to be inside b"
         )
 
-    g = ctx.ctx.graph
-
-    if (a, TIME.before | TIME.after, b) in g:
-        return Literal(False)
-
-    if (b, TIME.inside, a) in g:
-        return Literal(True)
-
-    for b_beginning in g.objects(b, TIME.hasBeginning * OneOrMore):
-        for b_end in g.objects(b, TIME.hasEnd * OneOrMore):
-            # declared
-            if (a, TIME.after, b_beginning) in g and (a, TIME.before, b_end) in g:
-                return Literal(True)
-
-            # calculated
-            for b_beginning_time in g.objects(
-                b_beginning,
-                TIME.inXSDDateTimeStamp | TIME.inXSDDateTime | TIME.inXSDDate,
-            ):
-                for b_end_time in g.objects(
-                    b_end, TIME.inXSDDateTimeStamp | TIME.inXSDDateTime | TIME.inXSDDate
-                ):
-                    for a_time in g.objects(
-                        a, TIME.inXSDDateTimeStamp | TIME.inXSDDateTime | TIME.inXSDDate
-                    ):
-                        if b_beginning_time < a_time < b_end_time:
-                            return Literal(True)
-
-    return Literal(False)
+    return _planned(get_index(ctx.ctx.graph), "is_inside", a, b)
 
 
 # 18
+@instrumented
 def is_met_by(e, ctx) -> Literal:
     """SPARQL tfun:isMetBy(a, b)
 
+    From https://www.w3.org/TR/owl-time/#time:intervalMetBy:
+    "If a proper interval T1 is intervalMetBy another proper interval T2, then the beginning of T1 is coincident with
+    the end of T2."
+
+    Returns Literal(true) if the beginning of a is coincident with the end of b, as determined by
+    allen.allen_relations(). Else returns False.
+
+    Example:
+
+    SELECT ?a ?b
+    WHERE {
+        ?a a time:ProperInterval .
+        ?b a time:ProperInterval .
+
+        FILTER tfun:isMetBy(?a, ?b)
+    }
+
+    tfun:isMetBy(a, b) is equivalent to tfun:meets(b, a)
     """
-    raise NotImplementedError()
+    try:
+        a = e.expr[0]
+        b = e.expr[1]
+    except Exception as err:
+        raise ValueError(
+            "This function, isMetBy(a, b), requires two IRI parameters, "
+            "where a & b are Time Ontology ProperInterval instances. "
+            "The relation from a to b is tested"
+        )
+
+    return _allen_holds(ctx, a, b, {TIME.intervalMetBy})
 
 
 # 19
+@instrumented
 def is_not_disjoint(e, ctx) -> Literal:
     """SPARQL tfun:isNotDisjoint(a, b)
 
+    From https://www.w3.org/TR/owl-time/#time:intervalDisjoint:
+    "If a proper interval T1 is intervalDisjoint another proper interval T2, then the beginning of T1 is after the end
+    of T2, or the end of T1 is before the beginning of T2, i.e. the intervals do not overlap in any way, but their
+    ordering relationship is not known."
+
+    Returns Literal(true) if a and b share some part of the time line, i.e. a is related to b by one of the
+    Allen relations other than before and after, as determined by allen.allen_relations(). Else returns False.
+
+    Example:
+
+    SELECT ?a ?b
+    WHERE {
+        ?a a time:ProperInterval .
+        ?b a time:ProperInterval .
+
+        FILTER tfun:isNotDisjoint(?a, ?b)
+    }
     """
-    raise NotImplementedError()
+    try:
+        a = e.expr[0]
+        b = e.expr[1]
+    except Exception as err:
+        raise ValueError(
+            "This function, isNotDisjoint(a, b), requires two IRI parameters, "
+            "where a & b are Time Ontology ProperInterval instances. "
+            "The relation from a to b is tested"
+        )
+
+    return _allen_holds(ctx, a, b, _NOT_DISJOINT)
 
 
 # 20
+@instrumented
 def is_overlapped_by(e, ctx) -> Literal:
     """SPARQL tfun:isOverlappedBy(a, b)
 
+    From https://www.w3.org/TR/owl-time/#time:intervalOverlappedBy:
+    "If a proper interval T1 is intervalOverlappedBy another proper interval T2, then the beginning of T1 is after the
+    beginning of T2, the beginning of T1 is before the end of T2, and the end of T1 is after the end of T2."
+
+    Returns Literal(true) if b overlaps a, as determined by allen.allen_relations(). Else returns False.
+
+    Example:
+
+    SELECT ?a ?b
+    WHERE {
+        ?a a time:ProperInterval .
+        ?b a time:ProperInterval .
+
+        FILTER tfun:isOverlappedBy(?a, ?b)
+    }
+
+    tfun:isOverlappedBy(a, b) is equivalent to tfun:overlaps(b, a)
     """
-    raise NotImplementedError()
+    try:
+        a = e.expr[0]
+        b = e.expr[1]
+    except Exception as err:
+        raise ValueError(
+            "This function, isOverlappedBy(a, b), requires two IRI parameters, "
+            "where a & b are Time Ontology ProperInterval instances. "
+            "The relation from a to b is tested"
+        )
+
+    return _allen_holds(ctx, a, b, {TIME.intervalOverlappedBy})
 
 
 # 21
+@instrumented
 def is_started_by(e, ctx) -> Literal:
     """SPARQL tfun:isStartedBy(a, b)
 
@@ -777,57 +726,95 @@ def is_started_by(e, ctx) -> Literal:
             "a is tested to be inside b"
         )
 
-    g = ctx.ctx.graph
+    index = get_index(ctx.ctx.graph)
 
     # a must be some form of Interval
-    if (a, RDF.type, TIME.Interval) not in g and (a, RDF.type, TIME.ProperInterval) not in g:
+    if not index.is_a(a, TIME.Interval, TIME.ProperInterval):
         return Literal(False)
 
     # b must be some form of Interval
-    if (b, RDF.type, TIME.Interval) not in g and (b, RDF.type, TIME.ProperInterval) not in g:
+    if not index.is_a(b, TIME.Interval, TIME.ProperInterval):
         return Literal(False)
 
-    # direct or transitive declared relations
-    if _path_exists(
-        g, a, b, [
-                (TIME.intervalStartedBy, "outbound"), (TIME.intervalStarts, "inbound"),
-                (TIME.intervalEquals, "outbound"), (TIME.intervalEquals, "inbound")
-            ]
-    ):
-        return Literal(True)
-
-    # the beginning of a is coincident with the beginning of b, and the end of a is before the end of b
-    for o in g.objects(a, TIME.hasBeginning):
-        for a_beg in g.objects(o, TIME.inXSDDateTimeStamp):
-            for o2 in g.objects(b, TIME.hasBeginning):
-                for b_beg in g.objects(o2, TIME.inXSDDateTimeStamp):
-                    for o3 in g.objects(a, TIME.hasEnd):
-                        for a_end in g.objects(o3, TIME.inXSDDateTimeStamp):
-                            for o4 in g.objects(b, TIME.hasEnd):
-                                for b_end in g.objects(o4, TIME.inXSDDateTimeStamp):
-                                    if a_beg == b_beg and a_end < b_end and a_beg < a_end and b_beg < b_end:
-                                        return Literal(True)
-
-    return Literal(False)
+    return _planned(index, "is_started_by", a, b)
 
 
 # 22
+@instrumented
 def meets(e, ctx) -> Literal:
     """SPARQL tfun:meets(a, b)
 
+    From https://www.w3.org/TR/owl-time/#time:intervalMeets:
+    "If a proper interval T1 is intervalMeets another proper interval T2, then the end of T1 is coincident with the
+    beginning of T2."
+
+    Returns Literal(true) if the end of a is coincident with the beginning of b, as determined by
+    allen.allen_relations(). Else returns False.
+
+    Example:
+
+    SELECT ?a ?b
+    WHERE {
+        ?a a time:ProperInterval .
+        ?b a time:ProperInterval .
+
+        FILTER tfun:meets(?a, ?b)
+    }
+
+    tfun:meets(a, b) is equivalent to tfun:isMetBy(b, a)
     """
-    raise NotImplementedError()
+    try:
+        a = e.expr[0]
+        b = e.expr[1]
+    except Exception as err:
+        raise ValueError(
+            "This function, meets(a, b), requires two IRI parameters, "
+            "where a & b are Time Ontology ProperInterval instances. "
+            "The relation from a to b is tested"
+        )
+
+    return _allen_holds(ctx, a, b, {TIME.intervalMeets})
 
 
 # 23
+@instrumented
 def overlaps(e, ctx) -> Literal:
     """SPARQL tfun:overlaps(a, b)
 
+    From https://www.w3.org/TR/owl-time/#time:intervalOverlaps:
+    "If a proper interval T1 is intervalOverlaps another proper interval T2, then the beginning of T1 is before the
+    beginning of T2, the end of T1 is after the beginning of T2, and the end of T1 is before the end of T2."
+
+    Returns Literal(true) if a begins before b, and ends after b begins but before b ends, as determined by
+    allen.allen_relations(). Else returns False.
+
+    Example:
+
+    SELECT ?a ?b
+    WHERE {
+        ?a a time:ProperInterval .
+        ?b a time:ProperInterval .
+
+        FILTER tfun:overlaps(?a, ?b)
+    }
+
+    tfun:overlaps(a, b) is equivalent to tfun:isOverlappedBy(b, a)
     """
-    raise NotImplementedError()
+    try:
+        a = e.expr[0]
+        b = e.expr[1]
+    except Exception as err:
+        raise ValueError(
+            "This function, overlaps(a, b), requires two IRI parameters, "
+            "where a & b are Time Ontology ProperInterval instances. "
+            "The relation from a to b is tested"
+        )
+
+    return _allen_holds(ctx, a, b, {TIME.intervalOverlaps})
 
 
 # 24
+@instrumented
 def starts(e, ctx) -> Literal:
     """SPARQL tfun:starts(a, b)
 
@@ -860,85 +847,250 @@ def starts(e, ctx) -> Literal:
             "a is tested to be inside b"
         )
 
-    g = ctx.ctx.graph
+    index = get_index(ctx.ctx.graph)
 
     # a must be some form of Interval
-    if (a, RDF.type, TIME.Interval) not in g and (a, RDF.type, TIME.ProperInterval) not in g:
+    if not index.is_a(a, TIME.Interval, TIME.ProperInterval):
         return Literal(False)
 
     # b must be some form of Interval
-    if (b, RDF.type, TIME.Interval) not in g and (b, RDF.type, TIME.ProperInterval) not in g:
+    if not index.is_a(b, TIME.Interval, TIME.ProperInterval):
         return Literal(False)
 
-    # direct or transitive declared relations
-    if _path_exists(
-        g, a, b, [
-                (TIME.intervalStarts, "outbound"), (TIME.intervalStartedBy, "inbound"),
-                (TIME.intervalEquals, "outbound"), (TIME.intervalEquals, "inbound")
-            ]
-    ):
-        return Literal(True)
-
-    # the beginning of a is coincident with the beginning of b, and the end of a is before the end of b
-    for o in g.objects(a, TIME.hasBeginning):
-        for a_beg in g.objects(o, TIME.inXSDDateTimeStamp):
-            for o2 in g.objects(b, TIME.hasBeginning):
-                for b_beg in g.objects(o2, TIME.inXSDDateTimeStamp):
-                    for o3 in g.objects(a, TIME.hasEnd):
-                        for a_end in g.objects(o3, TIME.inXSDDateTimeStamp):
-                            for o4 in g.objects(b, TIME.hasEnd):
-                                for b_end in g.objects(o4, TIME.inXSDDateTimeStamp):
-                                    if a_beg == b_beg and a_end < b_end and a_beg < a_end and b_beg < b_end:
-                                        return Literal(True)
+    return _planned(index, "starts", a, b)
+
+
+def _contains_declared(index: TemporalIndex, a: Union[URIRef, BNode], b: Union[URIRef, BNode]) -> bool:
+    """b is declared during a, or a to contain b, directly or by a property path"""
+    return b in index.closure(a, TIME.intervalContains, include_self=False) or a in index.closure(
+        b, TIME.intervalDuring, include_self=False
+    )
+
 
+def _contains_endpoints_declared(index: TemporalIndex, a: Union[URIRef, BNode], b: Union[URIRef, BNode]) -> bool:
+    """a's beginning is declared before b's and b's end before a's"""
+    return any(
+        index.declared_before(a_beginning, b_beginning)
+        for a_beginning, b_beginning in product(
+            index.objects(a, TIME.hasBeginning), index.objects(b, TIME.hasBeginning)
+        )
+    ) and any(
+        index.declared_before(b_end, a_end)
+        for a_end, b_end in product(index.objects(a, TIME.hasEnd), index.objects(b, TIME.hasEnd))
+    )
+
+
+def _contains_calculated(index: TemporalIndex, a: Union[URIRef, BNode], b: Union[URIRef, BNode]) -> bool:
+    """a's beginning has a time position before b's and b's end one before a's"""
+    return any(
+        before(a_beginning_time, b_beginning_time)
+        for a_beginning_time, b_beginning_time in product(
+            index.endpoint_spans(a, TIME.hasBeginning), index.endpoint_spans(b, TIME.hasBeginning)
+        )
+    ) and any(
+        before(b_end_time, a_end_time)
+        for a_end_time, b_end_time in product(
+            index.endpoint_spans(a, TIME.hasEnd), index.endpoint_spans(b, TIME.hasEnd)
+        )
+    )
+
+
+def _finishes_calculated(index: TemporalIndex, a: Union[URIRef, BNode], b: Union[URIRef, BNode]) -> bool:
+    """the beginning of a is after the beginning of b, and the end of a is coincident with the end of b"""
+    return any(
+        after(a_beg, b_beg) and a_end == b_end and before(a_beg, a_end) and before(b_beg, b_end)
+        for a_beg, b_beg, a_end, b_end in _endpoint_stamps(index, a, b)
+    )
+
+
+def _starts_calculated(index: TemporalIndex, a: Union[URIRef, BNode], b: Union[URIRef, BNode]) -> bool:
+    """the beginning of a is coincident with the beginning of b, and the end of a is before the end of b"""
+    return any(
+        a_beg == b_beg and before(a_end, b_end) and before(a_beg, a_end) and before(b_beg, b_end)
+        for a_beg, b_beg, a_end, b_end in _endpoint_stamps(index, a, b)
+    )
+
+
+def _has_inside_excluded(index: TemporalIndex, a: Union[URIRef, BNode], b: Union[URIRef, BNode]) -> bool:
+    """a is declared before or after b, so cannot have it inside"""
+    return index.has(a, TIME.before, b) or index.has(a, TIME.after, b)
+
+
+def _has_inside_declared(index: TemporalIndex, a: Union[URIRef, BNode], b: Union[URIRef, BNode]) -> bool:
+    return index.has(a, TIME.inside, b)
+
+
+def _has_inside_endpoints_declared(index: TemporalIndex, a: Union[URIRef, BNode], b: Union[URIRef, BNode]) -> bool:
+    """b is declared after a's beginning and before a's end"""
+    return any(
+        index.has(b, TIME.after, a_beginning) for a_beginning in index.closure(a, TIME.hasBeginning, False)
+    ) and any(index.has(b, TIME.before, a_end) for a_end in index.closure(a, TIME.hasEnd, False))
+
+
+def _has_inside_calculated(index: TemporalIndex, a: Union[URIRef, BNode], b: Union[URIRef, BNode]) -> bool:
+    """b has a time position between those of a's beginning and end"""
+    a_beginning_times = index.endpoint_spans(a, TIME.hasBeginning, "one_or_more")
+    a_end_times = index.endpoint_spans(a, TIME.hasEnd, "one_or_more")
+    return any(
+        any(before(a_beginning_time, b_time) for a_beginning_time in a_beginning_times)
+        and any(before(b_time, a_end_time) for a_end_time in a_end_times)
+        for b_time in index.spans(b)
+    )
+
+
+def _is_before_declared(index: TemporalIndex, a: Union[URIRef, BNode], b: Union[URIRef, BNode]) -> bool:
+    """a, or its end, is declared before b or b's beginning"""
+    if b in index.path_objects(a, TIME.hasEnd, TIME.before):
+        return True
+
+    if a in index.path_objects(b, TIME.hasBeginning, TIME.after):
+        return True
+
+    for z in index.path_objects(b, TIME.hasBeginning, TIME.after):
+        if index.has(a, TIME.hasEnd, z):
+            return True
+
+    for z in index.path_objects(a, TIME.hasEnd, TIME.before):
+        if index.has(b, TIME.hasBeginning, z):
+            return True
+
+    return False
+
+
+def _is_before_calculated(index: TemporalIndex, a: Union[URIRef, BNode], b: Union[URIRef, BNode]) -> bool:
+    ref_xsds = index.endpoint_spans(b, TIME.hasBeginning, "zero_or_more")
+    x_xsds = index.endpoint_spans(a, TIME.hasEnd, "zero_or_more")
+    return len(ref_xsds) > 0 and len(x_xsds) > 0 and max(span[1] for span in x_xsds) < min(span[0] for span in ref_xsds)
+
+
+def _is_inside_excluded(index: TemporalIndex, a: Union[URIRef, BNode], b: Union[URIRef, BNode]) -> bool:
+    """a is declared before or after b, so cannot be inside it"""
+    return index.has(a, TIME.before, b) or index.has(a, TIME.after, b)
+
+
+def _path(family: str, transposed: bool = False) -> Check:
+    """The check for a chain of the family's declared relations, see closure.FAMILIES"""
+    return "path", True, family, (tuple(p for p, _ in FAMILIES[family]),), transposed
+
+
+# the family's Allen relation entailed by those declared between intervals, see allen.network()
+_ENTAILED = {family: partial(entailed, family=family) for family in FAMILY_RELATIONS}
+
+
+def _network(family: str, transposed: bool = False) -> Check:
+    """The check for the family's Allen relation being entailed by the network of declared Allen relations"""
+    return "network", True, _ENTAILED[family], (INTERVAL_PREDICATES,), transposed
+
+
+_BEFORE_OR_AFTER = (TIME.before, TIME.after)
+_ENDPOINTS = ((TIME.hasBeginning,), (TIME.hasEnd,))
+
+_CONTAINS: Tuple[Check, ...] = (
+    ("declared", True, _contains_declared, ((TIME.intervalContains, TIME.intervalDuring),), False),
+    ("declared", True, _contains_endpoints_declared, _ENDPOINTS + (_BEFORE_OR_AFTER,), False),
+    ("calculated", True, _contains_calculated, _ENDPOINTS + (POSITIONS,), False),
+    _path("contains"),
+    _network("contains"),
+)
+_FINISHES: Tuple[Check, ...] = (
+    _path("finishes"),
+    ("calculated", True, _finishes_calculated, _ENDPOINTS + (POSITIONS,), False),
+    _network("finishes"),
+)
+_HAS_INSIDE: Tuple[Check, ...] = (
+    ("declared", False, _has_inside_excluded, (_BEFORE_OR_AFTER,), False),
+    ("declared", True, _has_inside_declared, ((TIME.inside,),), False),
+    ("declared", True, _has_inside_endpoints_declared, _ENDPOINTS + ((TIME.after,), (TIME.before,)), False),
+    ("calculated", True, _has_inside_calculated, _ENDPOINTS + (POSITIONS,), False),
+)
+_IS_BEFORE: Tuple[Check, ...] = (
+    ("declared", True, _is_before_declared, (_BEFORE_OR_AFTER,), False),
+    ("calculated", True, _is_before_calculated, (POSITIONS,), False),
+    _path("before"),
+    _network("before"),
+)
+_STARTS: Tuple[Check, ...] = (
+    _path("starts"),
+    ("calculated", True, _starts_calculated, _ENDPOINTS + (POSITIONS,), False),
+    _network("starts"),
+)
+
+
+def _transposed(checks: Tuple[Check, ...]) -> Tuple[Check, ...]:
+    return tuple(check[:4] + (not check[4],) for check in checks)
+
+
+# the checks each function makes, see planner.py
+_CHECKS: Dict[str, Tuple[Check, ...]] = {
+    "contains": _CONTAINS,
+    "finishes": _FINISHES,
+    "has_inside": _HAS_INSIDE,
+    "is_after": _transposed(_IS_BEFORE),
+    "is_before": _IS_BEFORE,
+    "is_contained_by": _transposed(_CONTAINS),
+    "is_finished_by": _transposed(_FINISHES),
+    "is_inside": (("declared", False, _is_inside_excluded, (_BEFORE_OR_AFTER,), False),) + _transposed(_HAS_INSIDE[1:]),
+    "is_started_by": _transposed(_STARTS),
+    "starts": _STARTS,
+}
+
+
+# the functions whose checks are those of another function with a and b swapped, with that function
+_INVERSES: Dict[str, str] = {
+    function: inverse
+    for function, checks in _CHECKS.items()
+    for inverse, inverse_checks in _CHECKS.items()
+    if checks == _transposed(inverse_checks)
+}
+
+
+def _planned(index: TemporalIndex, function: str, a: Union[URIRef, BNode], b: Union[URIRef, BNode]) -> Literal:
+    """The answer of a function's checks that could hold in the graph, made cheapest first, see planner.py, or its
+    cached answer, see cache.py"""
+    if cache.enabled:
+        cached = cache.get(index, function, a, b)
+        if cached is not None:
+            return _decided("cache", cached)
+
+    for rule, answer, check, _, transposed in plan(index, function, _CHECKS[function]):
+        x, y = (b, a) if transposed else (a, b)
+        if rule == "path":
+            holds = _declared_path(index, x, y, check)
+        elif rule == "calculated":
+            # on the axis of XSD and converted positions, or on that of another reference system, see index.py
+            holds = check(index, x, y) or any(check(index.on_axis(trs), x, y) for trs in index.axes())
+        else:
+            holds = check(index, x, y)
+        if holds:
+            if cache.enabled:
+                cache.put(index, function, a, b, answer, _INVERSES.get(function))
+            return _decided(rule, answer)
+    if cache.enabled:
+        cache.put(index, function, a, b, False, _INVERSES.get(function))
     return Literal(False)
 
 
-def _path_exists(
-    g: Graph,
-    a: Union[URIRef, BNode],
-    b: Union[URIRef, BNode],
-    predicates: List[Tuple[URIRef, TLiteral["outbound", "inbound"]]],
-) -> bool:
-    """Finds if any path between RDF nodes a and b in graph g exists,
-    following any of the predicates supplied, in any order.
-
-    This function is a support function for the named TIME functions such as is_before."""
-
-    if a == b:
-        return False
-
-    def _get_next_nodes(node, preds):
-        """Finds any nodes linked to a given node, 'node' via any of the given predicates 'pred'.
-
-        Looks for both s pred o and o pred s (inverse)"""
-        next_nodes = []
-
-        for p in preds:
-            if p[1] == "outbound":
-                for o in g.objects(subject=node, predicate=p[0]):
-                    next_nodes.append(o)
-            elif p[1] == "inbound":
-                for s in g.subjects(predicate=p[0], object=node):
-                    next_nodes.append(s)
-
-        return next_nodes
-
-    # standard breadth-first search
-    def bfs(node):
-        visited = []
-        queue = []
-        visited.append(node)
-        queue.append(node)
-
-        while queue:
-            s = queue.pop(0)
-            for x in _get_next_nodes(s, predicates):
-                if x == b:
-                    return True
-                if x not in visited:
-                    visited.append(x)
-                    queue.append(x)
-        return False
-
-    return bfs(a)
+def _allen_holds(ctx, a: Union[URIRef, BNode], b: Union[URIRef, BNode], allowed: FrozenSet[URIRef]) -> Literal:
+    """Literal(true) if the data determines that the Allen relation from a to b is one of those allowed, i.e. some
+    relation remains possible and all that do are allowed"""
+    possible = allen_relations(get_index(ctx.ctx.graph), a, b)
+    holds = bool(possible) and possible <= allowed
+    return _decided("allen" if holds else "none", holds)
+
+
+def _decided(rule: str, value: bool = True) -> Literal:
+    """The answer of a function, recording the rule that decided it (see stats.py) if instrumentation is enabled"""
+    if stats.enabled:
+        stats.decided(rule)
+    return Literal(value)
+
+
+def _endpoint_stamps(index: TemporalIndex, a: Union[URIRef, BNode], b: Union[URIRef, BNode]):
+    """Yields every combination of the time position spans (see timestamps.py) of the beginnings and ends of a and
+    b, as (a_beginning, b_beginning, a_end, b_end) tuples"""
+    return product(
+        index.endpoint_spans(a, TIME.hasBeginning),
+        index.endpoint_spans(b, TIME.hasBeginning),
+        index.endpoint_spans(a, TIME.hasEnd),
+        index.endpoint_spans(b, TIME.hasEnd),
+    )
@@ -0,0 +1,867 @@
+"""
+A graph-wide temporal index.
+
+The functions in funcs.py are called once per solution row by rdflib's SPARQL engine, so under a FILTER over a cross
+product the same entity's beginning, end and time position triples would otherwise be looked up again and again. A
+TemporalIndex scans the graph once for the Time Ontology in OWL predicates that the functions use and keeps them in
+plain dictionaries. Resolved endpoints (e.g. the time positions of an entity's beginning) are memoised on first use.
+
+The index for a graph is obtained with get_index(g). Indexes are shared by all Graph objects over the same store and
+graph identifier. Triples added to or removed from the store are noted as they happen and applied to the index the next
+time it is asked for, so an index is only rebuilt from scratch after very large or wildcard changes. Stores that do not
+dispatch rdflib's TripleAddedEvent must call invalidate(g) after adding data. The indexes of a store are built and
+brought up to date by one thread at a time.
+
+Transitive closures of declared relations (see closure.py) may be maintained alongside an index by calling
+enable_closures(g).
+
+Time positions are compared on a shared axis of microseconds since the Unix epoch, see timestamps.py. Numeric positions
+in a temporal reference system that timestamps.TRS has no conversion for cannot be placed on it, so each such system
+has an axis of its own, on which its positions are compared only with each other: on_axis(trs) is a view of the index
+whose spans are those on the system's axis.
+
+In a store that keeps graphs apart, such as a Dataset's, each named graph has its own index and a change only touches
+the index of the graph it is made in. The index of a ConjunctiveGraph, or of a Dataset with default_union set, is a
+UnionIndex: a view composed of the indexes of the store's graphs, which answers lookups from them through a directory
+of the graphs each node appears in rather than from a copy of their content. A change to one graph brings only that
+graph's part of the view up to date. A Dataset without default_union shares the index of its default graph.
+"""
+
+import copy
+import threading
+import weakref
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from typing import Literal as TLiteral
+
+from rdflib import BNode, ConjunctiveGraph, Graph, Literal, URIRef
+from rdflib.namespace import RDF, TIME
+from rdflib.store import StoreCreatedEvent, TripleAddedEvent, TripleRemovedEvent
+from rdflib.term import Identifier
+
+from .closure import FAMILIES, TransitiveClosure
+from .intervals import IntervalIndex
+from .timestamps import TRS, Span, to_span
+
+Node = Union[URIRef, BNode]
+
+# the predicates relating temporal entities to one another
+RELATION_PREDICATES = (
+    TIME.hasBeginning,
+    TIME.hasEnd,
+    TIME.before,
+    TIME.after,
+    TIME.inside,
+    TIME.intervalAfter,
+    TIME.intervalBefore,
+    TIME.intervalContains,
+    TIME.intervalDisjoint,
+    TIME.intervalDuring,
+    TIME.intervalEquals,
+    TIME.intervalFinishedBy,
+    TIME.intervalFinishes,
+    TIME.intervalIn,
+    TIME.intervalMeets,
+    TIME.intervalMetBy,
+    TIME.intervalOverlappedBy,
+    TIME.intervalOverlaps,
+    TIME.intervalStartedBy,
+    TIME.intervalStarts,
+)
+
+# the predicates giving an instant's position as an XSD literal
+POSITION_PREDICATES = (
+    TIME.inXSDDateTimeStamp,
+    TIME.inXSDDateTime,
+    TIME.inXSDDate,
+    TIME.inXSDgYearMonth,
+    TIME.inXSDgYear,
+)
+
+# the predicates giving an instant's position as a number in a temporal reference system: the instant's
+# time:inTimePosition is a node with a time:hasTRS and a time:numericPosition, converted by timestamps.TRS
+TIME_POSITION_PREDICATES = (
+    TIME.inTimePosition,
+    TIME.hasTRS,
+)
+
+# the classes that functions test membership of
+TYPE_CLASSES = (
+    TIME.TemporalEntity,
+    TIME.Instant,
+    TIME.Interval,
+    TIME.ProperInterval,
+)
+
+_NODE_PREDICATES = RELATION_PREDICATES + TIME_POSITION_PREDICATES
+_LITERAL_PREDICATES = POSITION_PREDICATES + (TIME.numericPosition,)
+_WATCHED = frozenset(_NODE_PREDICATES + _LITERAL_PREDICATES + (RDF.type,))
+
+# beyond this many noted changes, rebuilding an index is cheaper than applying them one by one
+_MAX_PENDING = 10000
+
+_EMPTY: FrozenSet = frozenset()
+
+
+class TemporalIndex:
+    """The Time Ontology in OWL content of a graph, held in dictionaries.
+
+    Relations are kept in both directions so that both g.objects() and g.subjects() style lookups are single dictionary
+    accesses. The objects() and subjects() methods use the same keyword arguments as rdflib's Graph so that an index
+    may stand in for a graph in the support functions."""
+
+    # the temporal reference system whose axis the spans of this index are on, if it is a view made by on_axis()
+    axis: Optional[URIRef] = None
+
+    def __init__(self, g: Optional[Graph], version: int = 0, closures: Iterable[str] = ()):
+        """Indexes graph g, or makes an empty index to be filled by _insert() if g is None"""
+        self.version = version
+        self.stale = False
+        self.pending: List[Tuple[Node, URIRef, Node]] = []
+        self._outbound: Dict[URIRef, Dict[Node, Set[Node]]] = {p: {} for p in _NODE_PREDICATES}
+        self._inbound: Dict[URIRef, Dict[Node, Set[Node]]] = {p: {} for p in _NODE_PREDICATES}
+        self._positions: Dict[URIRef, Dict[Node, List[Literal]]] = {p: {} for p in _LITERAL_PREDICATES}
+        self._types: Dict[URIRef, Set[Node]] = {c: set() for c in TYPE_CLASSES}
+        self._resolved: Dict[tuple, tuple] = {}
+        self.closures: Dict[str, TransitiveClosure] = {}
+        # a memory-mapped resolution of this index saved by an earlier process, see sidecar.py
+        self.sidecar = None
+        if g is not None:
+            self._build(g)
+        self.enable_closures(closures)
+
+    def _build(self, g: Graph):
+        for p in _NODE_PREDICATES:
+            outbound = self._outbound[p]
+            inbound = self._inbound[p]
+            for s, o in g.subject_objects(p):
+                outbound.setdefault(s, set()).add(o)
+                inbound.setdefault(o, set()).add(s)
+
+        for p in _LITERAL_PREDICATES:
+            positions = self._positions[p]
+            for s, o in g.subject_objects(p):
+                if isinstance(o, Literal):
+                    positions.setdefault(s, []).append(o)
+
+        for c in TYPE_CLASSES:
+            self._types[c].update(g.subjects(RDF.type, c))
+
+    def _insert(self, s: Node, p: URIRef, o: Node):
+        """Adds a triple of one of the watched predicates while the index is being built"""
+        if p in self._outbound:
+            self._outbound[p].setdefault(s, set()).add(o)
+            self._inbound[p].setdefault(o, set()).add(s)
+        elif p in self._positions:
+            if isinstance(o, Literal):
+                self._positions[p].setdefault(s, []).append(o)
+        elif p == RDF.type and o in self._types:
+            self._types[o].add(s)
+
+    def enable_closures(self, families: Iterable[str]):
+        """Builds the transitive closures of the named relation families (keys of closure.FAMILIES)"""
+        for family in families:
+            if family not in self.closures:
+                self.closures[family] = self.build_closure(family)
+
+    def build_closure(self, family: str) -> TransitiveClosure:
+        """The transitive closure of the named relation family, without maintaining it"""
+        closure = TransitiveClosure(FAMILIES[family])
+        closure.build(self._relation_triples(closure.predicates))
+        return closure
+
+    def _relation_triples(self, predicates: Iterable[URIRef]) -> Iterator[Tuple[Node, URIRef, Node]]:
+        for p in predicates:
+            for s, objects in self._outbound[p].items():
+                for o in objects:
+                    yield s, p, o
+
+    def reaches(self, a: Node, b: Node, family: str) -> Optional[bool]:
+        """True if a chain of the relations in the named family leads from a to b, False if not, or None if no closure
+        is maintained for that family"""
+        closure = self.closures.get(family)
+        if closure is None:
+            return None
+        return closure.reaches(a, b)
+
+    def note(self, triple: Tuple[Optional[Node], Optional[URIRef], Optional[Node]]):
+        """Records that a triple, or the triples matching a pattern, may have been added or removed, to be applied by
+        sync(). Patterns are matched against the index's own content."""
+        if self.stale:
+            return
+        s, p, o = triple
+        if p is not None and p not in _WATCHED:
+            return
+        if p == RDF.type and o is not None and o not in self._types:
+            return
+        if s is None and p is None and o is None:
+            self.stale = True
+        elif s is None or p is None or o is None:
+            self.pending.extend(self._matching(s, p, o))
+        else:
+            self.pending.append(triple)
+        if self.stale or len(self.pending) > _MAX_PENDING:
+            self.stale = True
+            self.pending = []
+
+    def _matching(self, s: Optional[Node], p: Optional[URIRef], o: Optional[Node]):
+        """Yields the indexed triples matching a pattern, in which None matches anything"""
+        for predicate in _WATCHED if p is None else (p,):
+            if predicate == RDF.type:
+                for c, members in self._types.items():
+                    if o is None or o == c:
+                        for member in members if s is None else members & {s}:
+                            yield member, predicate, c
+            elif predicate in self._positions:
+                positions = self._positions[predicate]
+                for subject in positions if s is None else positions.keys() & {s}:
+                    for literal in positions[subject]:
+                        if o is None or o == literal:
+                            yield subject, predicate, literal
+            elif s is not None:
+                for x in self.objects(s, predicate):
+                    if o is None or o == x:
+                        yield s, predicate, x
+            elif o is not None:
+                for x in self.subjects(predicate, o):
+                    yield x, predicate, o
+            else:
+                for subject, objects in self._outbound[predicate].items():
+                    for x in objects:
+                        yield subject, predicate, x
+
+    def sync(self, g: Graph, version: int) -> List[Tuple[bool, Node, URIRef, Node]]:
+        """Applies the changes recorded by note(), checking each noted triple against g as it now is. Returns the
+        relation triples added (True) or removed (False)."""
+        changed = False
+        relations = []
+        # triples noted while syncing are left for the next sync; until this one ends, pending is not empty, so other
+        # threads wait for it in get_index()
+        noted = len(self.pending)
+        for s, p, o in dict.fromkeys(self.pending[:noted]):
+            present = (s, p, o) in g
+            if p == RDF.type:
+                members = self._types[o]
+                if present != (s in members):
+                    if present:
+                        members.add(s)
+                    else:
+                        members.discard(s)
+                    changed = True
+            elif p in self._positions:
+                if not isinstance(o, Literal):
+                    continue
+                literals = self._positions[p].setdefault(s, [])
+                if present and o not in literals:
+                    literals.append(o)
+                    changed = True
+                elif not present and o in literals:
+                    literals.remove(o)
+                    changed = True
+                if not literals:
+                    del self._positions[p][s]
+            elif present != self.has(s, p, o):
+                if present:
+                    self._outbound[p].setdefault(s, set()).add(o)
+                    self._inbound[p].setdefault(o, set()).add(s)
+                else:
+                    for nodes, key, value in ((self._outbound[p], s, o), (self._inbound[p], o, s)):
+                        nodes[key].discard(value)
+                        if not nodes[key]:
+                            del nodes[key]
+                relations.append((present, s, p, o))
+                self._update_closures(present, s, p, o)
+                changed = True
+        if changed:
+            self._resolved.clear()
+        self.version = version
+        del self.pending[:noted]
+        return relations
+
+    def _update_closures(self, present: bool, s: Node, p: URIRef, o: Node):
+        for closure in self.closures.values():
+            if p in closure.predicates:
+                if present:
+                    closure.add(s, p, o)
+                else:
+                    closure.remove(s, p, o)
+
+    def objects(self, subject: Node, predicate: URIRef) -> FrozenSet[Node]:
+        """The objects of all (subject, predicate, ?o) triples"""
+        return self._outbound[predicate].get(subject, _EMPTY)
+
+    def subjects(self, predicate: URIRef, object: Node) -> FrozenSet[Node]:
+        """The subjects of all (?s, predicate, object) triples"""
+        return self._inbound[predicate].get(object, _EMPTY)
+
+    def has(self, subject: Node, predicate: URIRef, object: Node) -> bool:
+        """True if the triple (subject, predicate, object) is in the graph"""
+        return object in self._outbound[predicate].get(subject, _EMPTY)
+
+    def count(self, predicate: URIRef) -> int:
+        """The number of subjects that have at least one value for predicate"""
+        if predicate in self._outbound:
+            return len(self._outbound[predicate])
+        return len(self._positions[predicate])
+
+    def is_a(self, node: Node, *classes: URIRef) -> bool:
+        """True if node is declared to be an instance of any of the given classes"""
+        return any(node in self._types[c] for c in classes)
+
+    def instances(self, *classes: URIRef) -> Set[Node]:
+        """All nodes declared to be instances of any of the given classes"""
+        nodes = set()
+        for c in classes:
+            nodes.update(self._types[c])
+        return nodes
+
+    def closure(self, node: Node, predicate: URIRef, include_self: bool = True) -> Tuple[Node, ...]:
+        """The nodes reachable from node by following predicate, i.e. the objects of the property path predicate* (or
+        predicate+ if include_self is False)."""
+        key = ("closure", node, predicate, include_self)
+        try:
+            return self._resolved[key]
+        except KeyError:
+            pass
+
+        outbound = self._outbound[predicate]
+        seen = {node} if include_self else set()
+        stack = [node]
+        while stack:
+            for o in outbound.get(stack.pop(), _EMPTY):
+                if o not in seen:
+                    seen.add(o)
+                    stack.append(o)
+        nodes = tuple(seen)
+        self._resolved[key] = nodes
+        return nodes
+
+    def path_objects(self, node: Node, step: URIRef, predicate: URIRef) -> Set[Node]:
+        """The objects of the property path step*/predicate from node"""
+        key = ("path", node, step, predicate)
+        try:
+            return self._resolved[key]
+        except KeyError:
+            pass
+
+        outbound = self._outbound[predicate]
+        nodes = set()
+        for n in self.closure(node, step):
+            nodes.update(outbound.get(n, _EMPTY))
+        nodes = frozenset(nodes)
+        self._resolved[key] = nodes
+        return nodes
+
+    def positions(self, node: Node, predicates: Iterable[URIRef] = POSITION_PREDICATES) -> List[Literal]:
+        """The XSD time position literals given for node by any of the given predicates"""
+        literals = []
+        for p in predicates:
+            literals.extend(self._positions[p].get(node, ()))
+        return literals
+
+    def endpoint_positions(
+        self,
+        entity: Node,
+        step: URIRef,
+        predicates: Iterable[URIRef] = POSITION_PREDICATES,
+        mode: TLiteral["direct", "zero_or_more", "one_or_more"] = "direct",
+    ) -> Tuple[Literal, ...]:
+        """The time position literals of an entity's beginning (step is time:hasBeginning) or end (time:hasEnd).
+
+        The mode selects which nodes are considered to be the endpoint: 'direct' for the objects of step,
+        'zero_or_more' for step* (which includes the entity itself) and 'one_or_more' for step+."""
+        predicates = tuple(predicates)
+        key = ("endpoint", entity, step, predicates, mode)
+        try:
+            return self._resolved[key]
+        except KeyError:
+            pass
+
+        if mode == "direct":
+            nodes = self.objects(entity, step)
+        else:
+            nodes = self.closure(entity, step, include_self=mode == "zero_or_more")
+        literals = []
+        for n in nodes:
+            literals.extend(self.positions(n, predicates))
+        literals = tuple(literals)
+        self._resolved[key] = literals
+        return literals
+
+    def spans(self, node: Node) -> Tuple[Span, ...]:
+        """The (earliest, latest) microseconds since the Unix epoch denoted by each of node's time positions, see
+        timestamps.py. Positions that cannot be converted are left out."""
+        key = ("spans", node)
+        try:
+            return self._resolved[key]
+        except KeyError:
+            pass
+
+        if self.axis is not None:
+            spans = self._axis_spans(node)
+        elif self.sidecar is not None:
+            spans = self.sidecar.spans(node)
+        else:
+            spans = tuple(span for span in map(to_span, self.positions(node)) if span is not None)
+            if node in self._outbound[TIME.inTimePosition]:
+                spans += self._numeric_spans(node)
+        self._resolved[key] = spans
+        return spans
+
+    def _numeric_spans(self, node: Node) -> Tuple[Span, ...]:
+        """The spans of node's numeric positions in the temporal reference systems of timestamps.TRS"""
+        spans = []
+        for position in self._outbound[TIME.inTimePosition][node]:
+            for trs in self._outbound[TIME.hasTRS].get(position, _EMPTY):
+                convert = TRS.get(trs)
+                if convert is not None:
+                    for literal in self._positions[TIME.numericPosition].get(position, ()):
+                        span = convert(literal)
+                        if span is not None:
+                            spans.append(span)
+        return tuple(spans)
+
+    def axes(self) -> FrozenSet[URIRef]:
+        """The temporal reference systems without a conversion in timestamps.TRS that numeric positions are given in"""
+        try:
+            return self._resolved[("axes",)]
+        except KeyError:
+            pass
+
+        numeric = self._positions[TIME.numericPosition]
+        axes = self._resolved[("axes",)] = frozenset(
+            trs
+            for _, positions in self._outbound[TIME.inTimePosition].items()
+            for position in positions
+            if position in numeric
+            for trs in self._outbound[TIME.hasTRS].get(position, _EMPTY)
+            if trs not in TRS
+        )
+        return axes
+
+    def on_axis(self, trs: URIRef) -> "TemporalIndex":
+        """A view of this index whose spans, and those of endpoints, are those of the numeric positions in trs, one of
+        axes(). Each such position is the span of a single instant, numbered by its rank among the system's distinct
+        values, so positions in the system compare as their values do. Nodes without one have no spans."""
+        key = ("axis", trs)
+        try:
+            return self._resolved[key]
+        except KeyError:
+            pass
+
+        view = copy.copy(self)
+        view._resolved = {}
+        view.sidecar = None
+        view.axis = trs
+        self._resolved[key] = view
+        return view
+
+    def _axis_positions(self, node: Node) -> Iterator[Decimal]:
+        """The values of node's numeric positions in the reference system of this view's axis"""
+        for position in self._outbound[TIME.inTimePosition].get(node, _EMPTY):
+            if self.axis in self._outbound[TIME.hasTRS].get(position, _EMPTY):
+                for literal in self._positions[TIME.numericPosition].get(position, ()):
+                    try:
+                        value = Decimal(str(literal).strip())
+                    except InvalidOperation:
+                        continue
+                    if value.is_finite():
+                        yield value
+
+    def _axis_spans(self, node: Node) -> Tuple[Span, ...]:
+        try:
+            ranks = self._resolved[("ranks",)]
+        except KeyError:
+            values = {value for n in self.positioned() for value in self._axis_positions(n)}
+            ranks = self._resolved[("ranks",)] = {value: rank for rank, value in enumerate(sorted(values))}
+        return tuple((ranks[value], ranks[value]) for value in self._axis_positions(node))
+
+    def positioned(self) -> Set[Node]:
+        """The nodes with time positions of their own, as XSD literals or numeric positions, or on the axis of a view
+        made by on_axis() the nodes with numeric positions in its reference system"""
+        if self.axis is not None:
+            return {
+                node
+                for node in self._outbound[TIME.inTimePosition].keys()
+                if next(self._axis_positions(node), None) is not None
+            }
+        return set().union(
+            *(self._positions[p].keys() for p in POSITION_PREDICATES), self._outbound[TIME.inTimePosition].keys()
+        )
+
+    def endpoint_spans(
+        self,
+        entity: Node,
+        step: URIRef,
+        mode: TLiteral["direct", "zero_or_more", "one_or_more"] = "direct",
+    ) -> Tuple[Span, ...]:
+        """The spans of the time positions of an entity's beginning or end, selected as for endpoint_positions()"""
+        key = ("endpoint_spans", entity, step, mode)
+        try:
+            return self._resolved[key]
+        except KeyError:
+            pass
+
+        if self.sidecar is not None:
+            spans = self.sidecar.endpoint_spans(entity, step, mode)
+        else:
+            if mode == "direct":
+                nodes = self.objects(entity, step)
+            else:
+                nodes = self.closure(entity, step, include_self=mode == "zero_or_more")
+            spans = tuple(span for n in nodes for span in self.spans(n))
+        self._resolved[key] = spans
+        return spans
+
+    def interval_index(self) -> IntervalIndex:
+        """An IntervalIndex of the entities whose beginning and end both have time positions.
+
+        Each entity's extent runs from the earliest time its beginning may be to the latest time its end may be, in
+        microseconds since the Unix epoch."""
+        try:
+            return self._resolved[("intervals",)]
+        except KeyError:
+            pass
+
+        extents = []
+        for entity in self._outbound[TIME.hasBeginning].keys() & self._outbound[TIME.hasEnd].keys():
+            beginnings = self.endpoint_spans(entity, TIME.hasBeginning)
+            ends = self.endpoint_spans(entity, TIME.hasEnd)
+            if beginnings and ends:
+                extents.append((min(span[0] for span in beginnings), max(span[1] for span in ends), entity))
+        intervals = self._resolved[("intervals",)] = IntervalIndex(extents)
+        return intervals
+
+    def instant_index(self) -> IntervalIndex:
+        """An IntervalIndex of the entities that have time positions themselves, i.e. instants"""
+        try:
+            return self._resolved[("instants",)]
+        except KeyError:
+            pass
+
+        extents = []
+        for entity in self.positioned():
+            spans = self.spans(entity)
+            if spans:
+                extents.append((min(span[0] for span in spans), max(span[1] for span in spans), entity))
+        instants = self._resolved[("instants",)] = IntervalIndex(extents)
+        return instants
+
+    def declared_before(self, x: Node, y: Node) -> bool:
+        """True if x is directly declared to be before y, by either x time:before y or y time:after x"""
+        return self.has(x, TIME.before, y) or self.has(y, TIME.after, x)
+
+
+class _UnionMap:
+    """A read-only view of the union of a dictionary (or set) held by the index of each of several graphs, e.g. of
+    each one's _outbound[time:before], with a directory of the graphs in which each key appears. The values of a key
+    found in more than one graph are merged."""
+
+    def __init__(self, merge: Callable[[list], object] = frozenset().union):
+        self._merge = merge
+        self._mappings: Dict[Identifier, Union[dict, set]] = {}
+        self._where: Dict[Node, Set[Identifier]] = {}
+
+    def add(self, graph: Identifier, mapping: Union[dict, set]):
+        """Adds, or replaces, the mapping of a graph"""
+        self._mappings[graph] = mapping
+        for key in mapping:
+            self._where.setdefault(key, set()).add(graph)
+
+    def _graphs(self, key) -> List[Identifier]:
+        return [graph for graph in self._where.get(key, ()) if key in self._mappings[graph]]
+
+    def get(self, key, default=None):
+        values = [self._mappings[graph][key] for graph in self._graphs(key)]
+        if not values:
+            return default
+        return values[0] if len(values) == 1 else self._merge(*values)
+
+    def __getitem__(self, key):
+        values = self.get(key)
+        if values is None:
+            raise KeyError(key)
+        return values
+
+    def __contains__(self, key) -> bool:
+        return any(key in self._mappings[graph] for graph in self._where.get(key, ()))
+
+    def keys(self) -> Set:
+        return {key for key in self._where if key in self}
+
+    def items(self) -> Iterator[tuple]:
+        for key in self.keys():
+            yield key, self[key]
+
+    def __iter__(self) -> Iterator:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+
+def _concatenated(*lists: list) -> list:
+    return [x for values in lists for x in values]
+
+
+class UnionIndex(TemporalIndex):
+    """The union of the indexes of the graphs of a store, for a ConjunctiveGraph or a Dataset with default_union set.
+
+    The dictionaries of a TemporalIndex are replaced by views of those of each graph's index, so the methods of
+    TemporalIndex answer for the union. Changes are noted by graph, and sync() brings only the changed graphs' part of
+    the view up to date. The closures count each graph's relation triples, so they are updated with the changes each
+    graph's index applies, see synced()."""
+
+    def __init__(self, g: ConjunctiveGraph, version: int = 0, closures: Iterable[str] = ()):
+        self.version = version
+        self.stale = False
+        # the identifiers of the graphs changed since the view was last brought up to date
+        self.pending: Set[Identifier] = set()
+        self._outbound = {p: _UnionMap() for p in _NODE_PREDICATES}
+        self._inbound = {p: _UnionMap() for p in _NODE_PREDICATES}
+        self._positions = {p: _UnionMap(_concatenated) for p in _LITERAL_PREDICATES}
+        self._types = {c: _UnionMap() for c in TYPE_CLASSES}
+        self._resolved = {}
+        self.closures = {}
+        self.sidecar = None
+        self.graphs: Dict[Identifier, TemporalIndex] = {}
+        for context in g.contexts():
+            self._add(context.identifier, get_index(context))
+        self.enable_closures(closures)
+
+    def _add(self, graph: Identifier, index: TemporalIndex):
+        self.graphs[graph] = index
+        for views, mappings in (
+            (self._outbound, index._outbound),
+            (self._inbound, index._inbound),
+            (self._positions, index._positions),
+            (self._types, index._types),
+        ):
+            for key, view in views.items():
+                view.add(graph, mappings[key])
+
+    def note(self, triple: Tuple[Optional[Node], Optional[URIRef], Optional[Node]], graph: Optional[Identifier] = None):
+        """Records that a triple may have been added to or removed from a graph, or from any graph if graph is None"""
+        if graph is None:
+            self.stale = True
+        else:
+            self.pending.add(graph)
+
+    def _relation_triples(self, predicates: Iterable[URIRef]) -> Iterator[Tuple[Node, URIRef, Node]]:
+        for index in self.graphs.values():
+            yield from index._relation_triples(predicates)
+
+    def synced(self, graph: Identifier, index: TemporalIndex, relations: List[Tuple[bool, Node, URIRef, Node]]):
+        """Updates the closures for the relation triples that the sync() of a graph's index added or removed"""
+        if self.graphs.get(graph) is index:
+            for present, s, p, o in relations:
+                self._update_closures(present, s, p, o)
+
+    def sync(self, g: Graph, version: int) -> List[Tuple[bool, Node, URIRef, Node]]:
+        """Brings the part of the view of each changed graph up to date with the graph's own index"""
+        noted = set(self.pending)
+        rebuilt = False
+        for graph in noted:
+            index = get_index(Graph(store=g.store, identifier=graph))
+            # the closures have been given the changes of an index brought up to date, but not those of a new one
+            rebuilt = rebuilt or self.graphs.get(graph) is not index
+            self._add(graph, index)
+        self._resolved.clear()
+        if rebuilt:
+            self.closures = {family: self.build_closure(family) for family in self.closures}
+        self.version = version
+        self.pending -= noted
+        return []
+
+
+class _RemoveNotifier:
+    """Stands in for a store's remove() method, noting the removed triple pattern for the store's indexes first, while
+    the store has any index.
+
+    rdflib's stores dispatch a TripleAddedEvent for every triple added but most do not dispatch TripleRemovedEvent."""
+
+    def __init__(self, store, state: "_StoreIndexes"):
+        self.remove = store.remove
+        # the remove() set on the store itself, if another wrapper already stood in for the store's own
+        self.replaced = vars(store).get("remove")
+        self.state = state
+
+    def restore(self, store):
+        """Gives the store back the remove() it had, unless another wrapper has since stood in for this one"""
+        if vars(store).get("remove") is not self:
+            return
+        if self.replaced is None:
+            del store.remove
+        else:
+            store.remove = self.replaced
+
+    def __call__(self, triple, context=None, *args, **kwargs):
+        self.state.changed(triple, context)
+        return self.remove(triple, context, *args, **kwargs)
+
+    def __reduce__(self):
+        # a pickled store gets its own remove() back and is given a new notifier when next indexed
+        return getattr, (self.remove.__self__, "remove")
+
+
+class _StoreIndexes:
+    """The indexes built over one store, with a version number that is incremented whenever the store changes"""
+
+    def __init__(self, store):
+        self.version = 0
+        # held while indexes are built or brought up to date, so that one thread at a time does so
+        self.lock = threading.RLock()
+        # the index of each graph, by identifier, and the union indexes over all of them
+        self.indexes: Dict[Identifier, TemporalIndex] = {}
+        self.unions: Dict[Identifier, UnionIndex] = {}
+        self.closures: Dict[tuple, Set[str]] = {}
+        # a change is only noted for the index of the graph it is made in if the store keeps graphs apart
+        self.context_aware = store.context_aware
+        # once a Dispatcher has any subscriber it raises on events it has no handlers for, so subscribe to all of them
+        for event in (TripleAddedEvent, TripleRemovedEvent, StoreCreatedEvent):
+            store.dispatcher.subscribe(event, self._dispatched)
+        self.notifier: Optional[_RemoveNotifier] = None
+
+    def __getstate__(self):
+        # pickled with a store whose dispatcher holds _dispatched()
+        state = self.__dict__.copy()
+        del state["lock"]
+        # the store is pickled with its own remove() and is watched again when next indexed
+        state["notifier"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
+    def _dispatched(self, event):
+        self.changed(getattr(event, "triple", (None, None, None)), getattr(event, "context", None))
+
+    def changed(self, triple, context=None):
+        self.version += 1
+        graph = getattr(context, "identifier", context) if self.context_aware else None
+        if graph is None:
+            for index in self.indexes.values():
+                index.note(triple)
+        else:
+            index = self.indexes.get(graph)
+            if index is not None:
+                index.note(triple)
+        for union in self.unions.values():
+            union.note(triple, graph)
+
+    def watch(self, store):
+        """Notes the triples removed from the store from now on, see _RemoveNotifier"""
+        if self.notifier is None or vars(store).get("remove") is not self.notifier:
+            self.notifier = store.remove = _RemoveNotifier(store, self)
+
+    def unwatch(self, store):
+        """Stops noting the triples removed from the store, once it has no index left to note them for"""
+        if self.notifier is not None and not self.indexes and not self.unions:
+            self.notifier.restore(store)
+            self.notifier = None
+
+    def get(self, key: tuple) -> Optional[TemporalIndex]:
+        """The index of a key of _graph_key(), if built"""
+        union, identifier = key
+        return (self.unions if union else self.indexes).get(identifier)
+
+
+_stores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _indexed(g: Graph) -> Graph:
+    """The graph whose index is that of g: a Dataset's triples are those of its default graph unless default_union is
+    set"""
+    if isinstance(g, ConjunctiveGraph) and not g.default_union:
+        return g.default_context
+    return g
+
+
+def _graph_key(g: Graph) -> tuple:
+    g = _indexed(g)
+    return isinstance(g, ConjunctiveGraph), g.identifier
+
+
+def _store_indexes(g: Graph) -> _StoreIndexes:
+    try:
+        return _stores[g.store]
+    except KeyError:
+        state = _stores[g.store] = _StoreIndexes(g.store)
+        return state
+
+
+def _build_graph_indexes(store, state: _StoreIndexes, graphs: Set[Identifier]):
+    """Builds the indexes of the given graphs of a store that keeps graphs apart, and of every other graph of the store
+    without one, in one pass over the store's temporal triples. Stores such as rdflib's Memory find the triples of one
+    graph by filtering those of all graphs, so building each graph's index separately would read the whole store once
+    per graph."""
+    graphs = set(graphs)
+    graphs.update(context.identifier for context in store.contexts() if context.identifier not in state.indexes)
+    indexes = {graph: TemporalIndex(None, state.version) for graph in graphs}
+    for p in _WATCHED:
+        for classes in (None,) if p != RDF.type else TYPE_CLASSES:
+            for (s, _, o), contexts in store.triples((None, p, classes), None):
+                for context in contexts:
+                    index = indexes.get(getattr(context, "identifier", context))
+                    if index is not None:
+                        index._insert(s, p, o)
+    for graph, index in indexes.items():
+        index.enable_closures(state.closures.get((False, graph), ()))
+        state.indexes[graph] = index
+
+
+def get_index(g: Graph) -> TemporalIndex:
+    """Returns the TemporalIndex for graph g, building it if there is none and bringing it up to date if g has changed
+    since it was last asked for"""
+    g = _indexed(g)
+    state = _store_indexes(g)
+    key = _graph_key(g)
+    index = state.get(key)
+    if index is not None and not index.stale and not index.pending:
+        return index
+
+    union, identifier = key
+    with state.lock:
+        index = state.get(key)
+        # an index with a sidecar attached is rebuilt, without it, rather than brought up to date
+        if index is None or index.stale or (index.pending and index.sidecar is not None):
+            state.watch(g.store)
+            if union:
+                index = state.unions[identifier] = UnionIndex(g, state.version, state.closures.get(key, ()))
+            elif index is None and state.context_aware:
+                _build_graph_indexes(g.store, state, {identifier})
+                index = state.indexes[identifier]
+            else:
+                index = state.indexes[identifier] = TemporalIndex(g, state.version, state.closures.get(key, ()))
+        elif index.pending:
+            relations = index.sync(g, state.version)
+            if not union:
+                for union_index in state.unions.values():
+                    union_index.synced(identifier, index, relations)
+        return index
+
+
+def enable_closures(g: Graph, families: Iterable[str] = tuple(FAMILIES)):
+    """Maintains transitive closures of the named relation families (by default all of closure.FAMILIES) for graph g,
+    so that the functions answer questions about chains of declared relations with a lookup rather than a search"""
+    families = set(families)
+    unknown = families - FAMILIES.keys()
+    if unknown:
+        raise ValueError(f"Unknown relation families {sorted(unknown)}, expected some of {sorted(FAMILIES)}")
+    state = _store_indexes(g)
+    state.closures.setdefault(_graph_key(g), set()).update(families)
+    get_index(g).enable_closures(families)
+
+
+def invalidate(g: Graph):
+    """Discards any TemporalIndex built for graph g so that the next get_index(g) rebuilds it.
+
+    Only needed for stores that do not dispatch rdflib's TripleAddedEvent. Once a store has no index left, its own
+    remove() method is restored."""
+    state = _stores.get(g.store)
+    if state is not None:
+        union, identifier = _graph_key(g)
+        with state.lock:
+            (state.unions if union else state.indexes).pop(identifier, None)
+            state.unwatch(g.store)
@@ -0,0 +1,104 @@
+"""
+An index of temporal extents supporting stabbing, overlap and containment queries.
+
+Every query asked of an IntervalIndex reduces to "all extents with start <= x and end >= y" (or the mirror image,
+"start >= x and end <= y"), a three-sided range query that a priority search tree answers in O(log n + k) time for k
+results. The trees are static: an IntervalIndex is built once from a list of (start, end, entity) extents, e.g. by
+TemporalIndex.interval_index(), and rebuilt with it.
+
+Starts and ends may be any mutually comparable values: rdflib Literals, datetimes or numbers.
+"""
+
+import operator
+from typing import Any, Callable, Hashable, Iterable, List, Optional, Set, Tuple
+
+Extent = Tuple[Any, Any, Hashable]
+
+
+class _Node:
+    __slots__ = ("extent", "split", "left", "right")
+
+    def __init__(self, extent: Extent, split: Any, left: Optional["_Node"], right: Optional["_Node"]):
+        self.extent = extent
+        self.split = split
+        self.left = left
+        self.right = right
+
+
+class _PrioritySearchTree:
+    """A static priority search tree over extents, answering "start <= x and end >= y" queries.
+
+    With mirror=True the orderings are reversed and it answers "start >= x and end <= y" instead."""
+
+    def __init__(self, extents: List[Extent], mirror: bool = False):
+        self._before: Callable[[Any, Any], bool] = operator.gt if mirror else operator.lt
+        self._mirror = mirror
+        self.root = self._build(sorted(extents, key=lambda e: e[0], reverse=mirror))
+
+    def _build(self, extents: List[Extent]) -> Optional[_Node]:
+        if not extents:
+            return None
+        # the extent reaching furthest (latest end, or earliest when mirrored) is kept at this node
+        reach = min if self._mirror else max
+        top = reach(range(len(extents)), key=lambda i: extents[i][1])
+        extent = extents[top]
+        rest = extents[:top] + extents[top + 1 :]
+        if not rest:
+            return _Node(extent, None, None, None)
+        middle = len(rest) // 2
+        return _Node(extent, rest[middle][0], self._build(rest[:middle]), self._build(rest[middle:]))
+
+    def query(self, x: Any, y: Any, strict: bool = False) -> List[Extent]:
+        before = self._before
+
+        def within_start(start):
+            return before(start, x) if strict else not before(x, start)
+
+        def within_end(end):
+            return before(y, end) if strict else not before(end, y)
+
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            # every extent below this node reaches no further than this one
+            if not within_end(node.extent[1]):
+                continue
+            if within_start(node.extent[0]):
+                found.append(node.extent)
+            if node.left is not None:
+                stack.append(node.left)
+            # extents in the right subtree start at or after the split
+            if node.right is not None and within_start(node.split):
+                stack.append(node.right)
+        return found
+
+
+class IntervalIndex:
+    """Extents of temporal entities, queryable by instant or interval.
+
+    All queries are inclusive of shared endpoints unless strict=True, in which case they must be strictly inside."""
+
+    def __init__(self, extents: Iterable[Extent]):
+        self.extents = [(start, end, entity) for start, end, entity in extents]
+        self._reaching = _PrioritySearchTree(self.extents)
+        self._within = _PrioritySearchTree(self.extents, mirror=True)
+
+    def __len__(self):
+        return len(self.extents)
+
+    def stabbing(self, instant: Any, strict: bool = False) -> Set[Hashable]:
+        """The entities whose extents contain the given instant"""
+        return {e[2] for e in self._reaching.query(instant, instant, strict)}
+
+    def overlapping(self, start: Any, end: Any, strict: bool = False) -> Set[Hashable]:
+        """The entities whose extents share any part of the interval from start to end"""
+        return {e[2] for e in self._reaching.query(end, start, strict)}
+
+    def containing(self, start: Any, end: Any, strict: bool = False) -> Set[Hashable]:
+        """The entities whose extents contain the whole of the interval from start to end"""
+        return {e[2] for e in self._reaching.query(start, end, strict)}
+
+    def within(self, start: Any, end: Any, strict: bool = False) -> Set[Hashable]:
+        """The entities whose extents are contained by the interval from start to end"""
+        return {e[2] for e in self._within.query(start, end, strict)}
@@ -0,0 +1,274 @@
+"""
+Temporal joins for SPARQL queries.
+
+The usual way to use the functions is a FILTER over two otherwise unrelated patterns, e.g.
+
+    ?a a time:Interval .
+    ?b a time:Instant .
+
+    FILTER tfun:isInside(?b, ?a)
+
+which rdflib evaluates by enumerating every combination of ?a and ?b and calling the function for each. evaluate() is
+an rdflib custom evaluation hook (see rdflib.plugins.sparql.CUSTOM_EVALS) that recognises such a FILTER and evaluates
+it as a join instead: the two patterns are evaluated separately, the pairs of their solutions that could be related are
+found with sorted keys, hash tables and interval indexes over the entities' time positions, plus by following their
+declared relations, and the function is then called only for those pairs. Results are those of calling the function
+for every combination.
+
+The hook is registered along with the functions, see timefuncs/__init__.py. Any other query part is left to rdflib.
+"""
+
+from bisect import bisect_right
+from itertools import product
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from rdflib import BNode, Variable
+from rdflib.namespace import TIME
+from rdflib.plugins.sparql.algebra import BGP
+from rdflib.plugins.sparql.evaluate import evalPart
+from rdflib.plugins.sparql.evalutils import _ebv
+from rdflib.plugins.sparql.operators import _CUSTOM_FUNCTIONS
+from rdflib.plugins.sparql.parserutils import CompValue
+from rdflib.plugins.sparql.sparql import FrozenBindings, QueryContext
+
+from . import funcs
+from .index import Node, TemporalIndex, get_index
+from .intervals import IntervalIndex
+from .relations import RELATIONS, chained, declared_from, declared_to
+from .timestamps import Span
+
+Pairs = Iterator[Tuple[Node, Node]]
+
+
+def _sorted_by(keys: Iterable[Tuple[int, Node]]) -> Tuple[List[int], List[Node]]:
+    keyed = sorted(keys, key=lambda k: k[0])
+    return [k for k, _ in keyed], [n for _, n in keyed]
+
+
+def _before_pairs(index: TemporalIndex, xs: Set[Node], ys: Set[Node]) -> Pairs:
+    """Pairs with the latest end of x before the earliest beginning of y, as compared by is_before()"""
+    keys, nodes = _sorted_by(
+        (min(span[0] for span in spans), y)
+        for y in ys
+        for spans in [index.endpoint_spans(y, TIME.hasBeginning, "zero_or_more")]
+        if spans
+    )
+    for x in xs:
+        ends = index.endpoint_spans(x, TIME.hasEnd, "zero_or_more")
+        if ends:
+            for y in nodes[bisect_right(keys, max(span[1] for span in ends)) :]:
+                yield x, y
+
+
+def _contains_pairs(index: TemporalIndex, xs: Set[Node], ys: Set[Node]) -> Pairs:
+    """Pairs with a beginning of x before a beginning of y and an end of y before an end of x, as compared by
+    contains()"""
+    extents = []
+    for y in ys:
+        beginnings = index.endpoint_spans(y, TIME.hasBeginning)
+        ends = index.endpoint_spans(y, TIME.hasEnd)
+        if beginnings and ends:
+            extents.append((max(span[0] for span in beginnings), min(span[1] for span in ends), y))
+    intervals = IntervalIndex(extents)
+    for x in xs:
+        beginnings = index.endpoint_spans(x, TIME.hasBeginning)
+        ends = index.endpoint_spans(x, TIME.hasEnd)
+        if beginnings and ends:
+            earliest_start = min(span[1] for span in beginnings)
+            latest_end = max(span[0] for span in ends)
+            for y in intervals.within(earliest_start, latest_end, strict=True):
+                yield x, y
+
+
+def _endpoint_pairs(index: TemporalIndex, xs: Set[Node], ys: Set[Node], step) -> Pairs:
+    """Pairs sharing the time position of an endpoint, the beginning or end as given by step"""
+    table: Dict[Span, Set[Node]] = {}
+    for y in ys:
+        for span in index.endpoint_spans(y, step):
+            table.setdefault(span, set()).add(y)
+    for x in xs:
+        found = set()
+        for span in index.endpoint_spans(x, step):
+            found.update(table.get(span, ()))
+        for y in found:
+            yield x, y
+
+
+def _starts_pairs(index: TemporalIndex, xs: Set[Node], ys: Set[Node]) -> Pairs:
+    """Pairs sharing the time position of their beginnings, which starts() requires"""
+    return _endpoint_pairs(index, xs, ys, TIME.hasBeginning)
+
+
+def _finishes_pairs(index: TemporalIndex, xs: Set[Node], ys: Set[Node]) -> Pairs:
+    """Pairs sharing the time position of their ends, which finishes() requires"""
+    return _endpoint_pairs(index, xs, ys, TIME.hasEnd)
+
+
+def _inside_pairs(index: TemporalIndex, xs: Set[Node], ys: Set[Node]) -> Pairs:
+    """Pairs of an instant x with a time position between a beginning and an end of y, as compared by is_inside()"""
+    extents = []
+    for y in ys:
+        beginnings = index.endpoint_spans(y, TIME.hasBeginning, "one_or_more")
+        ends = index.endpoint_spans(y, TIME.hasEnd, "one_or_more")
+        if beginnings and ends:
+            extents.append((min(span[1] for span in beginnings), max(span[0] for span in ends), y))
+    intervals = IntervalIndex(extents)
+    for x in xs:
+        found = set()
+        for span in index.spans(x):
+            found.update(intervals.containing(span[0], span[1], strict=True))
+        for y in found:
+            yield x, y
+
+
+_CALCULATED: Dict[str, Callable[[TemporalIndex, Set[Node], Set[Node]], Pairs]] = {
+    "before": _before_pairs,
+    "contains": _contains_pairs,
+    "finishes": _finishes_pairs,
+    "inside": _inside_pairs,
+    "starts": _starts_pairs,
+}
+
+
+def candidate_blocks(
+    index: TemporalIndex, function: str, xs: Iterable[Node], ys: Set[Node], block_size: Optional[int] = None
+) -> Iterator[Set[Tuple[Node, Node]]]:
+    """The candidate pairs of candidate_pairs(), for a block of block_size xs (by default all of them) at a time, in
+    the order of xs, so that no more than one block's pairs are held at once"""
+    calculation, calculated_transposed, family, declared_transposed = RELATIONS[function]
+    calculate = _CALCULATED[calculation]
+
+    xs = list(dict.fromkeys(xs))
+    # declarations followed back from each y, found once for all blocks
+    x_set = set(xs)
+    sources: Dict[Node, Set[Node]] = {}
+    for y in ys:
+        if declared_transposed:
+            found = declared_from(index, family, y)
+        else:
+            found = declared_to(index, family, y)
+        for x in found & x_set:
+            sources.setdefault(x, set()).add(y)
+
+    block_size = block_size or len(xs) or 1
+    for start in range(0, len(xs), block_size):
+        block = set(xs[start : start + block_size])
+        pairs = set()
+        # compared on each axis of time positions, see index.py
+        for axis in [index] + [index.on_axis(trs) for trs in index.axes()]:
+            if calculated_transposed:
+                pairs.update((x, y) for y, x in calculate(axis, ys, block))
+            else:
+                pairs.update(calculate(axis, block, ys))
+
+        # declarations followed out from each x
+        for x in block:
+            if declared_transposed:
+                targets = declared_to(index, family, x)
+            else:
+                targets = declared_from(index, family, x)
+            targets |= chained(index, family, x, reverse=declared_transposed)
+            pairs.update((x, y) for y in targets & ys)
+            pairs.update((x, y) for y in sources.get(x, ()))
+        yield pairs
+
+
+def candidate_pairs(index: TemporalIndex, function: str, xs: Set[Node], ys: Set[Node]) -> Set[Tuple[Node, Node]]:
+    """Pairs (x, y) from xs and ys for which the named function of funcs.py may be true. All pairs for which it is true
+    are included, with some for which it is not."""
+    pairs = set()
+    for block in candidate_blocks(index, function, xs, ys):
+        pairs |= block
+    return pairs
+
+
+def _is_variable(term) -> bool:
+    return isinstance(term, (Variable, BNode))
+
+
+def _joinable_call(expr) -> Tuple[Optional[CompValue], List]:
+    """Finds a call of a joinable function with two different variables as its arguments among the conjuncts of a
+    FILTER expression. Returns the call and the other conjuncts."""
+    if getattr(expr, "name", None) == "ConditionalAndExpression":
+        conjuncts = [expr.expr] + list(expr.other or [])
+    else:
+        conjuncts = [expr]
+
+    for i, conjunct in enumerate(conjuncts):
+        if getattr(conjunct, "name", None) != "Function" or len(conjunct.expr or ()) != 2:
+            continue
+        a, b = conjunct.expr
+        if not (isinstance(a, Variable) and isinstance(b, Variable)) or a == b:
+            continue
+        func, _ = _CUSTOM_FUNCTIONS.get(conjunct.iri, (None, None))
+        name = getattr(func, "__name__", None)
+        if name in RELATIONS and getattr(funcs, name) is func:
+            return conjunct, conjuncts[:i] + conjuncts[i + 1 :]
+    return None, conjuncts
+
+
+def _split(triples, a: Variable, b: Variable):
+    """Splits triple patterns into the group connected to a by shared variables, that connected to b, and the rest, or
+    returns None if a and b are connected"""
+    groups: List[Tuple[set, list]] = []
+    for triple in triples:
+        terms = {term for term in triple if _is_variable(term)}
+        joined = [group for group in groups if group[0] & terms]
+        merged = (terms, [triple])
+        for group in joined:
+            merged[0].update(group[0])
+            merged[1].extend(group[1])
+            groups.remove(group)
+        groups.append(merged)
+
+    a_group = next((group for group in groups if a in group[0]), None)
+    b_group = next((group for group in groups if b in group[0]), None)
+    if a_group is None or b_group is None or a_group is b_group:
+        return None
+    rest = [triple for group in groups if group is not a_group and group is not b_group for triple in group[1]]
+    return a_group[1], b_group[1], rest
+
+
+def _solutions_by(ctx: QueryContext, triples: list, variable: Variable) -> Dict[Node, List[FrozenBindings]]:
+    solutions: Dict[Node, List[FrozenBindings]] = {}
+    for solution in evalPart(ctx, BGP(triples)):
+        solutions.setdefault(solution[variable], []).append(solution)
+    return solutions
+
+
+def evaluate(ctx: QueryContext, part: CompValue):
+    """An rdflib custom evaluation function, evaluating FILTERs over a call of one of the functions that relate two
+    separately matched entities as joins"""
+    if part.name != "Filter" or getattr(part.p, "name", None) != "BGP":
+        raise NotImplementedError()
+
+    call, others = _joinable_call(part.expr)
+    if call is None:
+        raise NotImplementedError()
+    a, b = call.expr
+    if ctx[a] is not None or ctx[b] is not None:
+        raise NotImplementedError()
+    split = _split(part.p.triples, a, b)
+    if split is None:
+        raise NotImplementedError()
+
+    return _join(ctx, part, call, others, *split)
+
+
+def _join(ctx: QueryContext, part: CompValue, call: CompValue, others: list, a_triples, b_triples, rest_triples):
+    a, b = call.expr
+    a_solutions = _solutions_by(ctx, a_triples, a)
+    b_solutions = _solutions_by(ctx, b_triples, b)
+    rest_solutions = list(evalPart(ctx, BGP(rest_triples)))
+    if not (a_solutions and b_solutions and rest_solutions):
+        return
+
+    index = get_index(ctx.graph)
+    function = _CUSTOM_FUNCTIONS[call.iri][0].__name__
+    for x, y in candidate_pairs(index, function, set(a_solutions), set(b_solutions)):
+        if not _ebv(call, FrozenBindings(ctx, {a: x, b: y})):
+            continue
+        for a_solution, b_solution, rest_solution in product(a_solutions[x], b_solutions[y], rest_solutions):
+            solution = a_solution.merge(b_solution).merge(rest_solution)
+            if all(_ebv(other, solution.forget(ctx, _except=part._vars)) for other in others):
+                yield solution
@@ -0,0 +1,163 @@
+"""
+The relations computed by the functions, written out as triples, for consumers that cannot call SPARQL extension
+functions.
+
+materialize() reads the temporal content of a stream of triples, i.e. the triples a TemporalIndex is built from, and
+yields a triple for each pair of temporal entities that a function of relations.RELATIONS is true of, with the OWL TIME
+property that the function tests for as its predicate:
+
+    <a> time:before <b> .              # tfun:isBefore(<a>, <b>)
+    <a> time:intervalContains <b> .    # tfun:contains(<a>, <b>)
+
+The temporal entities are the nodes typed as one of index.TYPE_CLASSES. Pairs are not tried one by one: the pairs
+that a function may be true of are found by the joins of joins.py, over sorted endpoints and interval indexes, for a
+block of entities at a time, and the function is called only for those. Triples are yielded as each block is done, so
+no more than a block's candidate pairs are held at once besides the temporal content itself.
+
+Run as a script, or as `timefuncs materialize`, it writes the triples as N-Triples, reading N-Triples a line at a time,
+or any other RDF format read into a Graph:
+
+    python -m timefuncs.materialize data.nt -o relations.nt -r before -r intervalContains
+
+Blank nodes read from N-Triples are written with their labels in the input.
+"""
+
+import argparse
+import sys
+from types import SimpleNamespace
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from rdflib import Graph
+from rdflib.namespace import RDF, TIME
+
+from . import funcs, ntriples
+from .index import _WATCHED, TYPE_CLASSES, Node, get_index
+from .joins import candidate_blocks
+from .ntriples import Triple
+
+# the properties written, by local name, as the function of relations.RELATIONS that is true of the pairs they relate
+PREDICATES: Dict[str, str] = {
+    "after": "is_after",
+    "before": "is_before",
+    "inside": "has_inside",
+    "intervalContains": "contains",
+    "intervalDuring": "is_during",
+    "intervalFinishedBy": "is_finished_by",
+    "intervalFinishes": "finishes",
+    "intervalStartedBy": "is_started_by",
+    "intervalStarts": "starts",
+}
+
+# the number of entities whose pairs are found at once
+DEFAULT_BLOCK_SIZE = 1024
+
+_CLASSES = frozenset(TYPE_CLASSES)
+
+
+def temporal_content(triples: Iterable[Triple]) -> Graph:
+    """A graph of the triples among triples that a TemporalIndex is built from"""
+    g = Graph()
+    for s, p, o in triples:
+        if p in _WATCHED and (p != RDF.type or o in _CLASSES):
+            g.add((s, p, o))
+    return g
+
+
+def entities(g: Graph) -> List[Node]:
+    """The temporal entities of g, in order"""
+    index = get_index(g)
+    return sorted(set().union(*index._types.values()))
+
+
+def related(g: Graph, function: str, block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[Tuple[Node, Node]]:
+    """Yields the pairs of temporal entities of g that the function of relations.RELATIONS of the given name is true
+    of"""
+    index = get_index(g)
+    func = getattr(funcs, function)
+    ctx = SimpleNamespace(ctx=SimpleNamespace(graph=g))
+    nodes = entities(g)
+    for block in candidate_blocks(index, function, nodes, set(nodes), block_size):
+        for x, y in block:
+            if func(SimpleNamespace(expr=[x, y]), ctx).value:
+                yield x, y
+
+
+def materialize(
+    triples: Iterable[Triple], predicates: Optional[Iterable[str]] = None, block_size: int = DEFAULT_BLOCK_SIZE
+) -> Iterator[Triple]:
+    """Yields a triple for each pair of temporal entities of triples, e.g. a parser's output or a graph, related by one
+    of the properties of PREDICATES given by local name, by default all of them"""
+    predicates = list(PREDICATES) if predicates is None else list(predicates)
+    unknown = [p for p in predicates if p not in PREDICATES]
+    if unknown:
+        raise ValueError(f"Unknown properties {unknown}, expected some of {sorted(PREDICATES)}")
+
+    g = triples if isinstance(triples, Graph) else temporal_content(triples)
+    for local_name in predicates:
+        predicate = TIME[local_name]
+        for a, b in related(g, PREDICATES[local_name], block_size):
+            yield a, predicate, b
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("input", nargs="?", default="-", help="the data, by default read from standard input")
+    parser.add_argument("-o", "--output", default="-", help="where to write N-Triples, by default standard output")
+    parser.add_argument("-f", "--format", default="nt", help="the RDF format of the input, by default N-Triples")
+    parser.add_argument(
+        "-r",
+        "--relation",
+        action="append",
+        choices=sorted(PREDICATES),
+        help="an OWL TIME property to write, by default all of them; may be given more than once",
+    )
+    parser.add_argument(
+        "--block-size",
+        type=int,
+        default=DEFAULT_BLOCK_SIZE,
+        help="the number of entities whose pairs are found at once",
+    )
+    parser.add_argument(
+        "--out-of-core",
+        action="store_true",
+        help="read N-Triples too large for memory, writing only the relations calculated from time positions",
+    )
+    parser.add_argument(
+        "--max-records",
+        type=int,
+        default=None,
+        help="with --out-of-core, the number of records sorted in memory at once",
+    )
+    parser.add_argument("--temporary-directory", help="with --out-of-core, where to write sorted runs")
+    args = parser.parse_args(argv)
+    if args.out_of_core and args.format not in ("nt", "ntriples"):
+        parser.error("--out-of-core reads N-Triples only")
+
+    source = None
+    if args.format not in ("nt", "ntriples"):
+        triples = temporal_content(Graph().parse(sys.stdin if args.input == "-" else args.input, format=args.format))
+    else:
+        source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        triples = ntriples.read(source, keep_labels=True)
+        if not args.out_of_core:
+            triples = temporal_content(triples)
+    if args.out_of_core:
+        from . import external
+
+        max_records = args.max_records or external.DEFAULT_MAX_RECORDS
+        triples = external.materialize(triples, args.relation, max_records, args.temporary_directory)
+    else:
+        triples = materialize(triples, args.relation, args.block_size)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        ntriples.write(triples, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if source not in (None, sys.stdin):
+            source.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
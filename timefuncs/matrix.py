@@ -0,0 +1,283 @@
+"""
+Relation matrices between two sets of temporal entities.
+
+Finding which of a set A of intervals is before which of a set B through SPARQL means a FILTER over their cross product,
+calling tfun:isBefore |A| × |B| times. relation_matrix() instead resolves the endpoints of each set once, into NumPy
+arrays, and computes the whole |A| × |B| relation by broadcasting. Relations that are only declared, e.g. by chains of
+time:before or time:intervalContains, are found by following the declarations out from each entity rather than pair by
+pair. Matrix entries agree with the functions of the same names in funcs.py.
+
+iter_relation_matrix() computes the same matrix a block of rows at a time, so that memory is bounded by the size of a
+block rather than by |A| × |B|.
+
+NumPy is an optional dependency of timefuncs, only needed for this module: pip install timefuncs[numpy]
+"""
+
+from itertools import product
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+from rdflib import Graph
+from rdflib.namespace import TIME
+
+from .index import Node, TemporalIndex, get_index
+from .relations import RELATIONS as _RELATIONS
+from .relations import chained, declared_from, declared_to
+from .timestamps import before
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# the relations computed from time positions here, see relations.RELATIONS
+RELATIONS = tuple(name for name, (calculation, _, _, _) in _RELATIONS.items() if calculation != "inside")
+
+# the number of rows per block computed by relation_matrix()
+DEFAULT_BLOCK_ROWS = 1024
+
+
+class _Endpoints:
+    """The time positions of the beginnings and ends of a sequence of entities, as arrays of microseconds since the Unix
+    epoch (see timestamps.py) with masks marking which entities have them"""
+
+    # arrays with one entry per entity
+    PER_ENTITY = (
+        "interval",
+        "has_chain_begin",
+        "chain_begin_earliest",
+        "has_chain_end",
+        "chain_end_latest",
+        "has_begin",
+        "begin_latest_min",
+        "begin_earliest_max",
+        "has_end",
+        "end_latest_min",
+        "end_earliest_max",
+    )
+    # arrays with one entry per (beginning, end) combination of each entity, entity i's running from offsets[i] to
+    # offsets[i + 1]
+    PER_PAIR = ("pair_begin_earliest", "pair_begin_latest", "pair_end_earliest", "pair_end_latest")
+
+    def __init__(self, index: TemporalIndex, entities: List[Node]):
+        self.entities = entities
+        n = len(entities)
+        for name in self.PER_ENTITY:
+            setattr(self, name, np.zeros(n, dtype=bool if name.startswith(("has_", "interval")) else np.int64))
+        pairs = []
+        offsets = [0]
+
+        for i, entity in enumerate(entities):
+            self.interval[i] = index.is_a(entity, TIME.Interval, TIME.ProperInterval)
+
+            # as compared by is_before(), over hasBeginning* and hasEnd*
+            chain_begins = index.endpoint_spans(entity, TIME.hasBeginning, "zero_or_more")
+            chain_ends = index.endpoint_spans(entity, TIME.hasEnd, "zero_or_more")
+            if chain_begins:
+                self.has_chain_begin[i] = True
+                self.chain_begin_earliest[i] = min(span[0] for span in chain_begins)
+            if chain_ends:
+                self.has_chain_end[i] = True
+                self.chain_end_latest[i] = max(span[1] for span in chain_ends)
+
+            # as compared by contains(), over direct endpoints
+            begins = index.endpoint_spans(entity, TIME.hasBeginning)
+            ends = index.endpoint_spans(entity, TIME.hasEnd)
+            if begins:
+                self.has_begin[i] = True
+                self.begin_latest_min[i] = min(span[1] for span in begins)
+                self.begin_earliest_max[i] = max(span[0] for span in begins)
+            if ends:
+                self.has_end[i] = True
+                self.end_latest_min[i] = min(span[1] for span in ends)
+                self.end_earliest_max[i] = max(span[0] for span in ends)
+
+            # as compared by starts() and finishes(), which only consider endpoints with the beginning before the end
+            pairs.extend(begin + end for begin, end in product(begins, ends) if before(begin, end))
+            offsets.append(len(pairs))
+
+        pairs = np.array(pairs, dtype=np.int64).reshape(-1, 4)
+        for column, name in enumerate(self.PER_PAIR):
+            setattr(self, name, pairs[:, column])
+        self.offsets = np.array(offsets, dtype=np.int64)
+
+    def rows(self, start: int, stop: int) -> "_Endpoints":
+        """The endpoints of entities start to stop"""
+        part = object.__new__(_Endpoints)
+        part.entities = self.entities[start:stop]
+        for name in self.PER_ENTITY:
+            setattr(part, name, getattr(self, name)[start:stop])
+        first, last = self.offsets[start], self.offsets[stop]
+        for name in self.PER_PAIR:
+            setattr(part, name, getattr(self, name)[first:last])
+        part.offsets = self.offsets[start : stop + 1] - first
+        return part
+
+
+def _any_by_entity(m: "np.ndarray", offsets: "np.ndarray", axis: int) -> "np.ndarray":
+    """Reduces the rows (axis 0) or columns (axis 1) of a matrix over pairs to one per entity, true if any of the
+    entity's pairs are"""
+    counts = np.diff(offsets)
+    shape = list(m.shape)
+    shape[axis] = len(counts)
+    reduced = np.zeros(shape, dtype=bool)
+    present = counts > 0
+    if present.any():
+        found = np.logical_or.reduceat(m, offsets[:-1][present], axis=axis)
+        if axis == 0:
+            reduced[present] = found
+        else:
+            reduced[:, present] = found
+    return reduced
+
+
+def _calculated_before(a: _Endpoints, b: _Endpoints) -> "np.ndarray":
+    return (
+        a.has_chain_end[:, None]
+        & b.has_chain_begin[None, :]
+        & (a.chain_end_latest[:, None] < b.chain_begin_earliest[None, :])
+    )
+
+
+def _calculated_contains(a: _Endpoints, b: _Endpoints) -> "np.ndarray":
+    return (
+        (a.has_begin & a.has_end)[:, None]
+        & (b.has_begin & b.has_end)[None, :]
+        & (a.begin_latest_min[:, None] < b.begin_earliest_max[None, :])
+        & (b.end_latest_min[None, :] < a.end_earliest_max[:, None])
+    )
+
+
+def _calculated_starts(a: _Endpoints, b: _Endpoints) -> "np.ndarray":
+    m = (
+        (a.pair_begin_earliest[:, None] == b.pair_begin_earliest[None, :])
+        & (a.pair_begin_latest[:, None] == b.pair_begin_latest[None, :])
+        & (a.pair_end_latest[:, None] < b.pair_end_earliest[None, :])
+    )
+    return _any_by_entity(_any_by_entity(m, a.offsets, 0), b.offsets, 1)
+
+
+def _calculated_finishes(a: _Endpoints, b: _Endpoints) -> "np.ndarray":
+    m = (
+        (a.pair_begin_earliest[:, None] > b.pair_begin_latest[None, :])
+        & (a.pair_end_earliest[:, None] == b.pair_end_earliest[None, :])
+        & (a.pair_end_latest[:, None] == b.pair_end_latest[None, :])
+    )
+    return _any_by_entity(_any_by_entity(m, a.offsets, 0), b.offsets, 1)
+
+
+_CALCULATED = {
+    "before": _calculated_before,
+    "contains": _calculated_contains,
+    "finishes": _calculated_finishes,
+    "starts": _calculated_starts,
+}
+
+
+def _declared(
+    index: TemporalIndex,
+    relation: str,
+    transposed: bool,
+    rows: List[Node],
+    columns: List[Node],
+    column_cache: Dict[Node, Set[Node]],
+) -> "np.ndarray":
+    """The declared part of a matrix. Declarations are followed out from every row entity, and those only found by
+    following them backwards are followed from every column entity, with the results kept in column_cache."""
+    m = np.zeros((len(rows), len(columns)), dtype=bool)
+    row_numbers: Dict[Node, List[int]] = {}
+    for i, node in enumerate(rows):
+        row_numbers.setdefault(node, []).append(i)
+    column_numbers: Dict[Node, List[int]] = {}
+    for j, node in enumerate(columns):
+        column_numbers.setdefault(node, []).append(j)
+
+    # for a transposed matrix, m[i, j] is relation(columns[j], rows[i])
+    for i, node in enumerate(rows):
+        if transposed:
+            targets = declared_to(index, relation, node)
+        else:
+            targets = declared_from(index, relation, node)
+        targets |= chained(index, relation, node, reverse=transposed)
+        for target in targets:
+            for j in column_numbers.get(target, ()):
+                m[i, j] = True
+
+    for j, node in enumerate(columns):
+        try:
+            sources = column_cache[node]
+        except KeyError:
+            if transposed:
+                sources = column_cache[node] = declared_from(index, relation, node)
+            else:
+                sources = column_cache[node] = declared_to(index, relation, node)
+        for source in sources:
+            for i in row_numbers.get(source, ()):
+                m[i, j] = True
+
+    return m
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Relation matrices need NumPy, which may be installed with pip install timefuncs[numpy]")
+
+
+def iter_relation_matrix(
+    g: Graph,
+    relation: str,
+    a: Iterable[Node],
+    b: Iterable[Node],
+    rows: int = DEFAULT_BLOCK_ROWS,
+    packed: bool = False,
+) -> Iterator[Tuple[int, "np.ndarray"]]:
+    """Yields the matrix of relation_matrix(g, relation, a, b, packed) a block of up to the given number of rows at a
+    time, as (first row, block) tuples"""
+    _require_numpy()
+    if relation not in RELATIONS:
+        raise ValueError(f"Unknown relation {relation!r}, expected one of {sorted(RELATIONS)}")
+    calculation, calculated_transposed, family, declared_transposed = _RELATIONS[relation]
+    if rows < 1:
+        raise ValueError("A block must have at least one row")
+
+    index = get_index(g)
+    a, b = list(a), list(b)
+    # the endpoints on each axis of time positions, see index.py
+    axes = [index] + [index.on_axis(trs) for trs in index.axes()]
+    endpoints = [(_Endpoints(axis, a), _Endpoints(axis, b)) for axis in axes]
+    a_endpoints, b_endpoints = endpoints[0]
+    calculate = _CALCULATED[calculation]
+    column_cache: Dict[Node, Set[Node]] = {}
+
+    for start in range(0, len(a), rows):
+        stop = min(start + rows, len(a))
+        m = np.zeros((stop - start, len(b)), dtype=bool)
+        for a_axis, b_axis in endpoints:
+            block = a_axis.rows(start, stop)
+            if calculated_transposed:
+                m |= calculate(b_axis, block).T
+            else:
+                m |= calculate(block, b_axis)
+        block = a_endpoints.rows(start, stop)
+        m |= _declared(index, family, declared_transposed, block.entities, b_endpoints.entities, column_cache)
+        if family in ("finishes", "starts"):
+            # these functions are only true for intervals
+            m &= block.interval[:, None] & b_endpoints.interval[None, :]
+        yield start, np.packbits(m, axis=1) if packed else m
+
+
+def relation_matrix(
+    g: Graph, relation: str, a: Iterable[Node], b: Iterable[Node], packed: bool = False
+) -> "np.ndarray":
+    """The |a| × |b| boolean matrix of relation between two sequences of temporal entities in graph g, in which
+    entry [i, j] is relation(a[i], b[j]). The relation is named as the function in funcs.py that computes it, one of
+    RELATIONS, e.g. 'is_before'.
+
+    If packed, each row is packed into bits with numpy.packbits(), for a matrix of |a| × ceil(|b| / 8) bytes."""
+    _require_numpy()
+    a = list(a)
+    b = list(b)
+    blocks = [block for _, block in iter_relation_matrix(g, relation, a, b, max(len(a), 1), packed)]
+    if blocks:
+        return blocks[0]
+    empty = np.zeros((0, len(b)), dtype=bool)
+    return np.packbits(empty, axis=1) if packed else empty
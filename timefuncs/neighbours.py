@@ -0,0 +1,195 @@
+"""
+The entities nearest in time to an entity or a time position.
+
+"What is the latest event before this observation?" asked with tfun:isBefore means calling it for every candidate and
+then sorting those it is true for. before(g, a, k) instead answers it from lists of the graph's entities sorted by the
+latest time each may end and by the earliest time each may begin, kept with the graph's TemporalIndex: a binary search
+finds where a falls in the list and the k entities next to it are read off, in O(log n + k) time. after() and around()
+do the same for the entities that begin after a, and those on either side of it.
+
+An entity is before a here if its time positions put it before a, as for tfun:isBefore: if the latest its end may be is
+before the earliest a's beginning may be. Relations that are only declared, and entities without time positions, are
+not considered, nor numeric positions in reference systems that timestamps.TRS has no conversion for. Beginnings and
+ends of other entities are not returned themselves, since they are parts of entities.
+
+latestBefore, earliestAfter and nearest are the SPARQL forms, each returning the kth nearest entity.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple, Union
+
+from rdflib import Graph, Literal
+from rdflib.namespace import TIME
+from rdflib.plugins.sparql.sparql import SPARQLError
+
+from .index import Node, TemporalIndex, get_index
+from .stats import instrumented
+from .timestamps import to_span
+
+Reference = Union[Node, Literal]
+
+
+def _sorted(index: TemporalIndex) -> Tuple[List[int], List[Node], List[int], List[Node]]:
+    """The entities with time positions, sorted by the latest their end may be and by the earliest their beginning may
+    be, each with its keys"""
+    try:
+        return index._resolved[("neighbours",)]
+    except KeyError:
+        pass
+
+    entities = index.positioned() | index._outbound[TIME.hasBeginning].keys() | index._outbound[TIME.hasEnd].keys()
+    entities -= index._inbound[TIME.hasBeginning].keys() | index._inbound[TIME.hasEnd].keys()
+    ends, beginnings = [], []
+    for entity in entities:
+        spans = index.endpoint_spans(entity, TIME.hasEnd, "zero_or_more")
+        if spans:
+            ends.append((max(span[1] for span in spans), entity))
+        spans = index.endpoint_spans(entity, TIME.hasBeginning, "zero_or_more")
+        if spans:
+            beginnings.append((min(span[0] for span in spans), entity))
+    ends.sort(key=lambda k: k[0])
+    beginnings.sort(key=lambda k: k[0])
+    neighbours = index._resolved[("neighbours",)] = (
+        [k for k, _ in ends],
+        [n for _, n in ends],
+        [k for k, _ in beginnings],
+        [n for _, n in beginnings],
+    )
+    return neighbours
+
+
+def _beginning(index: TemporalIndex, a: Reference) -> Optional[int]:
+    """The earliest a may begin, for an entity or an XSD date or time literal, or None if it is not known"""
+    if isinstance(a, Literal):
+        span = to_span(a)
+        return None if span is None else span[0]
+    spans = index.endpoint_spans(a, TIME.hasBeginning, "zero_or_more")
+    return min(span[0] for span in spans) if spans else None
+
+
+def _end(index: TemporalIndex, a: Reference) -> Optional[int]:
+    """The latest a may end, for an entity or an XSD date or time literal, or None if it is not known"""
+    if isinstance(a, Literal):
+        span = to_span(a)
+        return None if span is None else span[1]
+    spans = index.endpoint_spans(a, TIME.hasEnd, "zero_or_more")
+    return max(span[1] for span in spans) if spans else None
+
+
+def before(g: Graph, a: Reference, k: int = 1) -> List[Node]:
+    """The k entities in graph g before a (an entity or an XSD date or time literal) that end latest, latest first"""
+    index = get_index(g)
+    beginning = _beginning(index, a)
+    if beginning is None:
+        return []
+    keys, nodes, _, _ = _sorted(index)
+    found = []
+    for i in range(bisect_left(keys, beginning) - 1, -1, -1):
+        if len(found) == k:
+            break
+        if nodes[i] != a:
+            found.append(nodes[i])
+    return found
+
+
+def after(g: Graph, a: Reference, k: int = 1) -> List[Node]:
+    """The k entities in graph g after a (an entity or an XSD date or time literal) that begin earliest, earliest
+    first"""
+    index = get_index(g)
+    end = _end(index, a)
+    if end is None:
+        return []
+    _, _, keys, nodes = _sorted(index)
+    found = []
+    for i in range(bisect_right(keys, end), len(keys)):
+        if len(found) == k:
+            break
+        if nodes[i] != a:
+            found.append(nodes[i])
+    return found
+
+
+def around(g: Graph, a: Reference, k: int = 1) -> List[Node]:
+    """The k entities in graph g before or after a (an entity or an XSD date or time literal) with the shortest gaps
+    between them and a, nearest first. Entities that may overlap a are not included, nor those after a if it has no
+    end, or before it if it has no beginning."""
+    index = get_index(g)
+    beginning, end = _beginning(index, a), _end(index, a)
+    end_keys, end_nodes, beginning_keys, beginning_nodes = _sorted(index)
+    earlier = -1 if beginning is None else bisect_left(end_keys, beginning) - 1
+    later = len(beginning_keys) if end is None else bisect_right(beginning_keys, end)
+    found = []
+    seen = set()
+    while len(found) < k and (earlier >= 0 or later < len(beginning_keys)):
+        earlier_gap = beginning - end_keys[earlier] if earlier >= 0 else None
+        later_gap = beginning_keys[later] - end if later < len(beginning_keys) else None
+        if later_gap is None or (earlier_gap is not None and earlier_gap <= later_gap):
+            node = end_nodes[earlier]
+            earlier -= 1
+        else:
+            node = beginning_nodes[later]
+            later += 1
+        # an entity is both before and after a only if its time positions are inconsistent
+        if node != a and node not in seen:
+            seen.add(node)
+            found.append(node)
+    return found
+
+
+def _kth(e, ctx, name: str, neighbours) -> Node:
+    try:
+        a = e.expr[0]
+        k = int(e.expr[1]) if len(e.expr) > 1 else 1
+    except Exception as err:
+        raise ValueError(
+            f"This function, {name}(a, k), requires an IRI or XSD date or time literal parameter a, and optionally an "
+            f"integer k, the rank of the entity to return"
+        )
+    if k < 1:
+        raise SPARQLError(f"{name}(a, k) requires k of at least 1, not {k}")
+
+    found = neighbours(ctx.ctx.graph, a, k)
+    if len(found) < k:
+        raise SPARQLError(f"There are fewer than {k} entities for {name}({a}) in the data")
+    return found[k - 1]
+
+
+@instrumented
+def latest_before(e, ctx) -> Node:
+    """SPARQL tfun:latestBefore(a [, k])
+
+    Returns the entity before a that ends latest, or the kth latest, where a is a time:TemporalEntity or an XSD date or
+    time literal. Raises an error, leaving the result unbound, if there is no such entity.
+
+    Example:
+
+    SELECT ?observation ?event
+    WHERE {
+        ?observation a time:Instant .
+
+        BIND (tfun:latestBefore(?observation) AS ?event)
+    }
+
+    """
+    return _kth(e, ctx, "latestBefore", before)
+
+
+@instrumented
+def earliest_after(e, ctx) -> Node:
+    """SPARQL tfun:earliestAfter(a [, k])
+
+    Returns the entity after a that begins earliest, or the kth earliest, where a is a time:TemporalEntity or an XSD
+    date or time literal. Raises an error, leaving the result unbound, if there is no such entity.
+    """
+    return _kth(e, ctx, "earliestAfter", after)
+
+
+@instrumented
+def nearest(e, ctx) -> Node:
+    """SPARQL tfun:nearest(a [, k])
+
+    Returns the entity before or after a with the shortest gap between it and a, or the kth nearest, where a is a
+    time:TemporalEntity or an XSD date or time literal. Raises an error, leaving the result unbound, if there is no
+    such entity.
+    """
+    return _kth(e, ctx, "nearest", around)
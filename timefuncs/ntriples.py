@@ -0,0 +1,64 @@
+"""
+Reading and writing N-Triples as streams, for data too large to be held in a Graph.
+
+read() parses lines a chunk at a time and yields their triples as it goes, keeping blank node labels consistent across
+chunks, and write() writes triples out as they come. read(lines, keep_labels=True) gives blank nodes the labels they
+have in the lines, so that triples written about them, e.g. by materialize.py, refer to the same blank nodes as the
+input where the two are concatenated.
+"""
+
+from itertools import islice
+from typing import Iterable, Iterator, List, TextIO, Tuple
+
+from rdflib import URIRef
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser
+from rdflib.plugins.serializers.nt import _nt_row
+
+from .index import Node
+
+Triple = Tuple[Node, URIRef, Node]
+
+# the number of lines parsed at once
+CHUNK_LINES = 10000
+
+
+class _Sink:
+    """Collects the triples of a parser"""
+
+    def __init__(self):
+        self.triples: List[Triple] = []
+
+    def triple(self, s, p, o):
+        self.triples.append((s, p, o))
+
+
+class _Labels(dict):
+    """A blank node context of the parser in which each blank node's identifier is its label"""
+
+    def get(self, label, default=None):
+        return label
+
+
+def read(lines: Iterable[str], keep_labels: bool = False) -> Iterator[Triple]:
+    """Yields the triples of N-Triples lines, e.g. of an open text file. Blank nodes are given fresh identifiers unless
+    keep_labels is set."""
+    sink = _Sink()
+    parser = W3CNTriplesParser(sink)
+    bnodes = _Labels() if keep_labels else {}
+    lines = iter(lines)
+    while True:
+        chunk = "".join(islice(lines, CHUNK_LINES))
+        if not chunk:
+            return
+        parser.parsestring(chunk, bnode_context=bnodes)
+        yield from sink.triples
+        sink.triples = []
+
+
+def write(triples: Iterable[Triple], out: TextIO) -> int:
+    """Writes triples to a text stream as N-Triples, returning the number written"""
+    n = 0
+    for triple in triples:
+        out.write(_nt_row(triple))
+        n += 1
+    return n
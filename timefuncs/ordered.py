@@ -0,0 +1,198 @@
+"""
+The entities related to one entity, in temporal order.
+
+iter_before(g, a) yields the entities that tfun:isBefore(x, a) is true for, latest first, iter_after(g, a) those that
+tfun:isAfter(x, a) is true for, earliest first, and iter_inside(g, interval) those that tfun:hasInside(interval, x) is
+true for, earliest first. Each is a generator, so a consumer wanting only the first few, like a query with a LIMIT,
+stops early without the rest being looked for.
+
+The entities whose relation to a is calculated from time positions are read off lists of all entities sorted by the
+time positions compared, kept with the graph's TemporalIndex, from the point found by a binary search. Those whose
+relation is declared, directly or by a chain of declarations, are few and found up front, then merged in by their time
+positions; any of them without time positions come last. So do those related by numeric positions in a reference system
+with an axis of its own (see index.py), found from the same lists for that axis. Every entity is checked with the
+function itself before it is yielded, so the entities yielded are exactly those that the function is true for.
+"""
+
+import heapq
+from bisect import bisect_left, bisect_right
+from typing import Callable, Iterable, Iterator, List, Optional, Set, Tuple
+
+from rdflib import Graph, URIRef
+from rdflib.namespace import TIME
+
+from .funcs import _planned
+from .index import Node, TemporalIndex, get_index
+from .relations import _reverse_closure, chained, declared_from, declared_to
+
+Keyed = Tuple[int, Node]
+
+
+def _endpoints(index: TemporalIndex, endpoint: URIRef, latest: bool) -> Tuple[List[int], List[Node]]:
+    """The nodes whose endpoints, or themselves, have time positions, as compared by is_before(): sorted by the latest
+    time their endpoint may be if latest, else by the earliest, with their keys"""
+    key = ("endpoints", endpoint, latest)
+    try:
+        return index._resolved[key]
+    except KeyError:
+        pass
+
+    positioned = index.positioned()
+    nodes = set(positioned)
+    for node in positioned:
+        nodes |= _reverse_closure(index, node, endpoint)
+    keyed = []
+    for node in nodes:
+        spans = index.endpoint_spans(node, endpoint, "zero_or_more")
+        if spans:
+            keyed.append((max(span[1] for span in spans) if latest else min(span[0] for span in spans), node))
+    keyed.sort(key=lambda k: k[0])
+    endpoints = index._resolved[key] = ([k for k, _ in keyed], [n for _, n in keyed])
+    return endpoints
+
+
+def _spans(index: TemporalIndex) -> Tuple[List[int], List[Tuple[int, int, Node]]]:
+    """Each time position span of each node, as compared by has_inside(), sorted by the span's earliest time"""
+    try:
+        return index._resolved[("spans",)]
+    except KeyError:
+        pass
+
+    spans = sorted(
+        ((span[0], span[1], node) for node in index.positioned() for span in index.spans(node)),
+        key=lambda span: span[:2],
+    )
+    spans = index._resolved[("spans",)] = ([span[0] for span in spans], spans)
+    return spans
+
+
+def _declaring(index: TemporalIndex, a: Node, step: URIRef, predicate: URIRef, endpoint: URIRef) -> Set[Node]:
+    """The nodes x with a, or a's endpoint, among the objects of the property path step*/predicate from x, i.e. those
+    that is_before() or is_after() find declared from x's side"""
+    found = set()
+    for target in (a,) + tuple(index.objects(a, endpoint)):
+        for declarer in index.subjects(predicate, target):
+            found.add(declarer)
+            found |= _reverse_closure(index, declarer, step)
+    return found
+
+
+def _on_axes(index: TemporalIndex, calculated: Callable[[TemporalIndex], Iterator[Keyed]]) -> Set[Node]:
+    """The nodes calculated on the axes of the reference systems that index.axes() lists, each found on its own axis"""
+    return {node for trs in index.axes() for _, node in calculated(index.on_axis(trs))}
+
+
+def _merged(
+    index: TemporalIndex,
+    function: str,
+    related: Callable[[Node], Tuple[Node, Node]],
+    calculated: Iterator[Keyed],
+    declared: Iterable[Node],
+    key: Callable[[Node], Optional[int]],
+    latest_first: bool,
+) -> Iterator[Node]:
+    """Yields the nodes calculated, already in order, and declared, checked with the function as related (x, y) pairs"""
+    timed: List[Keyed] = []
+    untimed = []
+    for node in declared:
+        k = key(node)
+        if k is None:
+            untimed.append(node)
+        else:
+            timed.append((k, node))
+    timed.sort(key=lambda k: k[0], reverse=latest_first)
+    seen: Set[Node] = set()
+    for _, node in heapq.merge(calculated, timed, key=lambda k: k[0], reverse=latest_first):
+        if node not in seen:
+            seen.add(node)
+            a, b = related(node)
+            if _planned(index, function, a, b).value:
+                yield node
+    for node in untimed:
+        if node not in seen:
+            seen.add(node)
+            a, b = related(node)
+            if _planned(index, function, a, b).value:
+                yield node
+
+
+def iter_before(g: Graph, a: Node) -> Iterator[Node]:
+    """Yields the entities x that tfun:isBefore(x, a) is true for in graph g, those that end latest first"""
+    index = get_index(g)
+
+    def calculated(axis: TemporalIndex) -> Iterator[Keyed]:
+        keys, nodes = _endpoints(axis, TIME.hasEnd, latest=True)
+        beginnings = axis.endpoint_spans(a, TIME.hasBeginning, "zero_or_more")
+        found = bisect_left(keys, min(span[0] for span in beginnings)) if beginnings else 0
+        return ((keys[i], nodes[i]) for i in range(found - 1, -1, -1))
+
+    declared = (
+        declared_to(index, "before", a)
+        | _declaring(index, a, TIME.hasEnd, TIME.before, TIME.hasBeginning)
+        | chained(index, "before", a, reverse=True)
+        | _on_axes(index, calculated)
+    )
+
+    def key(node: Node) -> Optional[int]:
+        spans = index.endpoint_spans(node, TIME.hasEnd, "zero_or_more")
+        return max(span[1] for span in spans) if spans else None
+
+    yield from _merged(index, "is_before", lambda x: (x, a), calculated(index), declared, key, latest_first=True)
+
+
+def iter_after(g: Graph, a: Node) -> Iterator[Node]:
+    """Yields the entities x that tfun:isAfter(x, a) is true for in graph g, those that begin earliest first"""
+    index = get_index(g)
+
+    def calculated(axis: TemporalIndex) -> Iterator[Keyed]:
+        keys, nodes = _endpoints(axis, TIME.hasBeginning, latest=False)
+        ends = axis.endpoint_spans(a, TIME.hasEnd, "zero_or_more")
+        found = bisect_right(keys, max(span[1] for span in ends)) if ends else len(keys)
+        return ((keys[i], nodes[i]) for i in range(found, len(keys)))
+
+    declared = (
+        declared_from(index, "before", a)
+        | _declaring(index, a, TIME.hasBeginning, TIME.after, TIME.hasEnd)
+        | chained(index, "before", a, reverse=False)
+        | _on_axes(index, calculated)
+    )
+
+    def key(node: Node) -> Optional[int]:
+        spans = index.endpoint_spans(node, TIME.hasBeginning, "zero_or_more")
+        return min(span[0] for span in spans) if spans else None
+
+    yield from _merged(index, "is_after", lambda x: (x, a), calculated(index), declared, key, latest_first=False)
+
+
+def iter_inside(g: Graph, interval: Node) -> Iterator[Node]:
+    """Yields the entities x that tfun:hasInside(interval, x) is true for in graph g, those that begin earliest
+    first"""
+    index = get_index(g)
+
+    def calculated(axis: TemporalIndex) -> Iterator[Keyed]:
+        keys, spans = _spans(axis)
+        beginnings = axis.endpoint_spans(interval, TIME.hasBeginning, "one_or_more")
+        ends = axis.endpoint_spans(interval, TIME.hasEnd, "one_or_more")
+        if not beginnings or not ends:
+            return
+        # a span is inside if it begins after the earliest the interval's beginning may end, and ends before the
+        # latest its end may begin
+        earliest, latest = min(span[1] for span in beginnings), max(span[0] for span in ends)
+        for i in range(bisect_right(keys, earliest), bisect_left(keys, latest)):
+            start, end, node = spans[i]
+            if end < latest:
+                yield start, node
+
+    def key(node: Node) -> Optional[int]:
+        node_spans = index.spans(node)
+        return min(span[0] for span in node_spans) if node_spans else None
+
+    yield from _merged(
+        index,
+        "has_inside",
+        lambda x: (interval, x),
+        calculated(index),
+        declared_to(index, "inside", interval) | _on_axes(index, calculated),
+        key,
+        latest_first=False,
+    )
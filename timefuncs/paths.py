@@ -0,0 +1,92 @@
+"""
+Searches for chains of declared relations between temporal entities.
+
+Relations such as time:before are transitive, so a function asking whether a is before b must also find chains a before
+n, n before ... before b, and chains using the inverse, time:after, in the other direction. These are found by a
+bidirectional breadth-first search over the graph, or over its TemporalIndex, unless a transitive closure of the
+relations is maintained (see closure.py).
+"""
+
+from typing import List, Set, Tuple, Union
+from typing import Literal as TLiteral
+
+from rdflib import BNode, Graph, URIRef
+
+from .closure import FAMILIES
+from .index import TemporalIndex
+
+
+def _declared_path(index: TemporalIndex, a: Union[URIRef, BNode], b: Union[URIRef, BNode], family: str) -> bool:
+    """Finds if a chain of the declared relations in the named family (see closure.FAMILIES) leads from a to b.
+
+    Looks the answer up in the family's transitive closure if one is maintained for the graph, see
+    index.enable_closures(), else searches for a path."""
+    reached = index.reaches(a, b, family)
+    if reached is None:
+        return _path_exists(index, a, b, list(FAMILIES[family]))
+    return reached
+
+
+def _neighbours(
+    g: Union[Graph, TemporalIndex],
+    nodes: Set[Union[URIRef, BNode]],
+    predicates: List[Tuple[URIRef, TLiteral["outbound", "inbound"]]],
+) -> Set[Union[URIRef, BNode]]:
+    """Finds all nodes linked to any of the given nodes via any of the given predicates.
+
+    A graph is asked once per predicate for the whole set of nodes, rather than once per node."""
+    found = set()
+    if isinstance(g, TemporalIndex):
+        for predicate, direction in predicates:
+            for node in nodes:
+                if direction == "outbound":
+                    found.update(g.objects(node, predicate))
+                else:
+                    found.update(g.subjects(predicate, node))
+        return found
+
+    choices = list(nodes)
+    for predicate, direction in predicates:
+        if direction == "outbound":
+            found.update(o for _, _, o in g.triples_choices((choices, predicate, None)))
+        else:
+            found.update(s for s, _, _ in g.triples_choices((None, predicate, choices)))
+    return found
+
+
+def _path_exists(
+    g: Union[Graph, TemporalIndex],
+    a: Union[URIRef, BNode],
+    b: Union[URIRef, BNode],
+    predicates: List[Tuple[URIRef, TLiteral["outbound", "inbound"]]],
+) -> bool:
+    """Finds if any path between RDF nodes a and b in graph g exists,
+    following any of the predicates supplied, in any order. g may also be the TemporalIndex of a graph.
+
+    This function is a support function for the named TIME functions such as is_before.
+
+    Searches breadth-first from both a (following the predicates) and b (following them in reverse) a whole level at
+    a time, always expanding the smaller of the two frontiers, until the searches meet or one runs out of nodes."""
+
+    if a == b:
+        return False
+
+    reversed_predicates = [(p, "inbound" if direction == "outbound" else "outbound") for p, direction in predicates]
+
+    seen_from_a = {a}
+    seen_from_b = {b}
+    frontier_a = {a}
+    frontier_b = {b}
+    while frontier_a and frontier_b:
+        if len(frontier_a) <= len(frontier_b):
+            frontier_a = _neighbours(g, frontier_a, predicates) - seen_from_a
+            if not frontier_a.isdisjoint(seen_from_b):
+                return True
+            seen_from_a |= frontier_a
+        else:
+            frontier_b = _neighbours(g, frontier_b, reversed_predicates) - seen_from_b
+            if not frontier_b.isdisjoint(seen_from_a):
+                return True
+            seen_from_b |= frontier_b
+
+    return False
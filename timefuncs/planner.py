@@ -0,0 +1,79 @@
+"""
+Plans of the checks made by the functions in funcs.py.
+
+A function such as is_before() answers by making several checks in turn, for a declared relation, for ordered time
+positions and for a chain of declared relations, but some checks cannot hold in a given graph: there is no point
+following time:before triples in a graph without any, or comparing time positions in one that gives none. plan()
+collects cheap statistics of a graph, the number of subjects of each predicate the functions use, and compiles for each
+function the checks that could hold in it, cheapest first. Plans are kept with the graph's TemporalIndex and made again
+when the graph changes.
+
+Each check is given as (rule, answer, check, requirements, transposed): the function answers answer if check(index, a,
+b) holds, or check(index, b, a) if transposed. The rule is that reported to stats.py, and for 'path' checks check is
+instead the name of the relation family searched for a chain (see closure.FAMILIES). requirements are the predicates
+without which the check cannot hold, as groups of which the graph must use at least one predicate each.
+"""
+
+from math import log2
+from typing import Callable, Dict, Tuple, Union
+
+from rdflib import URIRef
+from rdflib.namespace import TIME
+
+from .index import POSITION_PREDICATES, RELATION_PREDICATES, TemporalIndex
+
+Requirements = Tuple[Tuple[URIRef, ...], ...]
+Check = Tuple[str, bool, Union[Callable, str], Requirements, bool]
+
+# the requirement of any time position, as an XSD literal or a numeric position
+POSITIONS = POSITION_PREDICATES + (TIME.inTimePosition,)
+
+# the relative costs of checks of each rule. A search for a chain costs more the more relations it may follow, unless
+# a transitive closure of them is maintained
+_COSTS: Dict[str, float] = {"declared": 1.0, "calculated": 2.0, "network": 4.5}
+_CLOSURE_COST = 0.5
+_SEARCH_COST = 3.0
+
+
+def statistics(index: TemporalIndex) -> Dict[URIRef, int]:
+    """The number of subjects of each predicate that the functions use"""
+    key = ("statistics",)
+    try:
+        return index._resolved[key]
+    except KeyError:
+        pass
+
+    counts = index._resolved[key] = {p: index.count(p) for p in RELATION_PREDICATES + POSITIONS}
+    return counts
+
+
+def possible(counts: Dict[URIRef, int], requirements: Requirements) -> bool:
+    """True if a graph with the given statistics meets the requirements"""
+    return all(any(counts[p] for p in group) for group in requirements)
+
+
+def _cost(index: TemporalIndex, counts: Dict[URIRef, int], check: Check) -> float:
+    rule, _, family, requirements, _ = check
+    if rule != "path":
+        return _COSTS[rule]
+    if family in index.closures:
+        return _CLOSURE_COST
+    return _SEARCH_COST + log2(1 + sum(counts[p] for group in requirements for p in group))
+
+
+def plan(index: TemporalIndex, function: str, checks: Tuple[Check, ...]) -> Tuple[Check, ...]:
+    """The checks that could hold in the graph of an index, those answering false first, then cheapest first. Plans
+    are memoised by function name and the closures maintained."""
+    key = ("plan", function, frozenset(index.closures))
+    try:
+        return index._resolved[key]
+    except KeyError:
+        pass
+
+    counts = statistics(index)
+    planned = sorted(
+        (check for check in checks if possible(counts, check[3])),
+        key=lambda check: (check[1], _cost(index, counts, check)),
+    )
+    planned = index._resolved[key] = tuple(planned)
+    return planned
@@ -0,0 +1,18 @@
+"""
+The entry point by which rdflib discovers timefuncs.
+
+rdflib adds the functions named by rdf.plugins.sparqleval entry points to its CUSTOM_EVALS when its SPARQL engine is
+first imported. evaluate() is called for the first part of the first query evaluated, before any function in it, so it
+registers the functions then (see register() in __init__.py), replacing itself with the join evaluation of joins.py.
+"""
+
+from . import EVAL_NAME, register
+
+
+def evaluate(ctx, part):
+    """An rdflib custom evaluation function registering the functions on first use"""
+    register()
+
+    from rdflib.plugins.sparql import CUSTOM_EVALS
+
+    return CUSTOM_EVALS[EVAL_NAME](ctx, part)
@@ -0,0 +1,129 @@
+"""
+The relations computed by the functions in funcs.py, described for evaluating them over whole sets of entities at once.
+
+Each function is true of a pair (a, b) either because a relation between them is declared, directly, by a chain of
+declarations or by the network of declared Allen relations (see allen.network()), or because it is calculated from
+their time positions. matrix.py and joins.py compute both parts for
+many pairs at once; the declared part is found by following declarations out from each entity with the functions here.
+"""
+
+from typing import Dict, Set, Tuple
+
+from rdflib import URIRef
+from rdflib.namespace import TIME
+
+from .allen import FAMILY_RELATIONS, network
+from .closure import FAMILIES
+from .paths import _neighbours
+from .index import Node, TemporalIndex
+
+# for each function, the name of its calculation from time positions and whether that is of (b, a) rather than (a, b),
+# then the relation family (see closure.FAMILIES) whose declarations it follows and whether those are of (b, a)
+RELATIONS: Dict[str, Tuple[str, bool, str, bool]] = {
+    "contains": ("contains", False, "contains", False),
+    "finishes": ("finishes", False, "finishes", False),
+    "has_during": ("contains", False, "contains", False),
+    "has_inside": ("inside", True, "inside", True),
+    "is_after": ("before", True, "before", True),
+    "is_before": ("before", False, "before", False),
+    "is_contained_by": ("contains", True, "contains", True),
+    "is_during": ("contains", True, "contains", True),
+    "is_finished_by": ("finishes", True, "finishes", True),
+    "is_inside": ("inside", False, "inside", False),
+    "is_started_by": ("starts", True, "starts", True),
+    "starts": ("starts", False, "starts", False),
+}
+
+
+def declared_later(index: TemporalIndex, node: Node) -> Set[Node]:
+    """The nodes that node is directly declared to be before, see TemporalIndex.declared_before()"""
+    return index.objects(node, TIME.before) | index.subjects(TIME.after, node)
+
+
+def declared_earlier(index: TemporalIndex, node: Node) -> Set[Node]:
+    """The nodes that node is directly declared to be after"""
+    return index.subjects(TIME.before, node) | index.objects(node, TIME.after)
+
+
+def _reverse_closure(index: TemporalIndex, node: Node, predicate: URIRef) -> Set[Node]:
+    """The nodes from which node is reached by following predicate one or more times"""
+    seen = set()
+    stack = [node]
+    while stack:
+        for s in index.subjects(predicate, stack.pop()):
+            if s not in seen:
+                seen.add(s)
+                stack.append(s)
+    return seen
+
+
+def declared_from(index: TemporalIndex, family: str, a: Node) -> Set[Node]:
+    """The nodes b that the family's relation(a, b) is declared for, other than by a chain of the family's relations.
+
+    For the 'inside' family, of an instant a inside an interval b, this may include nodes that it is not declared
+    for."""
+    found = set()
+    if family == "before":
+        for z in index.path_objects(a, TIME.hasEnd, TIME.before):
+            found.add(z)
+            found.update(index.subjects(TIME.hasBeginning, z))
+    elif family == "contains":
+        found.update(index.closure(a, TIME.intervalContains, include_self=False))
+        beginnings = set()
+        for a_beginning in index.objects(a, TIME.hasBeginning):
+            for z in declared_later(index, a_beginning):
+                beginnings.update(index.subjects(TIME.hasBeginning, z))
+        ends = set()
+        for a_end in index.objects(a, TIME.hasEnd):
+            for z in declared_earlier(index, a_end):
+                ends.update(index.subjects(TIME.hasEnd, z))
+        found.update(beginnings & ends)
+    elif family == "inside":
+        found.update(index.subjects(TIME.inside, a))
+        for z in index.objects(a, TIME.after):
+            found.update(_reverse_closure(index, z, TIME.hasBeginning))
+    if family in FAMILY_RELATIONS:
+        found.update(network(index).related(a, FAMILY_RELATIONS[family]))
+    return found
+
+
+def declared_to(index: TemporalIndex, family: str, b: Node) -> Set[Node]:
+    """The nodes a that the family's relation(a, b) is declared for, other than by a chain of the family's relations.
+
+    For the 'inside' family this may include nodes that it is not declared for."""
+    found = set()
+    if family == "before":
+        for z in index.path_objects(b, TIME.hasBeginning, TIME.after):
+            found.add(z)
+            found.update(index.subjects(TIME.hasEnd, z))
+    elif family == "contains":
+        found.update(index.closure(b, TIME.intervalDuring, include_self=False))
+    elif family == "inside":
+        found.update(index.objects(b, TIME.inside))
+        for z in index.closure(b, TIME.hasBeginning, include_self=False):
+            found.update(index.subjects(TIME.after, z))
+    if family in FAMILY_RELATIONS:
+        found.update(network(index).related(b, FAMILY_RELATIONS[family], reverse=True))
+    return found
+
+
+def chained(index: TemporalIndex, family: str, node: Node, reverse: bool) -> Set[Node]:
+    """The nodes that a chain of the family's relations leads to from node, or from which one leads to node if
+    reverse. Looked up in the family's transitive closure if one is maintained, else searched for."""
+    if family not in FAMILIES:
+        return set()
+    closure = index.closures.get(family)
+    if closure is not None:
+        return set(closure.reaching(node) if reverse else closure.reachable(node))
+
+    steps = list(FAMILIES[family])
+    if reverse:
+        steps = [(p, "inbound" if direction == "outbound" else "outbound") for p, direction in steps]
+    seen = {node}
+    frontier = {node}
+    while frontier:
+        frontier = _neighbours(index, frontier, steps) - seen
+        seen |= frontier
+    # as for _path_exists(), no node is related to itself by a chain
+    seen.discard(node)
+    return seen
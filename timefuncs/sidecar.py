@@ -0,0 +1,361 @@
+"""
+Persisted, memory-mapped resolutions of a TemporalIndex, for warm starts.
+
+Building a TemporalIndex is a single scan of a graph, but resolving it, i.e. converting every time position to a span
+(see timestamps.py), following chains of time:hasBeginning and time:hasEnd and computing the transitive closures of
+declared relations (see closure.py), is repeated by every process that queries the graph. save() writes those
+resolutions to a binary sidecar file and attach() maps one into memory for the index of a graph, so that processes
+sharing a sidecar share its pages rather than each resolving the graph again.
+
+A sidecar records the fingerprint of the temporal content of the graph it was made from (see fingerprint()) and
+attach() rejects sidecars of any other content, or of another format version. An attached sidecar is dropped when its
+graph next changes. Blank nodes are given new labels whenever a graph is parsed, so the sidecars of graphs with blank
+temporal entities only match the graph objects they were saved from.
+
+The file holds a header, a table of sections and the sections themselves: the N3 terms of the index's nodes in sorted
+order, with their offsets and a hash table of them, and for the time positions of each node and of its beginnings and
+ends, and for the reachability of each closure, offsets into arrays of 64-bit integers, in the manner of a compressed
+sparse row matrix. A sidecar may also hold the triples the index was built from, as the ids of their terms, so that a
+process may build the graph from it without parsing the graph itself (see batch.py).
+"""
+
+import io
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from hashlib import blake2b
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from rdflib import Graph, URIRef
+from rdflib.namespace import RDF, TIME
+from rdflib.util import from_n3
+
+from .closure import FAMILIES, TransitiveClosure, _bits
+from .index import Node, TemporalIndex, get_index
+from .timestamps import Span
+
+# incremented whenever the layout of sidecar files changes
+FORMAT_VERSION = 1
+
+_MAGIC = b"TFSIDECR"
+_HEADER = struct.Struct("<8sII16sI")
+_SECTION = struct.Struct("<32sQQ1s7x")
+
+# the endpoint spans kept for each node, by section name, as the (step, mode) of TemporalIndex.endpoint_spans()
+_ENDPOINTS = {
+    f"{name}.{mode}": (step, mode)
+    for name, step in (("beginning", TIME.hasBeginning), ("end", TIME.hasEnd))
+    for mode in ("direct", "zero_or_more", "one_or_more")
+}
+
+
+def _triples(index: TemporalIndex) -> Iterable[Tuple[Node, Node, Node]]:
+    """The triples an index was built from"""
+    for p, outbound in index._outbound.items():
+        for s, objects in outbound.items():
+            for o in objects:
+                yield s, p, o
+    for p, positions in index._positions.items():
+        for s, literals in positions.items():
+            for o in literals:
+                yield s, p, o
+    for c, members in index._types.items():
+        for s in members:
+            yield s, RDF.type, c
+
+
+def fingerprint(g: Union[Graph, TemporalIndex]) -> bytes:
+    """A 16-byte digest of the temporal content of a graph, independent of the order of its triples"""
+    index = g if isinstance(g, TemporalIndex) else get_index(g)
+    total = 0
+    count = 0
+    for s, p, o in dict.fromkeys(_triples(index)):
+        # IRIs as themselves, which is quicker than, and as distinct as, their N3
+        o = o if isinstance(o, URIRef) else o.n3()
+        s = s if isinstance(s, URIRef) else s.n3()
+        digest = blake2b(f"{s} {p} {o}".encode(), digest_size=16).digest()
+        total += int.from_bytes(digest, "little")
+        count += 1
+    return blake2b(total.to_bytes(24, "little") + count.to_bytes(8, "little"), digest_size=16).digest()
+
+
+def _nodes(index: TemporalIndex, triples: bool = False) -> List[Node]:
+    """The nodes of an index, and with triples the predicates, classes and literals of its triples as well"""
+    nodes = set()
+    for s, p, o in _triples(index):
+        nodes.add(s)
+        if triples:
+            nodes.update((p, o))
+        elif p in index._outbound:
+            nodes.add(o)
+    return list(nodes)
+
+
+def _rows(rows: Iterable[Sequence[int]]) -> Tuple[array, array]:
+    """The offsets and values arrays of rows of integers"""
+    offsets = array("q", [0])
+    values = array("q")
+    for row in rows:
+        values.extend(row)
+        offsets.append(len(values))
+    return offsets, values
+
+
+def _hash(term: bytes) -> int:
+    return int.from_bytes(blake2b(term, digest_size=8).digest(), "little")
+
+
+def _reachability(closure: TransitiveClosure, bitsets: List[int], ids: Dict[Node, int], nodes: List[Node]):
+    """The sorted ids of the nodes reached from, or reaching, each node, read from a closure's bitsets"""
+    ids_of = [ids[node] for node in closure._ids]
+    for node in nodes:
+        i = closure._ids.get(node)
+        yield () if i is None else sorted(ids_of[j] for j in _bits(bitsets[i]) if j != i)
+
+
+def save(g: Graph, path: Union[str, Path], families: Iterable[str] = tuple(FAMILIES), triples: bool = False):
+    """Writes the resolved temporal index of graph g, with the closures of the named relation families (by default
+    all of closure.FAMILIES), and if triples is set the triples it was built from, to a sidecar file. The file is
+    replaced atomically, so processes may go on reading the sidecar it replaces."""
+    path = Path(path)
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "wb") as f:
+        _write(f, get_index(g), families, triples)
+    os.replace(temporary, path)
+
+
+def dumps(g: Graph, families: Iterable[str] = tuple(FAMILIES), triples: bool = False) -> bytes:
+    """A sidecar of graph g, as save() writes it, as bytes"""
+    f = io.BytesIO()
+    _write(f, get_index(g), families, triples)
+    return f.getvalue()
+
+
+def _write(f: BinaryIO, index: TemporalIndex, families: Iterable[str], triples: bool):
+    terms = sorted((node.n3().encode(), node) for node in _nodes(index, triples))
+    ids = {node: i for i, (_, node) in enumerate(terms)}
+    nodes = [node for _, node in terms]
+
+    sections: Dict[str, array] = {}
+    sections["terms.offsets"] = array("q", [0])
+    sections["terms"] = array("B")
+    for term, _ in terms:
+        sections["terms"].frombytes(term)
+        sections["terms.offsets"].append(len(sections["terms"]))
+    # an open addressing hash table of the terms, each slot 0 or a term's id + 1
+    slots = array("q", [0]) * (1 << (2 * len(terms)).bit_length())
+    mask = len(slots) - 1
+    for i, (term, _) in enumerate(terms):
+        slot = _hash(term) & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = i + 1
+    sections["terms.slots"] = slots
+    sections["spans.offsets"], sections["spans"] = _rows(
+        [bound for span in index.spans(node) for bound in span] for node in nodes
+    )
+    for name, (step, mode) in _ENDPOINTS.items():
+        sections[f"{name}.offsets"], sections[name] = _rows(
+            [bound for span in index.endpoint_spans(node, step, mode) for bound in span] for node in nodes
+        )
+    for family in families:
+        closure = index.closures.get(family)
+        if not isinstance(closure, TransitiveClosure):
+            closure = index.build_closure(family)
+        for name, bitsets in (("reach", closure._reach), ("reached", closure._reached_by)):
+            sections[f"{family}.{name}.offsets"], sections[f"{family}.{name}"] = _rows(
+                _reachability(closure, bitsets, ids, nodes)
+            )
+    if triples:
+        # the ids of the subject, predicate and object of each triple in turn
+        sections["triples"] = array("q", (ids[node] for triple in _triples(index) for node in triple))
+
+    offset = _HEADER.size + _SECTION.size * len(sections)
+    table = []
+    for name, values in sections.items():
+        offset += -offset % 8
+        table.append(_SECTION.pack(name.encode(), offset, len(values), values.typecode.encode()))
+        offset += len(values) * values.itemsize
+
+    start = f.tell()
+    f.write(_HEADER.pack(_MAGIC, FORMAT_VERSION, 0, fingerprint(index), len(sections)))
+    f.write(b"".join(table))
+    for values in sections.values():
+        f.write(b"\0" * (-(f.tell() - start) % 8))
+        f.write(values.tobytes())
+
+
+class _Terms:
+    """The sorted N3 terms of a sidecar's nodes, as a sequence of bytes"""
+
+    def __init__(self, offsets: memoryview, terms: memoryview):
+        self.offsets = offsets
+        self.terms = terms
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> bytes:
+        return self.terms[self.offsets[i] : self.offsets[i + 1]].tobytes()
+
+
+class _MappedClosure:
+    """The reachability of a relation family's closure, read from a sidecar in place of a TransitiveClosure"""
+
+    def __init__(self, sidecar: "Sidecar", family: str):
+        self.sidecar = sidecar
+        self.steps = FAMILIES[family]
+        self.predicates = {p for p, _ in self.steps}
+        self._reach = sidecar._csr(f"{family}.reach")
+        self._reached = sidecar._csr(f"{family}.reached")
+
+    def reaches(self, a: Node, b: Node) -> bool:
+        ia = self.sidecar.id(a)
+        ib = self.sidecar.id(b)
+        if ia is None or ib is None:
+            return False
+        offsets, ids = self._reach
+        start, end = offsets[ia], offsets[ia + 1]
+        i = bisect_left(ids, ib, start, end)
+        return i < end and ids[i] == ib
+
+    def reachable(self, a: Node) -> List[Node]:
+        return self.sidecar._nodes(self._reach, a)
+
+    def reaching(self, b: Node) -> List[Node]:
+        return self.sidecar._nodes(self._reached, b)
+
+
+class Sidecar:
+    """A sidecar file mapped into memory, or a sidecar held in a buffer such as a block of shared memory. Its arrays are
+    views of the mapped pages, not copies of them."""
+
+    def __init__(self, path: Union[str, Path, memoryview]):
+        if isinstance(path, memoryview):
+            self.path = None
+            self._map = path
+        else:
+            self.path = Path(path)
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size:
+            raise ValueError(f"{self.path or 'The buffer'} is not a timefuncs sidecar")
+        magic, self.version, _, self.fingerprint, count = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC:
+            raise ValueError(f"{self.path or 'The buffer'} is not a timefuncs sidecar")
+
+        self._sections: Dict[str, memoryview] = {}
+        self.families: List[str] = []
+        self.closures: Dict[str, _MappedClosure] = {}
+        if self.version != FORMAT_VERSION:
+            return
+        view = memoryview(self._map)
+        for i in range(count):
+            name, offset, length, typecode = _SECTION.unpack_from(self._map, _HEADER.size + i * _SECTION.size)
+            typecode = typecode.decode()
+            size = array(typecode).itemsize
+            self._sections[name.rstrip(b"\0").decode()] = view[offset : offset + length * size].cast(typecode)
+
+        self._terms = _Terms(self._sections["terms.offsets"], self._sections["terms"])
+        self._ids: Dict[Node, Optional[int]] = {}
+        self._decoded: Dict[int, Node] = {}
+        self._endpoints = {step: self._csr(name) for name, step in _ENDPOINTS.items()}
+        self.families = [f for f in FAMILIES if f"{f}.reach" in self._sections]
+        self.closures = {family: _MappedClosure(self, family) for family in self.families}
+
+    def _csr(self, name: str) -> Tuple[memoryview, memoryview]:
+        return self._sections[f"{name}.offsets"], self._sections[name]
+
+    def id(self, node: Node) -> Optional[int]:
+        """The position of node in the sidecar's terms, None if it is not there"""
+        try:
+            return self._ids[node]
+        except KeyError:
+            pass
+        term = node.n3().encode()
+        slots = self._sections["terms.slots"]
+        mask = len(slots) - 1
+        slot = _hash(term) & mask
+        id = None
+        while slots[slot]:
+            if self._terms[slots[slot] - 1] == term:
+                id = slots[slot] - 1
+                break
+            slot = (slot + 1) & mask
+        self._ids[node] = id
+        return id
+
+    def node(self, id: int) -> Node:
+        try:
+            return self._decoded[id]
+        except KeyError:
+            node = self._decoded[id] = from_n3(self._terms[id].decode())
+            return node
+
+    def _nodes(self, csr: Tuple[memoryview, memoryview], node: Node) -> List[Node]:
+        i = self.id(node)
+        if i is None:
+            return []
+        offsets, ids = csr
+        return [self.node(ids[j]) for j in range(offsets[i], offsets[i + 1])]
+
+    def _spans(self, csr: Tuple[memoryview, memoryview], node: Node) -> Tuple[Span, ...]:
+        i = self.id(node)
+        if i is None:
+            return ()
+        offsets, bounds = csr
+        return tuple(zip(bounds[offsets[i] : offsets[i + 1] : 2], bounds[offsets[i] + 1 : offsets[i + 1] : 2]))
+
+    def spans(self, node: Node) -> Tuple[Span, ...]:
+        """As TemporalIndex.spans()"""
+        return self._spans(self._csr("spans"), node)
+
+    def endpoint_spans(self, entity: Node, step: Node, mode: str = "direct") -> Tuple[Span, ...]:
+        """As TemporalIndex.endpoint_spans()"""
+        return self._spans(self._endpoints[step, mode], entity)
+
+    def triples(self) -> Iterator[Tuple[Node, URIRef, Node]]:
+        """The triples of the index the sidecar was saved from, if saved with them"""
+        if "triples" not in self._sections:
+            raise ValueError(f"{self.path or 'The sidecar'} was saved without its triples")
+        ids = self._sections["triples"]
+        for i in range(0, len(ids), 3):
+            yield self.node(ids[i]), self.node(ids[i + 1]), self.node(ids[i + 2])
+
+    def close(self):
+        self._sections.clear()
+        self.closures.clear()
+        try:
+            if isinstance(self._map, memoryview):
+                self._map.release()
+            else:
+                self._map.close()
+        except BufferError:
+            # views of the map are still in use; it is closed when they are released
+            pass
+
+
+def attach(g: Graph, path: Union[str, Path]) -> bool:
+    """Maps the sidecar file at path into memory for the temporal index of graph g, returning True, or returns False if
+    there is no such file or it was made by another format version or from other content"""
+    try:
+        sidecar = Sidecar(path)
+    except FileNotFoundError:
+        return False
+    index = get_index(g)
+    if sidecar.version != FORMAT_VERSION or sidecar.fingerprint != fingerprint(index):
+        sidecar.close()
+        return False
+    _attach(index, sidecar)
+    return True
+
+
+def _attach(index: TemporalIndex, sidecar: Sidecar):
+    """Attaches a sidecar to an index known to hold the content it was saved from"""
+    index.sidecar = sidecar
+    for family, closure in sidecar.closures.items():
+        index.closures.setdefault(family, closure)
+    index._resolved.clear()
@@ -0,0 +1,555 @@
+"""
+A disk-backed temporal database, for data too large to query in an in-memory rdflib Graph.
+
+A TemporalDatabase extracts the Time Ontology in OWL content of a graph, or of any stream of triples, into a SQLite
+file: declared relations, types and time positions into side tables, and the extents of entities into an R*Tree. The
+relations computed by the functions in funcs.py (see relations.RELATIONS) are then answered from SQLite, for a pair of
+entities by holds() or for whole sets of them by pairs(), with range predicates over indexed endpoint bounds. The
+database is kept between processes and needs nothing beyond Python's sqlite3 module.
+
+R*Tree coordinates are 32-bit floats, rounded outwards by SQLite, so the R*Tree only narrows down the candidates for a
+relation and the exact integer spans of timestamps.py decide it.
+
+Numeric positions are compared only if timestamps.TRS converts their reference system, not on a system's own axis as
+the functions compare the positions of other systems (see index.py).
+"""
+
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from rdflib import Graph, Literal, URIRef
+from rdflib.namespace import RDF, TIME
+from rdflib.util import from_n3
+
+from .allen import FAMILY_RELATIONS, INTERVAL_PREDICATES, AllenNetwork
+from .closure import FAMILIES, Step
+from .index import POSITION_PREDICATES, RELATION_PREDICATES, TIME_POSITION_PREDICATES, TYPE_CLASSES, Node
+from .relations import RELATIONS
+from .timestamps import TRS, to_span
+
+Triple = Tuple[Node, URIRef, Node]
+
+# the version of the tables below, kept in the database's meta table
+SCHEMA_VERSION = 3
+
+# the number of triples loaded per transaction
+BATCH_SIZE = 10000
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    CREATE TABLE IF NOT EXISTS nodes (id INTEGER PRIMARY KEY, term TEXT UNIQUE NOT NULL);
+    CREATE TABLE IF NOT EXISTS triples (s INTEGER NOT NULL, p TEXT NOT NULL, o INTEGER NOT NULL, UNIQUE (p, s, o));
+    CREATE INDEX IF NOT EXISTS triples_pos ON triples (p, o, s);
+    CREATE TABLE IF NOT EXISTS types (node INTEGER NOT NULL, class TEXT NOT NULL, UNIQUE (node, class));
+    CREATE TABLE IF NOT EXISTS positions (
+        node INTEGER NOT NULL, earliest INTEGER NOT NULL, latest INTEGER NOT NULL, UNIQUE (node, earliest, latest)
+    );
+    CREATE INDEX IF NOT EXISTS positions_earliest ON positions (earliest, latest);
+    CREATE TABLE IF NOT EXISTS numeric_positions (node INTEGER NOT NULL, value TEXT NOT NULL, UNIQUE (node, value));
+
+    -- derived by build(): the spans of numeric positions, added to positions, the nodes reached from each entity by
+    -- one or more time:hasBeginning or time:hasEnd steps, the spans of beginnings and ends selected as by
+    -- TemporalIndex.endpoint_spans(), their bounds per entity, the extent of each entity from its earliest
+    -- beginning to its latest end, and the pairs of intervals between which the network of declared Allen relations
+    -- entails each relation family's relation, see allen.network()
+    CREATE TABLE IF NOT EXISTS chains (entity INTEGER NOT NULL, step TEXT NOT NULL, node INTEGER NOT NULL);
+    CREATE INDEX IF NOT EXISTS chains_entity ON chains (step, entity, node);
+    CREATE INDEX IF NOT EXISTS chains_node ON chains (step, node, entity);
+    CREATE TABLE IF NOT EXISTS endpoints (
+        entity INTEGER NOT NULL, step TEXT NOT NULL, mode TEXT NOT NULL, earliest INTEGER NOT NULL,
+        latest INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS endpoints_entity ON endpoints (step, mode, entity);
+    CREATE INDEX IF NOT EXISTS endpoints_span ON endpoints (step, mode, earliest, latest);
+    CREATE TABLE IF NOT EXISTS bounds (
+        entity INTEGER NOT NULL, step TEXT NOT NULL, mode TEXT NOT NULL, min_earliest INTEGER NOT NULL,
+        max_earliest INTEGER NOT NULL, min_latest INTEGER NOT NULL, max_latest INTEGER NOT NULL,
+        PRIMARY KEY (step, mode, entity)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS bounds_min_earliest ON bounds (step, mode, min_earliest);
+    CREATE INDEX IF NOT EXISTS bounds_max_latest ON bounds (step, mode, max_latest);
+    CREATE VIRTUAL TABLE IF NOT EXISTS extents USING rtree (id, beginning_min, beginning_max, end_min, end_max);
+    CREATE TABLE IF NOT EXISTS entailed (x INTEGER NOT NULL, family TEXT NOT NULL, y INTEGER NOT NULL);
+    CREATE INDEX IF NOT EXISTS entailed_x ON entailed (family, x, y);
+    CREATE INDEX IF NOT EXISTS entailed_y ON entailed (family, y, x);
+"""
+
+_STEPS = {"beginning": TIME.hasBeginning, "end": TIME.hasEnd}
+_INTERVALS = f"'{TIME.Interval}', '{TIME.ProperInterval}'"
+
+
+def _zero_or_more(table: str, step: str) -> str:
+    """The (entity, node) pairs of the entities in a table and the nodes reached from them by zero or more steps"""
+    return (
+        f"SELECT id AS entity, id AS node FROM {table} UNION ALL "
+        f"SELECT c.entity, c.node FROM {table} JOIN chains AS c ON c.step = '{step}' AND c.entity = {table}.id"
+    )
+
+
+def _reach(steps: Iterable[Step]) -> str:
+    """The pairs (x, y), x from table xs and y from ys, between which a chain of one or more of the steps leads. x and
+    y may be the same entity, if a chain leads back to it."""
+
+    def step(table: str, origin: str, node: str) -> str:
+        return " UNION ".join(
+            (
+                f"SELECT {origin}, t.o FROM {table} JOIN triples AS t ON t.p = '{p}' AND t.s = {node}"
+                if direction == "outbound"
+                else f"SELECT {origin}, t.s FROM {table} JOIN triples AS t ON t.p = '{p}' AND t.o = {node}"
+            )
+            for p, direction in steps
+        )
+
+    return f"""
+        WITH RECURSIVE reach (origin, node) AS (
+            {step("xs", "xs.id", "xs.id")} UNION {step("reach AS r", "r.origin", "r.node")}
+        )
+        SELECT origin, node FROM reach JOIN ys ON ys.id = node
+    """
+
+
+def _chained(family: str) -> str:
+    """The pairs (x, y), x from table xs and y from ys, between which a chain of the family's declared relations
+    leads, see relations.chained()"""
+    return _reach(FAMILIES[family]) + " WHERE origin != node"
+
+
+# the pairs (x, y), x from table xs and y from ys, between which the network of declared Allen relations entails a
+# family's relation
+_ENTAILED = (
+    "SELECT e.x, e.y FROM entailed AS e JOIN xs ON xs.id = e.x JOIN ys ON ys.id = e.y WHERE e.family = '{family}'"
+)
+
+# the pairs (x, y), x from table xs and y from ys, that relations are calculated for, see relations.RELATIONS
+_CALCULATED: Dict[str, str] = {
+    # as is_before(): the latest end of x before the earliest beginning of y
+    "before": """
+        SELECT xe.entity, yb.entity FROM xs
+        JOIN bounds AS xe ON xe.step = 'end' AND xe.mode = 'zero_or_more' AND xe.entity = xs.id
+        JOIN bounds AS yb ON yb.step = 'beginning' AND yb.mode = 'zero_or_more' AND yb.min_earliest > xe.max_latest
+        JOIN ys ON ys.id = yb.entity
+    """,
+    # as contains(): a beginning of x before a beginning of y, and an end of y before an end of x, the R*Tree finding
+    # the candidate ys for each x
+    "contains": """
+        SELECT xb.entity, y.id FROM xs
+        CROSS JOIN bounds AS xb ON xb.step = 'beginning' AND xb.mode = 'direct' AND xb.entity = xs.id
+        CROSS JOIN bounds AS xe ON xe.step = 'end' AND xe.mode = 'direct' AND xe.entity = xb.entity
+        CROSS JOIN extents AS y ON y.beginning_max > xb.min_latest AND y.end_min < xe.max_earliest
+        JOIN ys ON ys.id = y.id
+        JOIN bounds AS yb ON yb.step = 'beginning' AND yb.mode = 'direct' AND yb.entity = y.id
+        JOIN bounds AS ye ON ye.step = 'end' AND ye.mode = 'direct' AND ye.entity = y.id
+        WHERE xb.min_latest < yb.max_earliest AND ye.min_latest < xe.max_earliest
+    """,
+    # as has_inside(y, x): a time position of x after a beginning and before an end of y, the R*Tree finding the
+    # candidate ys for each x
+    "inside": """
+        SELECT DISTINCT p.node, y.id FROM xs
+        CROSS JOIN positions AS p ON p.node = xs.id
+        CROSS JOIN extents AS y ON y.beginning_min < p.earliest AND y.end_max > p.latest
+        JOIN ys ON ys.id = y.id
+        JOIN bounds AS yb ON yb.step = 'beginning' AND yb.mode = 'one_or_more' AND yb.entity = y.id
+        JOIN bounds AS ye ON ye.step = 'end' AND ye.mode = 'one_or_more' AND ye.entity = y.id
+        WHERE yb.min_latest < p.earliest AND p.latest < ye.max_earliest
+    """,
+    # as starts(): coincident beginnings and the end of x before the end of y, each beginning before its end
+    "starts": """
+        SELECT DISTINCT xb.entity, yb.entity FROM xs
+        JOIN endpoints AS xb ON xb.step = 'beginning' AND xb.mode = 'direct' AND xb.entity = xs.id
+        JOIN endpoints AS yb ON yb.step = 'beginning' AND yb.mode = 'direct' AND yb.earliest = xb.earliest
+            AND yb.latest = xb.latest
+        JOIN ys ON ys.id = yb.entity
+        JOIN endpoints AS xe ON xe.step = 'end' AND xe.mode = 'direct' AND xe.entity = xb.entity
+        JOIN endpoints AS ye ON ye.step = 'end' AND ye.mode = 'direct' AND ye.entity = yb.entity
+        WHERE xe.latest < ye.earliest AND xb.latest < xe.earliest AND yb.latest < ye.earliest
+    """,
+    # as finishes(): the beginning of x after the beginning of y and coincident ends, each beginning before its end
+    "finishes": """
+        SELECT DISTINCT xe.entity, ye.entity FROM xs
+        JOIN endpoints AS xe ON xe.step = 'end' AND xe.mode = 'direct' AND xe.entity = xs.id
+        JOIN endpoints AS ye ON ye.step = 'end' AND ye.mode = 'direct' AND ye.earliest = xe.earliest
+            AND ye.latest = xe.latest
+        JOIN ys ON ys.id = ye.entity
+        JOIN endpoints AS xb ON xb.step = 'beginning' AND xb.mode = 'direct' AND xb.entity = xe.entity
+        JOIN endpoints AS yb ON yb.step = 'beginning' AND yb.mode = 'direct' AND yb.entity = ye.entity
+        WHERE xb.earliest > yb.latest AND xb.latest < xe.earliest AND yb.latest < ye.earliest
+    """,
+}
+
+# the same calculations starting from each y, for when there are fewer ys than xs
+_CALCULATED_FROM_Y: Dict[str, str] = {
+    "contains": """
+        SELECT x.id, yb.entity FROM ys
+        CROSS JOIN bounds AS yb ON yb.step = 'beginning' AND yb.mode = 'direct' AND yb.entity = ys.id
+        CROSS JOIN bounds AS ye ON ye.step = 'end' AND ye.mode = 'direct' AND ye.entity = yb.entity
+        CROSS JOIN extents AS x ON x.beginning_min < yb.max_earliest AND x.end_max > ye.min_latest
+        JOIN xs ON xs.id = x.id
+        JOIN bounds AS xb ON xb.step = 'beginning' AND xb.mode = 'direct' AND xb.entity = x.id
+        JOIN bounds AS xe ON xe.step = 'end' AND xe.mode = 'direct' AND xe.entity = x.id
+        WHERE xb.min_latest < yb.max_earliest AND ye.min_latest < xe.max_earliest
+    """,
+    "inside": """
+        SELECT DISTINCT p.node, ys.id FROM ys
+        CROSS JOIN bounds AS yb ON yb.step = 'beginning' AND yb.mode = 'one_or_more' AND yb.entity = ys.id
+        CROSS JOIN bounds AS ye ON ye.step = 'end' AND ye.mode = 'one_or_more' AND ye.entity = ys.id
+        CROSS JOIN positions AS p INDEXED BY positions_earliest ON p.earliest > yb.min_latest
+            AND p.latest < ye.max_earliest
+        JOIN xs ON xs.id = p.node
+    """,
+}
+
+# the pairs (x, y) of nodes directly declared before one another, see TemporalIndex.declared_before()
+_DECLARED_BEFORE = (
+    f"SELECT s AS x, o AS y FROM triples WHERE p = '{TIME.before}' "
+    f"UNION SELECT o, s FROM triples WHERE p = '{TIME.after}'"
+)
+
+# the pairs (x, y), x from table xs and y from ys, that a family's relation is declared for other than by a chain of
+# its relations, see relations.declared_from() and declared_to()
+_DECLARED: Dict[str, Tuple[str, ...]] = {
+    "before": (
+        # x, or an end of x, declared before y or a beginning of y
+        f"""
+        WITH later (x, z) AS (
+            SELECT c.entity, t.o FROM ({_zero_or_more("xs", "end")}) AS c
+            JOIN triples AS t ON t.p = '{TIME.before}' AND t.s = c.node
+        )
+        SELECT x, z FROM later JOIN ys ON ys.id = z
+        UNION SELECT l.x, b.s FROM later AS l
+        JOIN triples AS b ON b.p = '{TIME.hasBeginning}' AND b.o = l.z JOIN ys ON ys.id = b.s
+        """,
+        # y, or a beginning of y, declared after x or an end of x
+        f"""
+        WITH earlier (y, z) AS (
+            SELECT c.entity, t.o FROM ({_zero_or_more("ys", "beginning")}) AS c
+            JOIN triples AS t ON t.p = '{TIME.after}' AND t.s = c.node
+        )
+        SELECT z, y FROM earlier JOIN xs ON xs.id = z
+        UNION SELECT e.s, l.y FROM earlier AS l
+        JOIN triples AS e ON e.p = '{TIME.hasEnd}' AND e.o = l.z JOIN xs ON xs.id = e.s
+        """,
+    ),
+    "contains": (
+        # x declared to contain y, or y during x, directly or by a property path, see funcs._contains_declared()
+        _reach([(TIME.intervalContains, "outbound")]),
+        _reach([(TIME.intervalDuring, "inbound")]),
+        # a beginning of x declared before a beginning of y, and an end of y before an end of x
+        f"""
+        SELECT DISTINCT xb.s, yb.s FROM xs
+        JOIN triples AS xb ON xb.p = '{TIME.hasBeginning}' AND xb.s = xs.id
+        JOIN ({_DECLARED_BEFORE}) AS bb ON bb.x = xb.o
+        JOIN triples AS yb ON yb.p = '{TIME.hasBeginning}' AND yb.o = bb.y
+        JOIN ys ON ys.id = yb.s
+        WHERE EXISTS (
+            SELECT 1 FROM triples AS xe
+            JOIN ({_DECLARED_BEFORE}) AS ee ON ee.y = xe.o
+            JOIN triples AS ye ON ye.p = '{TIME.hasEnd}' AND ye.o = ee.x AND ye.s = yb.s
+            WHERE xe.p = '{TIME.hasEnd}' AND xe.s = xb.s
+        )
+        """,
+    ),
+    "inside": (
+        # y declared to have x inside it
+        f"SELECT t.o, t.s FROM xs JOIN triples AS t ON t.p = '{TIME.inside}' AND t.o = xs.id JOIN ys ON ys.id = t.s",
+        # x declared after a beginning and before an end of y
+        f"""
+        SELECT DISTINCT a.s, cb.entity FROM xs
+        JOIN triples AS a ON a.p = '{TIME.after}' AND a.s = xs.id
+        JOIN chains AS cb ON cb.step = 'beginning' AND cb.node = a.o
+        JOIN ys ON ys.id = cb.entity
+        WHERE EXISTS (
+            SELECT 1 FROM triples AS b JOIN chains AS ce ON ce.step = 'end' AND ce.node = b.o AND ce.entity = cb.entity
+            WHERE b.p = '{TIME.before}' AND b.s = a.s
+        )
+        """,
+    ),
+}
+
+
+class TemporalDatabase:
+    """The temporal content of graphs in a SQLite database file, or in memory if path is ':memory:'"""
+
+    def __init__(self, path: Union[str, Path] = ":memory:"):
+        self.path = path
+        # transactions are begun explicitly, see _transaction()
+        self.connection = sqlite3.connect(str(path), isolation_level=None)
+        self.connection.executescript(_SCHEMA)
+        version = self._meta("schema_version")
+        if version is None:
+            self.connection.execute(
+                "INSERT INTO meta (key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),)
+            )
+        elif int(version) != SCHEMA_VERSION:
+            self.connection.close()
+            raise ValueError(f"{path} is a timefuncs database of schema version {version}, not {SCHEMA_VERSION}")
+        self._ids: Dict[Node, int] = {}
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> "TemporalDatabase":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        """The number of temporal triples loaded"""
+        return sum(
+            self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("triples", "types", "positions")
+        )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        self.connection.execute("BEGIN")
+        try:
+            yield self.connection
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def _id(self, node: Node) -> int:
+        """The id of node, which is added to the nodes table if need be"""
+        try:
+            return self._ids[node]
+        except KeyError:
+            pass
+        term = node.n3()
+        cursor = self.connection.execute("INSERT OR IGNORE INTO nodes (term) VALUES (?)", (term,))
+        if cursor.rowcount:
+            id = cursor.lastrowid
+        else:
+            id = self.connection.execute("SELECT id FROM nodes WHERE term = ?", (term,)).fetchone()[0]
+        self._ids[node] = id
+        return id
+
+    def _lookup(self, node: Node) -> Optional[int]:
+        """The id of node, None if it is not in the database"""
+        if node in self._ids:
+            return self._ids[node]
+        row = self.connection.execute("SELECT id FROM nodes WHERE term = ?", (node.n3(),)).fetchone()
+        return None if row is None else row[0]
+
+    def _terms(self, ids: Iterable[int]) -> Dict[int, Node]:
+        terms = {}
+        ids = list(ids)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            query = f"SELECT id, term FROM nodes WHERE id IN ({', '.join('?' * len(chunk))})"
+            for id, term in self.connection.execute(query, chunk):
+                terms[id] = from_n3(term)
+        return terms
+
+    def load(self, triples: Union[Graph, Iterable[Triple]]):
+        """Adds the temporal triples among triples, e.g. a graph or a parser's output, then rebuilds the derived
+        tables. Triples are consumed as they come, so need not all be held in memory."""
+        relations = set(RELATION_PREDICATES + TIME_POSITION_PREDICATES)
+        positions = set(POSITION_PREDICATES)
+        classes = set(TYPE_CLASSES)
+        if isinstance(triples, Graph):
+            triples = triples.triples((None, None, None))
+
+        triples = iter(triples)
+        more = True
+        while more:
+            more = False
+            with self._transaction() as connection:
+                for n, (s, p, o) in enumerate(triples, 1):
+                    if p in relations:
+                        connection.execute(
+                            "INSERT OR IGNORE INTO triples (s, p, o) VALUES (?, ?, ?)",
+                            (self._id(s), str(p), self._id(o)),
+                        )
+                    elif p in positions and isinstance(o, Literal):
+                        span = to_span(o)
+                        if span is not None:
+                            connection.execute(
+                                "INSERT OR IGNORE INTO positions (node, earliest, latest) VALUES (?, ?, ?)",
+                                (self._id(s), span[0], span[1]),
+                            )
+                    elif p == TIME.numericPosition and isinstance(o, Literal):
+                        connection.execute(
+                            "INSERT OR IGNORE INTO numeric_positions (node, value) VALUES (?, ?)",
+                            (self._id(s), str(o)),
+                        )
+                    elif p == RDF.type and o in classes:
+                        connection.execute(
+                            "INSERT OR IGNORE INTO types (node, class) VALUES (?, ?)", (self._id(s), str(o))
+                        )
+                    if n == BATCH_SIZE:
+                        more = True
+                        break
+        self.build()
+
+    def build(self):
+        """Derives the chains, endpoints, bounds, extents and entailed tables from the loaded triples"""
+        with self._transaction() as connection:
+            # numeric positions in the temporal reference systems of timestamps.TRS, as positions of their instants
+            numeric = connection.execute(
+                """
+                SELECT t.s, trs.term, n.value FROM triples AS t
+                JOIN triples AS h ON h.p = ? AND h.s = t.o
+                JOIN nodes AS trs ON trs.id = h.o
+                JOIN numeric_positions AS n ON n.node = t.o
+                WHERE t.p = ?
+                """,
+                (str(TIME.hasTRS), str(TIME.inTimePosition)),
+            ).fetchall()
+            for node, trs, value in numeric:
+                convert = TRS.get(from_n3(trs))
+                span = None if convert is None else convert(Literal(value))
+                if span is not None:
+                    connection.execute(
+                        "INSERT OR IGNORE INTO positions (node, earliest, latest) VALUES (?, ?, ?)",
+                        (node, span[0], span[1]),
+                    )
+            for table in ("chains", "endpoints", "bounds", "extents", "entailed"):
+                connection.execute(f"DELETE FROM {table}")
+            declared = connection.execute(
+                f"SELECT s, p, o FROM triples WHERE p IN ({', '.join('?' * len(INTERVAL_PREDICATES))})",
+                [str(p) for p in INTERVAL_PREDICATES],
+            )
+            network = AllenNetwork((s, URIRef(p), o) for s, p, o in declared)
+            for family, relation in FAMILY_RELATIONS.items():
+                connection.executemany(
+                    "INSERT INTO entailed (x, family, y) VALUES (?, ?, ?)",
+                    ((x, family, y) for x in network for y in network.related(x, relation)),
+                )
+            for step, predicate in _STEPS.items():
+                connection.execute(
+                    f"""
+                    INSERT INTO chains (entity, step, node)
+                    WITH RECURSIVE chain (entity, node) AS (
+                        SELECT s, o FROM triples WHERE p = :predicate
+                        UNION SELECT c.entity, t.o FROM chain AS c
+                        JOIN triples AS t ON t.p = :predicate AND t.s = c.node
+                    )
+                    SELECT entity, '{step}', node FROM chain
+                    """,
+                    {"predicate": str(predicate)},
+                )
+                connection.execute(
+                    f"""
+                    INSERT INTO endpoints (entity, step, mode, earliest, latest)
+                    SELECT t.s, '{step}', 'direct', p.earliest, p.latest FROM triples AS t
+                    JOIN positions AS p ON p.node = t.o WHERE t.p = ?
+                    UNION ALL SELECT c.entity, '{step}', 'one_or_more', p.earliest, p.latest FROM chains AS c
+                    JOIN positions AS p ON p.node = c.node WHERE c.step = '{step}'
+                    """,
+                    (str(predicate),),
+                )
+                connection.execute(
+                    f"""
+                    INSERT INTO endpoints (entity, step, mode, earliest, latest)
+                    SELECT entity, '{step}', 'zero_or_more', earliest, latest FROM endpoints
+                    WHERE step = '{step}' AND mode = 'one_or_more'
+                    UNION SELECT node, '{step}', 'zero_or_more', earliest, latest FROM positions
+                    """
+                )
+            connection.execute(
+                """
+                INSERT INTO bounds (entity, step, mode, min_earliest, max_earliest, min_latest, max_latest)
+                SELECT entity, step, mode, MIN(earliest), MAX(earliest), MIN(latest), MAX(latest) FROM endpoints
+                GROUP BY step, mode, entity
+                """
+            )
+            connection.execute(
+                """
+                INSERT INTO extents (id, beginning_min, beginning_max, end_min, end_max)
+                SELECT b.entity, b.min_earliest, b.max_latest, e.min_earliest, e.max_latest FROM bounds AS b
+                JOIN bounds AS e ON e.step = 'end' AND e.mode = 'one_or_more' AND e.entity = b.entity
+                WHERE b.step = 'beginning' AND b.mode = 'one_or_more'
+                """
+            )
+            connection.execute("ANALYZE")
+
+    def _fill(self, table: str, nodes: Optional[List[Node]]):
+        """Fills a temporary table with the ids of nodes, or of every node in the database if nodes is None"""
+        self.connection.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY)")
+        self.connection.execute(f"DELETE FROM {table}")
+        if nodes is None:
+            self.connection.execute(f"INSERT INTO {table} (id) SELECT id FROM nodes")
+        else:
+            ids = ((id,) for id in map(self._lookup, nodes) if id is not None)
+            self.connection.executemany(f"INSERT OR IGNORE INTO {table} (id) VALUES (?)", ids)
+        # lets the query planner choose which of xs and ys to start from
+        self.connection.execute(f"ANALYZE temp.{table}")
+
+    def _select(
+        self, query: Union[str, Tuple[str, str]], xs: Optional[List[Node]], ys: Optional[List[Node]], transposed: bool
+    ) -> Set[Tuple[int, int]]:
+        """The pairs of ids (x, y) selected by a query over tables xs and ys, or (y, x) if transposed"""
+        self._fill("xs", ys if transposed else xs)
+        self._fill("ys", xs if transposed else ys)
+        if isinstance(query, tuple):
+            # (from x, from y) queries, started from whichever of xs and ys is smaller
+            count = "SELECT COUNT(*) FROM {}"
+            smaller = (
+                self.connection.execute(count.format("ys")).fetchone()
+                < self.connection.execute(count.format("xs")).fetchone()
+            )
+            query = query[smaller]
+        rows = self.connection.execute(query)
+        return {(y, x) for x, y in rows} if transposed else set(rows)
+
+    def pairs(
+        self, function: str, xs: Optional[Iterable[Node]] = None, ys: Optional[Iterable[Node]] = None
+    ) -> Set[Tuple[Node, Node]]:
+        """The pairs (x, y), x from xs and y from ys, or from every entity in the database if not given, of which the
+        function of funcs.py of the given name is true, e.g. 'is_before'. The functions of relations.RELATIONS are
+        supported."""
+        if function not in RELATIONS:
+            raise ValueError(f"Unknown function {function!r}, expected one of {sorted(RELATIONS)}")
+        calculation, calculated_transposed, family, declared_transposed = RELATIONS[function]
+        xs = None if xs is None else list(xs)
+        ys = None if ys is None else list(ys)
+
+        calculated = _CALCULATED[calculation]
+        if calculation in _CALCULATED_FROM_Y:
+            calculated = (calculated, _CALCULATED_FROM_Y[calculation])
+        found = self._select(calculated, xs, ys, calculated_transposed)
+        for query in _DECLARED.get(family, ()):
+            found |= self._select(query, xs, ys, declared_transposed)
+        if family in FAMILIES:
+            found |= self._select(_chained(family), xs, ys, declared_transposed)
+        if family in FAMILY_RELATIONS:
+            found |= self._select(_ENTAILED.format(family=family), xs, ys, declared_transposed)
+
+        if found and (family == "inside" or calculation in ("starts", "finishes")):
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS found (x INTEGER, y INTEGER)")
+            self.connection.execute("DELETE FROM found")
+            self.connection.executemany("INSERT INTO found (x, y) VALUES (?, ?)", found)
+            if family == "inside":
+                # neither is inside the other if one is declared before or after the other
+                found -= set(
+                    self.connection.execute(
+                        f"SELECT f.x, f.y FROM found AS f JOIN triples AS t ON t.s = f.x AND t.o = f.y "
+                        f"AND t.p IN ('{TIME.before}', '{TIME.after}')"
+                    )
+                )
+            else:
+                # these functions are only true of intervals
+                found = set(
+                    self.connection.execute(
+                        f"""
+                        SELECT f.x, f.y FROM found AS f
+                        WHERE EXISTS (SELECT 1 FROM types WHERE node = f.x AND class IN ({_INTERVALS}))
+                        AND EXISTS (SELECT 1 FROM types WHERE node = f.y AND class IN ({_INTERVALS}))
+                        """
+                    )
+                )
+
+        terms = self._terms({id for pair in found for id in pair})
+        return {(terms[x], terms[y]) for x, y in found}
+
+    def holds(self, function: str, a: Node, b: Node) -> bool:
+        """True if the function of funcs.py of the given name is true of a and b"""
+        return (a, b) in self.pairs(function, [a], [b])
@@ -0,0 +1,179 @@
+"""
+Opt-in instrumentation of the functions in funcs.py.
+
+When enabled, each call of a function is counted with its wall time, the number of triples it touched and the rule
+that decided its answer:
+
+    declared    a relation declared between the entities, or between their endpoints, directly or by a property path
+                such as time:hasEnd/time:before
+    calculated  the time positions of the entities' endpoints
+    path        a chain of declared relations found by a transitive search, see paths.py
+    network     the path consistent network of the Allen relations declared between intervals, see allen.network()
+    allen       the possible Allen relations between the entities, see allen.py
+    cache       an answer cached earlier, see cache.py
+    none        no rule held, so the answer is false
+
+Triples touched are the index entries read by TemporalIndex lookups, counted by replacing its lookup methods with
+counting ones while instrumentation is enabled. When it is disabled each call costs one extra flag test.
+
+    from timefuncs import stats
+
+    with stats.collecting() as collected:
+        g.query(q)
+    print(collected["is_before"].rules)
+
+Functions called by others, e.g. contains() by its alias has_during(), are counted for each. Calls may be made from
+several threads at once, e.g. by an aio.Evaluator: each thread counts the triples and rules of its own calls, and
+adds them to the statistics under a lock.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterator, List
+
+from .index import TemporalIndex
+
+RULES = ("declared", "calculated", "path", "network", "allen", "cache", "none")
+
+enabled = False
+
+
+class _Calls(threading.local):
+    """A thread's calls in progress: the number of triples it has touched so far, while enabled, and the rule deciding
+    each call, innermost last"""
+
+    def __init__(self):
+        self.touched = 0
+        self.deciding: List[str] = []
+
+
+_calls = _Calls()
+
+
+class FunctionStats:
+    """The calls of one function"""
+
+    __slots__ = ("calls", "seconds", "triples", "rules")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.triples = 0
+        self.rules: Dict[str, int] = dict.fromkeys(RULES, 0)
+
+    def as_dict(self) -> dict:
+        return {"calls": self.calls, "seconds": self.seconds, "triples": self.triples, "rules": dict(self.rules)}
+
+    def __repr__(self):
+        return f"FunctionStats({self.as_dict()})"
+
+
+_stats: Dict[str, FunctionStats] = {}
+
+# guards _stats, and enabling or disabling instrumentation
+_lock = threading.Lock()
+
+
+def _counting(lookup: Callable, size: Callable) -> Callable:
+    @wraps(lookup)
+    def counted(*args, **kwargs):
+        result = lookup(*args, **kwargs)
+        _calls.touched += size(result)
+        return result
+
+    counted.uncounted = lookup
+    return counted
+
+
+# the TemporalIndex lookups counted, with the number of triples each result stands for
+_LOOKUPS: Dict[str, Callable] = {
+    "objects": len,
+    "subjects": len,
+    "has": lambda result: 1,
+    "positions": len,
+    "closure": len,
+}
+
+
+def enable():
+    """Starts instrumenting calls, adding to the statistics collected so far"""
+    global enabled
+    with _lock:
+        if enabled:
+            return
+        for name, size in _LOOKUPS.items():
+            setattr(TemporalIndex, name, _counting(getattr(TemporalIndex, name), size))
+        enabled = True
+
+
+def disable():
+    """Stops instrumenting calls, keeping the statistics collected"""
+    global enabled
+    with _lock:
+        if not enabled:
+            return
+        for name in _LOOKUPS:
+            setattr(TemporalIndex, name, getattr(TemporalIndex, name).uncounted)
+        enabled = False
+
+
+def reset():
+    """Discards the statistics collected, e.g. before each query"""
+    with _lock:
+        _stats.clear()
+
+
+def get_stats() -> Dict[str, FunctionStats]:
+    """The statistics collected, by function name. Functions not yet called are absent."""
+    return _stats
+
+
+@contextmanager
+def collecting() -> Iterator[Dict[str, FunctionStats]]:
+    """Collects statistics afresh for the duration of a with block, yielding them"""
+    was_enabled = enabled
+    reset()
+    enable()
+    try:
+        yield _stats
+    finally:
+        if not was_enabled:
+            disable()
+
+
+def decided(rule: str):
+    """Records the rule deciding the answer of the innermost call in progress in this thread"""
+    deciding = _calls.deciding
+    if deciding:
+        deciding[-1] = rule
+
+
+def instrumented(func: Callable) -> Callable:
+    """Decorates a SPARQL function of funcs.py to be measured while instrumentation is enabled"""
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(e, ctx):
+        if not enabled:
+            return func(e, ctx)
+
+        touched = _calls.touched
+        _calls.deciding.append("none")
+        start = time.perf_counter()
+        try:
+            return func(e, ctx)
+        finally:
+            seconds = time.perf_counter() - start
+            rule = _calls.deciding.pop()
+            with _lock:
+                stats = _stats.get(name)
+                if stats is None:
+                    stats = _stats[name] = FunctionStats()
+                stats.calls += 1
+                stats.seconds += seconds
+                stats.triples += _calls.touched - touched
+                stats.rules[rule] += 1
+
+    return wrapper
@@ -0,0 +1,103 @@
+"""
+Synthetic OWL TIME data, for benchmarking and testing the functions at scale.
+
+generate() makes a graph of time:Instant and time:ProperInterval entities laid out over a time line. Each instant,
+including each interval's beginning and end, is given a time position (with a datatype chosen from a weighted mix) or
+is left to be ordered only by declarations: runs of instants consecutive on the time line are linked by time:before
+chains of a given depth, some of which are closed into cycles as found in inconsistent real-world data.
+
+The same arguments always make the same graph.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from rdflib import Graph, Literal, Namespace, URIRef
+from rdflib.namespace import RDF, TIME, XSD
+
+SYNTHETIC = Namespace("https://w3id.org/timefuncs/testdata/synthetic/")
+
+# the time position predicates and the datatype and format of their literals
+DATATYPES: Dict[URIRef, Tuple[URIRef, str]] = {
+    TIME.inXSDDateTimeStamp: (XSD.dateTimeStamp, "%Y-%m-%dT%H:%M:%SZ"),
+    TIME.inXSDDateTime: (XSD.dateTime, "%Y-%m-%dT%H:%M:%S"),
+    TIME.inXSDDate: (XSD.date, "%Y-%m-%d"),
+    TIME.inXSDgYearMonth: (XSD.gYearMonth, "%Y-%m"),
+    TIME.inXSDgYear: (XSD.gYear, "%Y"),
+}
+
+# the first time position, and the time between the positions of consecutive standalone instants
+EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+STEP = timedelta(hours=1)
+
+
+def _position(g: Graph, node: URIRef, when: datetime, predicate: URIRef):
+    datatype, format = DATATYPES[predicate]
+    g.add((node, predicate, Literal(when.strftime(format), datatype=datatype)))
+
+
+def generate(
+    instants: int = 1000,
+    intervals: int = 1000,
+    chain_depth: int = 3,
+    cycle_rate: float = 0.0,
+    timestamped: float = 0.8,
+    datatypes: Optional[Dict[URIRef, float]] = None,
+    max_length: int = 48,
+    seed: int = 0,
+) -> Graph:
+    """A graph of the given numbers of standalone instants and of intervals, each interval with its own beginning and
+    end instants and lasting from 1 to max_length STEPs.
+
+    chain_depth is the number of time:before links in each chain of instants consecutive on the time line, 0 for none,
+    and cycle_rate the share of chains whose last instant is also declared before its first. timestamped is the share
+    of instants given a time position, the predicate for which is chosen from datatypes, a dict of predicates of
+    DATATYPES to their weights (by default all time:inXSDDateTimeStamp)."""
+    rng = random.Random(seed)
+    datatypes = datatypes or {TIME.inXSDDateTimeStamp: 1.0}
+    predicates = list(datatypes)
+    weights = [datatypes[p] for p in predicates]
+    horizon = max(instants, intervals, 1)
+
+    g = Graph()
+    g.bind("time", TIME)
+    g.bind("syn", SYNTHETIC)
+
+    # each instant with its position on the time line, in STEPs from EPOCH
+    timeline: List[Tuple[int, URIRef]] = []
+    for i in range(instants):
+        instant = SYNTHETIC[f"instant{i}"]
+        g.add((instant, RDF.type, TIME.Instant))
+        timeline.append((i, instant))
+
+    for i in range(intervals):
+        interval = SYNTHETIC[f"interval{i}"]
+        beginning = SYNTHETIC[f"interval{i}-beginning"]
+        end = SYNTHETIC[f"interval{i}-end"]
+        g.add((interval, RDF.type, TIME.ProperInterval))
+        g.add((interval, TIME.hasBeginning, beginning))
+        g.add((interval, TIME.hasEnd, end))
+        g.add((beginning, RDF.type, TIME.Instant))
+        g.add((end, RDF.type, TIME.Instant))
+        start = rng.randrange(horizon)
+        timeline.append((start, beginning))
+        timeline.append((start + rng.randint(1, max_length), end))
+
+    for steps, instant in timeline:
+        if rng.random() < timestamped:
+            predicate = rng.choices(predicates, weights)[0]
+            _position(g, instant, EPOCH + steps * STEP, predicate)
+
+    if chain_depth > 0:
+        timeline.sort(key=lambda t: t[0])
+        for first in range(0, len(timeline), chain_depth + 1):
+            chain = timeline[first : first + chain_depth + 1]
+            for earlier, later in zip(chain, chain[1:]):
+                # instants at the same position are not declared before one another
+                if earlier[0] < later[0]:
+                    g.add((earlier[1], TIME.before, later[1]))
+            if len(chain) > 1 and rng.random() < cycle_rate:
+                g.add((chain[-1][1], TIME.before, chain[0][1]))
+
+    return g
@@ -0,0 +1,167 @@
+"""
+Canonical numeric forms of XSD date and time literals.
+
+Comparing rdflib Literals is slow and only meaningful between literals of the same datatype, so an xsd:date cannot be
+compared with an xsd:dateTime, nor can literals differing only in their timezone be ordered correctly. Here every
+literal given by time:inXSDDateTimeStamp, time:inXSDDateTime, time:inXSDDate, time:inXSDgYearMonth or
+time:inXSDgYear is converted, once, to the span of time it denotes: a pair of integers (earliest, latest) counting
+microseconds since 1970-01-01T00:00:00Z. A date- or time-stamp denotes a single microsecond, so earliest == latest; a
+date, year-month or year denotes every microsecond in that day, month or year.
+
+Values without a timezone are taken to be in UTC.
+
+The conversion is made from the literal's lexical form, whatever its datatype, since data often gives time positions
+as plain literals. Conversions are cached in a bounded LRU cache keyed by lexical form.
+
+A time position may instead be given as a time:numericPosition in a temporal reference system, the time:hasTRS of a
+time:inTimePosition node. Those of the systems in TRS, by default only Unix time, are converted to spans too, so they
+compare with XSD literals and with each other. Those of other systems are compared only with positions in the same
+system, see index.py.
+"""
+
+import re
+from decimal import ROUND_FLOOR, Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+from rdflib import Literal, URIRef
+
+# the number of distinct lexical forms whose conversions are kept
+CACHE_SIZE = 2**16
+
+MICROSECONDS_PER_SECOND = 1_000_000
+MICROSECONDS_PER_DAY = 86_400 * MICROSECONDS_PER_SECOND
+
+Span = Tuple[int, int]
+
+_TIMEZONE = r"(Z|[+-]\d{2}:\d{2})?"
+_DATE_TIME = re.compile(r"(-?\d{4,})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(?:\.(\d+))?" + _TIMEZONE)
+_DATE = re.compile(r"(-?\d{4,})-(\d{2})-(\d{2})" + _TIMEZONE)
+_G_YEAR_MONTH = re.compile(r"(-?\d{4,})-(\d{2})" + _TIMEZONE)
+_G_YEAR = re.compile(r"(-?\d{4,})" + _TIMEZONE)
+
+
+def _days_from_civil(year: int, month: int, day: int) -> int:
+    """The number of days from 1970-01-01 to the given proleptic Gregorian date, for any year"""
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def _days_in_month(year: int, month: int) -> int:
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return _days_from_civil(next_year, next_month, 1) - _days_from_civil(year, month, 1)
+
+
+def _is_date(year: int, month: int, day: int) -> bool:
+    """True if the month and day are those of a date in the year, e.g. not 2021-02-29 or 2021-04-31"""
+    return 1 <= month <= 12 and 1 <= day <= _days_in_month(year, month)
+
+
+def _offset(timezone: Optional[str]) -> int:
+    """The offset of a timezone from UTC in microseconds"""
+    if not timezone or timezone == "Z":
+        return 0
+    sign = -1 if timezone[0] == "-" else 1
+    return sign * (int(timezone[1:3]) * 3600 + int(timezone[4:6]) * 60) * MICROSECONDS_PER_SECOND
+
+
+def _day_span(year: int, month: int, day: int, timezone: Optional[str], days: int) -> Span:
+    start = _days_from_civil(year, month, day) * MICROSECONDS_PER_DAY - _offset(timezone)
+    return start, start + days * MICROSECONDS_PER_DAY - 1
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse(lexical: str) -> Optional[Span]:
+    lexical = lexical.strip()
+
+    m = _DATE_TIME.fullmatch(lexical)
+    if m is not None:
+        year, month, day, hour, minute, second, fraction, timezone = m.groups()
+        year, month, day, hour, minute, second = int(year), int(month), int(day), int(hour), int(minute), int(second)
+        if not _is_date(year, month, day) or minute > 59 or second > 59:
+            return None
+        # 24:00:00 is the midnight ending the day, and no other time has hour 24
+        if hour > 24 or hour == 24 and (minute or second or (fraction or "0").strip("0")):
+            return None
+        seconds = hour * 3600 + minute * 60 + second
+        microseconds = int((fraction or "0")[:6].ljust(6, "0"))
+        instant = (
+            _days_from_civil(year, month, day) * MICROSECONDS_PER_DAY
+            + seconds * MICROSECONDS_PER_SECOND
+            + microseconds
+            - _offset(timezone)
+        )
+        return instant, instant
+
+    m = _DATE.fullmatch(lexical)
+    if m is not None:
+        year, month, day, timezone = m.groups()
+        year, month, day = int(year), int(month), int(day)
+        if not _is_date(year, month, day):
+            return None
+        return _day_span(year, month, day, timezone, 1)
+
+    m = _G_YEAR_MONTH.fullmatch(lexical)
+    if m is not None:
+        year, month, timezone = m.groups()
+        year, month = int(year), int(month)
+        if not 1 <= month <= 12:
+            return None
+        return _day_span(year, month, 1, timezone, _days_in_month(year, month))
+
+    m = _G_YEAR.fullmatch(lexical)
+    if m is not None:
+        year, timezone = m.groups()
+        year = int(year)
+        days = _days_from_civil(year + 1, 1, 1) - _days_from_civil(year, 1, 1)
+        return _day_span(year, 1, 1, timezone, days)
+
+    return None
+
+
+def to_span(literal: Literal) -> Optional[Span]:
+    """The (earliest, latest) microseconds since the Unix epoch denoted by an XSD date or time literal, or None if the
+    literal's lexical form is not that of an xsd:dateTime(Stamp), xsd:date, xsd:gYearMonth or xsd:gYear"""
+    return _parse(str(literal))
+
+
+def unix_time_span(literal: Literal) -> Optional[Span]:
+    """The microsecond denoted by a numeric position counting seconds since 1970-01-01T00:00:00Z, or None if the
+    literal's lexical form is not a number"""
+    try:
+        microseconds = Decimal(str(literal).strip()) * MICROSECONDS_PER_SECOND
+    except InvalidOperation:
+        return None
+    if not microseconds.is_finite():
+        return None
+    instant = int(microseconds.to_integral_value(rounding=ROUND_FLOOR))
+    return instant, instant
+
+
+# the Unix time temporal reference system, as OWL TIME's examples name it
+UNIX_TIME = URIRef("http://dbpedia.org/resource/Unix_time")
+
+# the conversions of numeric positions to spans, by the IRI of their temporal reference system. Add to these before
+# any index is built to compare positions in other systems.
+TRS: Dict[URIRef, Callable[[Literal], Optional[Span]]] = {
+    UNIX_TIME: unix_time_span,
+}
+
+
+def cache_info():
+    """Hit, miss and size statistics for the conversion cache, as per functools.lru_cache"""
+    return _parse.cache_info()
+
+
+def before(x: Span, y: Span) -> bool:
+    """True if all of span x is before all of span y"""
+    return x[1] < y[0]
+
+
+def after(x: Span, y: Span) -> bool:
+    """True if all of span x is after all of span y"""
+    return x[0] > y[1]